@@ -0,0 +1,145 @@
+"""
+Synthetic Gradescope pages for benchmarks.
+
+The markup follows the structure main.py relies on (csrf-token meta tag,
+courseList/courseBox dashboard, #assignments-student-table) and pads each page
+with the kind of navigation and script boilerplate the real site sends, so page
+sizes and parse times are realistic.
+
+    python -m bench.fixtures OUTPUT_DIR   # write sample pages to disk
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+TERMS = ["Fall 2026", "Spring 2026", "Fall 2025", "Spring 2025", "Fall 2024"]
+
+_BOILERPLATE_HEAD = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title} | Gradescope</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta name="csrf-param" content="authenticity_token">
+<meta name="csrf-token" content="{csrf}">
+<link rel="stylesheet" href="/assets/application-0a1b2c3d.css">
+<script src="/assets/application-4e5f6a7b.js" defer></script>
+</head><body class="{body_class}">
+<header class="pageHeader"><nav class="sidebar"><ul class="sidebar--menu">
+{nav}
+</ul></nav></header><main class="mainContent">
+"""
+
+_BOILERPLATE_TAIL = """</main>
+<footer class="footer"><p>&copy; Turnitin, LLC. All rights reserved.</p></footer>
+<script>window.gon={{"user_id":{user_id},"features":[{features}]}};</script>
+</body></html>
+"""
+
+
+def _page(title: str, body_class: str, content: str, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    nav = "\n".join(
+        f'<li class="sidebar--menuItem"><a href="/courses/{rng.randint(100000, 999999)}">Item {i}</a></li>'
+        for i in range(20)
+    )
+    head = _BOILERPLATE_HEAD.format(title=title, csrf=f"csrf-{seed:08d}", body_class=body_class, nav=nav)
+    features = ",".join(f'"feature_{i}"' for i in range(40))
+    return head + content + _BOILERPLATE_TAIL.format(user_id=seed, features=features)
+
+
+def login_page() -> str:
+    content = """<div class="loginForm"><form action="/login" method="post">
+<input type="hidden" name="authenticity_token" value="csrf-00000000">
+<input type="email" name="session[email]"><input type="password" name="session[password]">
+<input type="submit" name="commit" value="Log In"></form></div>
+"""
+    return _page("Log In", "loginPage", content)
+
+
+def account_page(courses_per_term: int = 5, terms: int = 3, first_course_id: int = 1000) -> str:
+    """Dashboard listing `terms` terms with `courses_per_term` courses each."""
+    sections = []
+    course_id = first_course_id
+    for term in TERMS[:terms]:
+        boxes = []
+        for i in range(courses_per_term):
+            boxes.append(
+                f'<a class="courseBox" href="/courses/{course_id}">'
+                f'<h3 class="courseBox--shortname">COURSE {course_id}</h3>'
+                f'<div class="courseBox--name">Course {course_id}: Topic {i}</div>'
+                f'<div class="courseBox--shortTerm">{term}</div>'
+                f'<div class="courseBox--assignments">{i + 3} assignments</div></a>'
+            )
+            course_id += 1
+        sections.append(
+            f'<div class="courseList"><div class="courseList--term">{term}</div>'
+            f'<div class="courseList--coursesForTerm">{"".join(boxes)}</div></div>'
+        )
+    return _page("Your Courses", "accountPage", "\n".join(sections))
+
+
+def _timestamp(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M:%S %z")
+
+
+def course_page(assignments: int = 50, seed: int = 0, now: datetime | None = None) -> str:
+    """
+    A course page whose assignments table has `assignments` rows with a mix
+    of graded, submitted, unsubmitted, expired and late-deadline entries.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    tz = timezone(timedelta(hours=-7))
+    rows = []
+    for i in range(assignments):
+        due = (now + timedelta(hours=rng.randint(-24 * 90, 24 * 30))).astimezone(tz).replace(second=0, microsecond=0)
+        release = due - timedelta(days=7)
+        kind = rng.random()
+        if kind < 0.3:
+            status = '<div class="submissionStatus--text">No Submission</div>'
+        elif kind < 0.6:
+            status = f'<div class="submissionStatus--score">{rng.randint(0, 10)}.0 / 10.0</div>'
+        else:
+            status = '<div class="submissionStatus--text">Submitted</div>'
+        times = (
+            f'<time class="submissionTimeChart--releaseDate" datetime="{_timestamp(release)}">{release:%b %d}</time>'
+            f'<time class="submissionTimeChart--dueDate" datetime="{_timestamp(due)}">Due Date: {due:%b %d at %I:%M%p}</time>'
+        )
+        if rng.random() < 0.25:
+            late = due + timedelta(days=2)
+            times += (
+                f'<time class="submissionTimeChart--dueDate" datetime="{_timestamp(late)}">'
+                f'Late Due Date: {late:%b %d at %I:%M%p}</time>'
+            )
+        rows.append(
+            f'<tr role="row" class="{"odd" if i % 2 else "even"}">'
+            f'<th class="table--primaryLink" role="rowheader" scope="row">'
+            f'<a aria-label="View Homework {i}" href="/courses/{seed}/assignments/{seed * 1000 + i}">Homework {i}</a></th>'
+            f'<td class="submissionStatus">{status}</td>'
+            f'<td class="submissionTimeChart--cell"><div class="submissionTimeChart">{times}'
+            f'<div class="progressBar"><div class="progressBar--caption">{rng.randint(0, 100)}%</div></div></div></td></tr>'
+        )
+    table = (
+        '<section class="courseDashboard"><h1 class="courseHeader--title">Course</h1>'
+        '<table class="table dataTable" id="assignments-student-table"><thead><tr>'
+        '<th>Name</th><th>Status</th><th>Released / Due</th></tr></thead><tbody>'
+        + "\n".join(rows)
+        + "</tbody></table></section>"
+    )
+    # 真实页面在作业表格之后还有大量脚本和模板，用于体现流式解析提前结束的收益
+    trailing = "".join(f'<script type="text/template" id="tpl-{i}">{"x" * 200}</script>' for i in range(50))
+    return _page("Course Dashboard", "courseDashboardPage", table + trailing, seed)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m bench.fixtures OUTPUT_DIR")
+        sys.exit(2)
+    out_dir = sys.argv[1]
+    os.makedirs(out_dir, exist_ok=True)
+    pages = {"login.html": login_page(), "account_synthetic.html": account_page()}
+    for size in (10, 100, 500):
+        pages[f"course_{size}.html"] = course_page(size, seed=size)
+    for name, html in pages.items():
+        with open(os.path.join(out_dir, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"wrote {name} ({len(html) // 1024} KiB)")
@@ -0,0 +1,93 @@
+"""
+Microbenchmarks for due-date parsing and filtering (duedates.py).
+
+    python -m bench.micro [--assignments 500] [--iterations 200]
+
+Compares the previous per-tag approach (string fix-up, then one
+datetime.fromisoformat() call inside a try/except) with
+duedates.parse_many(), and the per-row deadline check with the batched
+duedates.open_assignments(). parse_many() is measured with a cold and a warm
+memo cache; the standard layout bypasses the memo, so both should match the
+per-tag baseline, while "other layouts" (offsets like +05:30 or Z) go
+through the memoized parse() and show what the cache buys. Timestamps come
+from a synthetic course page (bench/fixtures.py).
+"""
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+from bench import fixtures
+from bench.run import measure, print_table
+from gradescope_scraper import duedates, parsers
+
+_DATETIME_ATTR_RE = re.compile(r'class="submissionTimeChart--dueDate" datetime="([^"]+)"')
+
+
+def _fromisoformat_per_tag(values: list[str]) -> list[datetime | None]:
+    """The parsing done per <time> tag before duedates.py existed."""
+    parsed = []
+    for dt_str in values:
+        try:
+            iso_str = dt_str[:10] + "T" + dt_str[11:]
+            iso_str = iso_str.replace(" ", "")
+            if "+" in iso_str and ":" not in iso_str[-5:]:
+                iso_str = iso_str[:-2] + ":" + iso_str[-2:]
+            parsed.append(datetime.fromisoformat(iso_str))
+        except Exception:
+            parsed.append(None)
+    return parsed
+
+
+def _filter_per_row(rows, now: datetime) -> list:
+    """The per-row deadline check done before duedates.open_assignments()."""
+    kept = []
+    for row in rows:
+        if "No Submission" not in row.status_text:
+            continue
+        due_at = row.due_at
+        if due_at is None or not now > due_at + timedelta(hours=24):
+            kept.append(row)
+    return kept
+
+
+def _cold(values: list[str]) -> None:
+    duedates.parse.cache_clear()
+    duedates.parse_many(values)
+
+
+def run_micro(assignments: int, iterations: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    html = fixtures.course_page(assignments, seed=1, now=now)
+    values = _DATETIME_ATTR_RE.findall(html)
+    rows = parsers.extract_assignment_rows(html, "https://www.gradescope.com/courses/1")
+    assert rows is not None
+    assert _fromisoformat_per_tag(values) == [duedates.parse(v) for v in values]
+    assert _filter_per_row(rows, now) == duedates.open_assignments(rows, now)[0]
+
+    n = len(values)
+    # 同一批时间戳改写为 "YYYY-MM-DDTHH:MM:SS±HH:MM"，走 parse() 的正则路径
+    other = [f"{v[:10]}T{v[11:19]}{v[20:23]}:{v[23:]}" for v in values]
+    assert list(duedates.parse_many(other).values()) == list(duedates.parse_many(values).values())
+    return [
+        measure(f"fromisoformat per tag [{n}]", lambda: _fromisoformat_per_tag(values), iterations, items=n),
+        measure(f"parse_many cold [{n}]", lambda: _cold(values), iterations, items=n),
+        measure(f"parse_many warm [{n}]", lambda: duedates.parse_many(values), iterations, items=n),
+        measure(f"other layouts cold [{n}]", lambda: _cold(other), iterations, items=n),
+        measure(f"other layouts warm [{n}]", lambda: duedates.parse_many(other), iterations, items=n),
+        measure(f"filter per row [{len(rows)}]", lambda: _filter_per_row(rows, now), iterations, items=len(rows)),
+        measure(f"open_assignments [{len(rows)}]", lambda: duedates.open_assignments(rows, now), iterations,
+                items=len(rows)),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for due-date parsing and filtering.")
+    parser.add_argument("--assignments", type=int, default=500, help="assignments on the synthetic page (default 500)")
+    parser.add_argument("--iterations", type=int, default=200, help="timed iterations per benchmark (default 200)")
+    args = parser.parse_args()
+    print_table(run_micro(args.assignments, max(1, args.iterations)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Offline benchmarks for the scraper against the local stand-in server.
+
+    python -m bench.run [--latency MS] [--iterations N] [--sizes 10,100,500] [--parse-processes P] [--json OUT]
+
+Each benchmark is timed over N iterations (throughput, p50/p95 latency), then
+run once more under tracemalloc to report peak memory (for the calling
+process only). Output printed by main.py is suppressed while timing.
+--parse-processes also times the full pipeline with the page parsing moved to
+that many worker processes (pipeline.py).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from bench.server import StandInServer
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(name: str, func: Callable[[], object], iterations: int, items: int = 1) -> dict:
+    """
+    Times `func` and measures its peak traced memory.
+
+    `items` is how many units of work (e.g. assignment rows) one call
+    processes, used for the throughput column.
+    """
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()  # warm-up: imports, connection set-up, lazy fixtures
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    total = sum(samples)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "throughput": items * iterations / total if total else float("inf"),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_benchmarks(latency: float, iterations: int, sizes: list[int], parse_processes: int = 0) -> list[dict]:
+    with StandInServer(latency=latency, course_sizes={size: size for size in sizes}) as server:
+        os.environ["GRADESCOPE_BASE_URL"] = server.base_url
+        # 基准测试测量冷路径：关闭所有跨运行缓存
+        os.environ["GRADESCOPE_SESSION_CACHE"] = "0"
+        os.environ["GRADESCOPE_PAGE_CACHE"] = "0"
+        # 只测量抓取与解析本身，不受按主机限速的影响
+        os.environ["GRADESCOPE_HOST_RATE"] = "0"
+        from gradescope_scraper import main
+        from gradescope_scraper.pipeline import ParsePipeline
+
+        email, password = "bench@example.com", "bench"
+
+        def login():
+            session = main.create_session()
+            assert main.login_to_gradescope(session, email, password) is not None, "login failed"
+            return session
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            session = login()
+            courses = main.get_courses(session)
+        results = [
+            measure("login_to_gradescope", login, iterations),
+            measure("get_courses", lambda: main.get_courses(session), iterations, items=len(courses)),
+        ]
+        for size in sizes:
+            url = f"{server.base_url}/courses/{size}"
+            results.append(measure(f"get_assignments[{size}]", lambda: main.get_assignments(session, url),
+                                   iterations, items=size))
+
+        def pipeline(parse_pipeline=None):
+            s = login()
+            assignments, failed = main.collect_unsubmitted(s, main.get_courses(s), pipeline=parse_pipeline)
+            assert not failed, f"courses failed: {failed}"
+            return assignments
+
+        results.append(measure(f"pipeline[{len(courses)} courses]", pipeline, iterations, items=len(courses)))
+        if parse_processes:
+            with ParsePipeline(parse_processes) as parse_pipeline:
+                results.append(measure(f"pipeline[{len(courses)}, {parse_processes} procs]",
+                                       lambda: pipeline(parse_pipeline), iterations, items=len(courses)))
+    return results
+
+
+def print_table(results: list[dict]) -> None:
+    header = f"{'benchmark':<28} {'iters':>5} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'peak KiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['name']:<28} {r['iterations']:>5} {r['throughput']:>10.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['peak_kib']:>9.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Gradescope scraper.")
+    parser.add_argument("--latency", type=float, default=0.0, help="per-request server latency in ms (default 0)")
+    parser.add_argument("--iterations", type=int, default=20, help="timed iterations per benchmark (default 20)")
+    parser.add_argument("--sizes", default="10,100,500", help="assignment counts of the course pages to time")
+    parser.add_argument("--parse-processes", type=int, default=0,
+                        help="also time the pipeline with this many parse processes")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run_benchmarks(args.latency / 1000, max(1, args.iterations), sizes, max(0, args.parse_processes))
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
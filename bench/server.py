@@ -0,0 +1,142 @@
+"""
+A local stand-in for gradescope.com serving synthetic fixtures.
+
+Routes:
+    GET  /login          login page with a csrf-token meta tag
+    POST /login          checks the token, sets a session cookie, redirects to /account
+    GET  /account        course list (redirects to /login without the cookie)
+    GET  /courses/<id>   course page whose size depends on the course id
+
+Every response is delayed by `latency` seconds to model network round-trips.
+"""
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from bench import fixtures
+
+SESSION_COOKIE = "_gradescope_session=bench-session"
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 流式解析会在作业表格结束后主动断开连接，这属于预期行为
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StandInServer:
+    """
+    Runs the stand-in on a background thread.
+
+    `course_sizes` maps course ids (as listed on /account, starting at 1000)
+    to assignment counts; unlisted ids get `default_size` assignments.
+    """
+
+    def __init__(self, latency: float = 0.0, courses_per_term: int = 5, terms: int = 3,
+                 course_sizes: dict[int, int] | None = None, default_size: int = 50):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._login = fixtures.login_page().encode("utf-8")
+        self._account = fixtures.account_page(courses_per_term, terms).encode("utf-8")
+        self._course_sizes = course_sizes or {}
+        self._default_size = default_size
+        self._courses: dict[int, bytes] = {}
+        self._httpd = _QuietHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def course_page(self, course_id: int) -> bytes:
+        with self._lock:
+            page = self._courses.get(course_id)
+            if page is None:
+                size = self._course_sizes.get(course_id, self._default_size)
+                page = fixtures.course_page(size, seed=course_id).encode("utf-8")
+                self._courses[course_id] = page
+            return page
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 整个响应一次写出，避免 Nagle + 延迟 ACK 给每个请求额外增加约 40ms
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _delay(self) -> None:
+                with server._lock:
+                    server.requests += 1
+                if server.latency > 0:
+                    time.sleep(server.latency)
+
+            def _send(self, status: int, body: bytes = b"", headers: dict[str, str] | None = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                self.wfile.flush()
+
+            def _logged_in(self) -> bool:
+                return SESSION_COOKIE in (self.headers.get("Cookie") or "")
+
+            def do_GET(self):
+                self._delay()
+                path = self.path.split("?", 1)[0]
+                if path == "/login":
+                    self._send(200, server._login)
+                elif path == "/account":
+                    if self._logged_in():
+                        self._send(200, server._account)
+                    else:
+                        self._send(302, headers={"Location": "/login"})
+                elif match := re.fullmatch(r"/courses/(\d+)", path):
+                    if self._logged_in():
+                        self._send(200, server.course_page(int(match.group(1))))
+                    else:
+                        self._send(302, headers={"Location": "/login"})
+                else:
+                    self._send(404, b"not found")
+
+            def do_POST(self):
+                self._delay()
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                if self.path != "/login":
+                    self._send(404, b"not found")
+                elif form.get("authenticity_token") == ["csrf-00000000"] and form.get("session[email]"):
+                    self._send(302, headers={"Location": "/account", "Set-Cookie": f"{SESSION_COOKIE}; path=/"})
+                else:
+                    self._send(302, headers={"Location": "/login"})
+
+        return Handler
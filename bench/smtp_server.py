@@ -0,0 +1,93 @@
+"""
+A local SMTP stand-in for trying the mail outbox without a real server.
+
+Needs `aiosmtpd` (pip install aiosmtpd). Accepted messages are kept in memory
+and printed; `fail_next` makes the next N messages fail with a 451 so retries
+can be observed.
+
+    python -m bench.smtp_server [--port 8025]
+
+then run the scraper with SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_SECURITY=none
+SMTP_FROM=... SMTP_TO=... (no SMTP_USER, so no login is attempted).
+"""
+import argparse
+import socket
+import threading
+import time
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # pragma: no cover - optional dependency
+    Controller = None
+
+
+def _free_port() -> int:
+    # aiosmtpd 的 Controller 不支持端口 0，先向系统要一个空闲端口
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _Handler:
+    def __init__(self, server: "StandInSMTP"):
+        self.server = server
+
+    async def handle_DATA(self, smtp_server, session, envelope):
+        with self.server._lock:
+            if self.server.fail_next > 0:
+                self.server.fail_next -= 1
+                return "451 Temporary failure, try again later"
+            self.server.messages.append(envelope)
+            self.server.sessions.add(id(session))
+        if self.server.verbose:
+            print(f"Received message for {', '.join(envelope.rcpt_tos)} ({len(envelope.content)} bytes)")
+        return "250 Message accepted"
+
+
+class StandInSMTP:
+    """
+    Runs an aiosmtpd server on a background thread.
+
+    `messages` holds the accepted envelopes; `connections` counts the distinct
+    SMTP sessions they arrived on.
+    """
+
+    def __init__(self, port: int = 0, fail_next: int = 0, verbose: bool = False):
+        if Controller is None:
+            raise RuntimeError("the SMTP stand-in needs aiosmtpd: pip install aiosmtpd")
+        self.fail_next = fail_next
+        self.verbose = verbose
+        self.messages: list = []
+        self.sessions: set[int] = set()
+        self._lock = threading.Lock()
+        self.port = port or _free_port()
+        self._controller = Controller(_Handler(self), hostname="127.0.0.1", port=self.port)
+
+    @property
+    def connections(self) -> int:
+        return len(self.sessions)
+
+    def __enter__(self) -> "StandInSMTP":
+        self._controller.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._controller.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local SMTP stand-in.")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-next", type=int, default=0, help="reject this many messages first")
+    args = parser.parse_args()
+    with StandInSMTP(args.port, args.fail_next, verbose=True) as server:
+        print(f"SMTP stand-in listening on 127.0.0.1:{server.port} (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
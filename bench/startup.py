@@ -0,0 +1,107 @@
+"""
+Start-up time of the `gradescope-scraper` command.
+
+    python -m bench.startup [--iterations N] [--json OUT]
+
+Each case is run as a fresh interpreter N times (after one warm-up run, which
+also writes the .pyc files) and the wall time until it exits is reported,
+together with the heavy third-party and standard-library modules it imported
+(from `python -X importtime`). No credentials or network access are needed:
+the scraping cases stop at the missing-credentials check or only import the
+modules.
+
+"eager imports" loads everything main.py imported at start-up before the
+package layout (requests, bs4, the parser backends, smtplib, asyncio,
+multiprocessing, httpx, msgpack) plus the package, for comparison with the
+lazy paths.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.run import percentile
+
+# 统计这些模块是否被加载（只看顶层包名）
+HEAVY_MODULES = ("requests", "bs4", "selectolax", "lxml", "httpx", "smtplib", "asyncio",
+                 "multiprocessing", "msgpack", "pyarrow")
+
+_EAGER = ("import requests, bs4, smtplib, asyncio, multiprocessing, concurrent.futures.process\n"
+          "for name in ('selectolax.lexbor', 'lxml.html', 'httpx', 'msgpack'):\n"
+          "    try:\n        __import__(name)\n    except ImportError:\n        pass\n"
+          "import gradescope_scraper.main, gradescope_scraper.notifiers")
+
+CASES = [
+    ("python (empty)", ["-c", "pass"]),
+    ("--help", ["-m", "gradescope_scraper", "--help"]),
+    ("--check-config", ["-m", "gradescope_scraper", "--check-config"]),
+    ("no credentials", ["-m", "gradescope_scraper"]),
+    ("import main (lazy)", ["-c", "import gradescope_scraper.main"]),
+    ("eager imports", ["-c", _EAGER]),
+]
+
+_IMPORT_RE = re.compile(r"^import time:\s+\d+ \|\s+\d+ \| *(\S+)$")
+
+
+def _environment(cache_dir: str) -> dict[str, str]:
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("GRADESCOPE_EMAIL", "GRADESCOPE_PASSWORD", "PYTHONDONTWRITEBYTECODE")}
+    env["GRADESCOPE_CACHE_DIR"] = cache_dir
+    return env
+
+
+def heavy_imports(args: list[str], env: dict[str, str]) -> list[str]:
+    """The HEAVY_MODULES that `python args` imports."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], env=env,
+                            capture_output=True, text=True)
+    loaded = {match[1].split(".")[0] for match in map(_IMPORT_RE.match, result.stderr.splitlines()) if match}
+    return [name for name in HEAVY_MODULES if name in loaded]
+
+
+def measure_startup(name: str, args: list[str], iterations: int, env: dict[str, str]) -> dict:
+    command = [sys.executable, *args]
+    subprocess.run(command, env=env, capture_output=True)  # warm-up: page cache, .pyc files
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return {
+        "name": name,
+        "iterations": iterations,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "min_ms": min(samples) * 1000,
+        "imports": heavy_imports(args, env),
+    }
+
+
+def print_table(results: list[dict]) -> None:
+    header = f"{'case':<20} {'iters':>5} {'p50 ms':>8} {'min ms':>8}  heavy imports"
+    print(header)
+    print("-" * (len(header) + 30))
+    for r in results:
+        print(f"{r['name']:<20} {r['iterations']:>5} {r['p50_ms']:>8.1f} {r['min_ms']:>8.1f}  "
+              f"{', '.join(r['imports']) or '-'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Start-up time of the gradescope-scraper command.")
+    parser.add_argument("--iterations", type=int, default=10, help="runs per case (default 10)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = _environment(cache_dir)
+        results = [measure_startup(name, case, max(1, args.iterations), env) for name, case in CASES]
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Gradescope scraper: finds unsubmitted Gradescope assignments and sends
+notifications about them.
+
+Run it with the `gradescope-scraper` command (see cli.py) or
+`python -m gradescope_scraper`. For use as a library, the asyncio client
+(needs `httpx`) is available from the package itself:
+
+    from gradescope_scraper import GradescopeClient
+
+Submodules are imported on first use, so importing the package is cheap.
+"""
+import importlib
+
+# 公开名称 -> 所在子模块；首次访问时才导入（PEP 562）
+_EXPORTS = {
+    "GradescopeClient": "client",
+    "ConnectionPool": "client",
+    "CourseResult": "client",
+    "GradescopeError": "client",
+    "LoginError": "client",
+    "RequestError": "client",
+    "Assignment": "records",
+    "Course": "records",
+    "DueDate": "records",
+    "Status": "records",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
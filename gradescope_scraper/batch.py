@@ -0,0 +1,171 @@
+"""
+Batch mode: checks many Gradescope accounts in one process.
+
+Accounts are read from a CSV file, one account per line:
+
+    email,password[,notify_to]
+
+Blank lines and lines starting with '#' are ignored. Each account gets its own
+session (and therefore its own cookie jar); accounts are processed in parallel
+while every request in the process shares one global rate limit.
+
+Usage:
+    gradescope-scraper batch accounts.csv [-o results.json] [--workers N] [--rate R] [--parse-processes P] [--notify]
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .main import (
+    collect_unsubmitted,
+    create_session,
+    discover_courses,
+    login_with_cache,
+    page_cache_enabled,
+    report_changes,
+    send_notification,
+)
+from .page_cache import PageCache
+from .pipeline import ParsePipeline, parse_processes
+from . import instrument
+from . import mailer
+from . import notifiers
+from . import throttle
+from . import transport
+
+DEFAULT_WORKERS = 8
+# 所有账号共享的全局请求速率（每秒请求数）
+DEFAULT_RATE_LIMIT = 5.0
+
+
+@dataclass
+class Account:
+    email: str
+    password: str
+    notify_to: str | None = None
+
+
+def load_accounts(path: str) -> list[Account]:
+    """Reads `email,password[,notify_to]` rows from a CSV file."""
+    accounts = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, row in enumerate(csv.reader(f), start=1):
+            if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                continue
+            if len(row) < 2:
+                print(f"Warning: {path}:{line_no}: expected 'email,password[,notify_to]', skipping.")
+                continue
+            notify_to = row[2].strip() if len(row) > 2 and row[2].strip() else None
+            accounts.append(Account(row[0].strip(), row[1], notify_to))
+    return accounts
+
+
+def check_account(account: Account, notify: bool = False, pipeline: ParsePipeline | None = None) -> dict:
+    """
+    Logs in as one account and collects its unsubmitted assignments.
+
+    Never raises: any failure is recorded in the returned result's 'error'.
+    """
+    result = {
+        "email": account.email,
+        "ok": False,
+        "error": None,
+        "courses": 0,
+        "failed_courses": [],
+        "assignments": [],
+        "changes": None,
+        "connections": None,
+    }
+    session = None
+    try:
+        session = create_session()
+        if login_with_cache(session, account.email, account.password) is None:
+            result["error"] = "login failed"
+            return result
+        courses = discover_courses(session, account.email)
+        cache = PageCache.for_account(account.email) if page_cache_enabled() else None
+        assignments, failed_courses = collect_unsubmitted(session, courses, cache=cache, pipeline=pipeline)
+        result.update(ok=True, courses=len(courses), failed_courses=failed_courses,
+                      assignments=[a.to_dict() for a in assignments])
+        diff = report_changes(account.email, courses, assignments, failed_courses, notify=notify,
+                              to_addr=account.notify_to, verbose=False)
+        if diff is not None:
+            result["changes"] = {key: [a.to_dict() for a in getattr(diff, key)]
+                                 for key in ("new", "changed", "submitted", "expired")}
+        elif notify and assignments:
+            send_notification(assignments, to_addr=account.notify_to, account=account.email)
+    except Exception as e:
+        result["error"] = repr(e)
+    if session is not None:
+        result["connections"] = transport.connection_stats(session)
+    return result
+
+
+def run_batch(accounts: list[Account], workers: int = DEFAULT_WORKERS, notify: bool = False,
+              parse_processes: int = 0) -> list[dict]:
+    """
+    Checks all accounts in parallel; results keep the order of `accounts`.
+
+    With `parse_processes`, the course pages of every account are parsed by
+    one shared pool of that many processes (see pipeline.py).
+    """
+    if not accounts:
+        return []
+    with ParsePipeline(parse_processes) if parse_processes else contextlib.nullcontext() as pipeline:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(accounts)))) as pool:
+            return list(pool.map(lambda account: check_account(account, notify, pipeline), accounts))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="gradescope-scraper batch",
+                                     description="Check many Gradescope accounts in one process.")
+    parser.add_argument("accounts", help="CSV file with email,password[,notify_to] rows")
+    parser.add_argument("-o", "--output", help="write per-account results to this JSON file")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("GRADESCOPE_BATCH_WORKERS", DEFAULT_WORKERS)),
+                        help=f"accounts processed in parallel (default {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=float(os.getenv("GRADESCOPE_RATE_LIMIT", DEFAULT_RATE_LIMIT)),
+                        help=f"global request rate limit per second, 0 disables it (default {DEFAULT_RATE_LIMIT})")
+    parser.add_argument("--parse-processes", type=int, default=parse_processes(),
+                        help="parse course pages in this many worker processes (default 0: in the download threads; "
+                             "also GRADESCOPE_PARSE_PROCESSES)")
+    parser.add_argument("--notify", action="store_true",
+                        help="email each account's new or changed assignments to its notify_to (or SMTP_TO)")
+    args = parser.parse_args(argv)
+
+    accounts = load_accounts(args.accounts)
+    print(f"Loaded {len(accounts)} accounts from {args.accounts}.")
+    throttle.set_rate_limit(args.rate)
+    # 邮件由后台线程投递，不阻塞后续账号的检查
+    deliverer = mailer.Deliverer() if args.notify and notifiers.email_enabled() else contextlib.nullcontext()
+    with instrument.profiling(), instrument.span("run", accounts=len(accounts)), deliverer:
+        results = run_batch(accounts, workers=args.workers, notify=args.notify,
+                            parse_processes=max(0, args.parse_processes))
+
+    print("\n--- Batch Summary ---")
+    for result in results:
+        if result["ok"]:
+            line = f"  {result['email']}: {len(result['assignments'])} unsubmitted in {result['courses']} courses"
+            if result["changes"]:
+                line += f", {len(result['changes']['new'])} new, {len(result['changes']['changed'])} changed"
+            if result["failed_courses"]:
+                line += f" ({len(result['failed_courses'])} failed)"
+        else:
+            line = f"  {result['email']}: ERROR {result['error']}"
+        print(line)
+
+    print("\n--- Timing Summary ---")
+    print(instrument.summary())
+    print(f"Request stats: {throttle.stats()}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Results written to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
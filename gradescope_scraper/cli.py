@@ -0,0 +1,166 @@
+"""
+The `gradescope-scraper` command.
+
+    gradescope-scraper                      # check GRADESCOPE_EMAIL once (main.py)
+    gradescope-scraper batch accounts.csv   # many accounts (batch.py)
+    gradescope-scraper daemon               # keep running (daemon.py)
+    gradescope-scraper export out.csv       # every assignment to CSV/Parquet (export.py)
+    gradescope-scraper --check-config       # validate the environment and exit
+
+`python -m gradescope_scraper` does the same. Arguments after the command
+name are passed on to that mode unchanged.
+
+This module only imports the standard library. The scraper modules, and with
+them requests, the HTML parsers and the SMTP client, are imported once a
+command has been chosen and its credentials are present, so `--help`,
+`--check-config` and a missing-credentials error all return at once.
+--check-config reads every setting without any network access.
+"""
+import argparse
+import importlib
+import importlib.util
+import os
+import sys
+
+# 子命令 -> "模块:函数"；不带子命令时运行 main:run
+COMMANDS = {"batch": "batch:main", "daemon": "daemon:main", "export": "export:run"}
+# 这些命令需要 GRADESCOPE_EMAIL/GRADESCOPE_PASSWORD（batch 从文件读取账号）
+_NEEDS_CREDENTIALS = {None, "daemon", "export"}
+
+_INTEGER_SETTINGS = (
+    "GRADESCOPE_CONCURRENCY",
+    "GRADESCOPE_POOL_SIZE",
+    "GRADESCOPE_PARSE_PROCESSES",
+    "GRADESCOPE_BATCH_WORKERS",
+)
+_NUMBER_SETTINGS = (
+    "GRADESCOPE_GRACE_HOURS",
+    "GRADESCOPE_COURSE_CACHE_TTL",
+    "GRADESCOPE_CONNECT_TIMEOUT",
+    "GRADESCOPE_READ_TIMEOUT",
+    "GRADESCOPE_NOTIFY_TIMEOUT",
+    "GRADESCOPE_HOST_RATE",
+    "GRADESCOPE_RATE_LIMIT",
+    "GRADESCOPE_BREAKER_THRESHOLD",
+    "GRADESCOPE_BREAKER_COOLDOWN",
+    "GRADESCOPE_BACKOFF_CAP",
+    "GRADESCOPE_DAEMON_MIN_INTERVAL",
+    "GRADESCOPE_DAEMON_MAX_INTERVAL",
+)
+
+
+def _has_credentials() -> bool:
+    return bool(os.getenv("GRADESCOPE_EMAIL") and os.getenv("GRADESCOPE_PASSWORD"))
+
+
+def _writable(path: str) -> bool:
+    """Whether `path` is (or could be created as) a writable directory."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return os.path.isdir(path) and os.access(path, os.W_OK)
+
+
+def check_config() -> list[str]:
+    """
+    Validates the settings in the environment without any network access.
+
+    Settings the modes would silently fall back on (a malformed number, an
+    unavailable parser backend, a notifier without its setting) are reported
+    too, since they usually mean a typo. Returns the problems found; an empty
+    list means the configuration is usable.
+    """
+    from . import mailer
+    from . import notifiers
+    from . import parsers
+    from . import session_store
+
+    problems = []
+    if not _has_credentials():
+        problems.append("GRADESCOPE_EMAIL and GRADESCOPE_PASSWORD environment variables must be set")
+
+    for name in _INTEGER_SETTINGS + _NUMBER_SETTINGS:
+        value = os.getenv(name)
+        if not value:
+            continue
+        try:
+            int(value) if name in _INTEGER_SETTINGS else float(value)
+        except ValueError:
+            kind = "an integer" if name in _INTEGER_SETTINGS else "a number"
+            problems.append(f"{name} must be {kind}, got {value!r}")
+
+    parser = (os.getenv("GRADESCOPE_PARSER") or "auto").lower()
+    available = parsers.available_backends()
+    if not available:
+        problems.append("no HTML parser is installed: pip install beautifulsoup4")
+    elif parser != "auto" and parser not in available:
+        problems.append(f"GRADESCOPE_PARSER={parser!r} is not available (installed: {', '.join(available)})")
+    else:
+        print(f"Parser backend: {parser if parser != 'auto' else available[0]}")
+
+    if os.getenv("GRADESCOPE_HTTP2") == "1" and importlib.util.find_spec("httpx") is None:
+        problems.append("GRADESCOPE_HTTP2=1 needs httpx: pip install 'httpx[http2]'")
+
+    names = notifiers.notifier_names()
+    # 配置不全的后端会被 configured_notifiers() 跳过并打印警告
+    configured = notifiers.configured_notifiers()
+    if len(configured) < len(names):
+        problems.append("GRADESCOPE_NOTIFIERS lists notifiers that cannot be used (see the warnings above)")
+    if any(notifier.name == "email" for notifier in configured):
+        config = mailer.SmtpConfig.from_env()
+        if config is None:
+            problems.append("the email notifier needs valid SMTP settings (see the error above)")
+        elif not os.getenv("SMTP_TO") or not config.from_addr:
+            problems.append("the email notifier needs SMTP_TO and SMTP_FROM (or SMTP_USER)")
+    print(f"Notifiers: {', '.join(notifier.name for notifier in configured) or 'none'}")
+
+    cache_dir = session_store.cache_dir()
+    if not _writable(cache_dir):
+        problems.append(f"the cache directory {cache_dir!r} is not writable (GRADESCOPE_CACHE_DIR)")
+    else:
+        print(f"Cache directory: {cache_dir}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the command given by `argv` (default: sys.argv[1:]); returns the exit status."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = argv[0] if argv and argv[0] in COMMANDS else None
+    rest = argv[1:] if command else argv
+
+    if command is None:
+        parser = argparse.ArgumentParser(
+            prog="gradescope-scraper",
+            description="Check Gradescope for unsubmitted assignments and send notifications.",
+            epilog="commands (each has its own --help): batch, daemon, export. "
+                   "Without a command the account in GRADESCOPE_EMAIL/GRADESCOPE_PASSWORD is checked once.",
+        )
+        parser.add_argument("--check-config", action="store_true",
+                            help="validate the environment variables without logging in, then exit")
+        args = parser.parse_args(rest)
+        if args.check_config:
+            problems = check_config()
+            for problem in problems:
+                print(f"Error: {problem}")
+            print("Configuration OK." if not problems else f"{len(problems)} problem(s) found.")
+            return 1 if problems else 0
+
+    # 缺少账号时在导入 requests 等依赖之前就退出
+    if command in _NEEDS_CREDENTIALS and not _has_credentials() and not {"-h", "--help"} & set(rest):
+        print("Error: GRADESCOPE_EMAIL and GRADESCOPE_PASSWORD environment variables must be set.")
+        return 1
+
+    if command is None:
+        from .main import run
+
+        run()
+        return 0
+    module, function = COMMANDS[command].split(":")
+    return getattr(importlib.import_module(f".{module}", __package__), function)(rest) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
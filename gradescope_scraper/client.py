@@ -0,0 +1,325 @@
+"""
+Asyncio client for using the scraper as a library.
+
+    async with ConnectionPool() as pool:
+        async with GradescopeClient(email, password, pool=pool) as client:
+            await client.login()
+            async for result in client.iter_assignments():
+                ...  # result.course, result.assignments, result.error
+
+GradescopeClient returns records (records.Course, records.Assignment)
+instead of printing, and raises GradescopeError on failure. Any number of
+clients, one per account, can run in one event loop over a shared
+ConnectionPool: a single httpx connection pool (keep-alive, HTTP/2 with
+GRADESCOPE_HTTP2=1), while every client keeps its own cookies. Requests go
+through the same rate limits, retry policy and circuit breaker as the
+synchronous code (throttle.py), so threads and coroutines share one budget.
+
+Needs the optional `httpx` package (`httpx[http2]` for HTTP/2).
+
+    python -m gradescope_scraper.client    # checks GRADESCOPE_EMAIL once, prints JSON
+"""
+import asyncio
+import json
+import os
+import sys
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from . import course_list
+from . import duedates
+from . import parsers
+from . import settings
+from . import throttle
+from .instrument import span
+from .settings import BASE_URL, DEFAULT_CONCURRENCY, DEFAULT_HEADERS
+from .records import Assignment, Course
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+
+class GradescopeError(Exception):
+    """Base class of the errors raised by GradescopeClient."""
+
+
+class LoginError(GradescopeError):
+    pass
+
+
+class RequestError(GradescopeError):
+    """A request failed for good (after its retries, or refused by the circuit breaker)."""
+
+
+@dataclass(slots=True)
+class CourseResult:
+    course: Course
+    assignments: list[Assignment]
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _SharedTransport(httpx.AsyncBaseTransport if httpx is not None else object):
+    """Hands requests to the pool's transport; closing a client leaves the pool open."""
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    async def handle_async_request(self, request):
+        return await self._inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class ConnectionPool:
+    """
+    One HTTP connection pool for any number of GradescopeClients.
+
+    `max_connections` defaults to GRADESCOPE_POOL_SIZE or
+    settings.DEFAULT_POOL_SIZE; `http2` to GRADESCOPE_HTTP2. Timeouts come
+    from settings.timeouts().
+    """
+
+    def __init__(self, max_connections: int | None = None, http2: bool | None = None):
+        if httpx is None:
+            raise RuntimeError("httpx is not installed: pip install httpx")
+        size = int(os.getenv("GRADESCOPE_POOL_SIZE") or max_connections or settings.DEFAULT_POOL_SIZE)
+        self._transport = httpx.AsyncHTTPTransport(
+            http2=settings.http2_enabled() if http2 is None else http2,
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+        )
+        connect, read = settings.timeouts()
+        self.timeout = httpx.Timeout(read, connect=connect)
+
+    def client(self, headers: dict[str, str]) -> "httpx.AsyncClient":
+        """A client with its own cookie jar on top of the shared connections."""
+        return httpx.AsyncClient(transport=_SharedTransport(self._transport), headers=headers,
+                                 timeout=self.timeout, follow_redirects=True)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    async def __aenter__(self) -> "ConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+
+class GradescopeClient:
+    """
+    One Gradescope account.
+
+    Without `pool` the client opens (and on close, closes) a pool of its
+    own. `concurrency` bounds the course pages iter_assignments() fetches at
+    once (default GRADESCOPE_CONCURRENCY); `retries` is the number of
+    attempts per request.
+    """
+
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        *,
+        pool: ConnectionPool | None = None,
+        base_url: str | None = None,
+        concurrency: int | None = None,
+        retries: int = 2,
+    ):
+        self.email = email
+        self._password = password
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        self._own_pool = pool is None
+        self.pool = pool or ConnectionPool()
+        headers = dict(DEFAULT_HEADERS, Referer=f"{self.base_url}/login")
+        headers["Accept-Encoding"] = settings.accept_encoding()
+        self._http = self.pool.client(headers)
+        self.concurrency = max(1, concurrency or int(os.getenv("GRADESCOPE_CONCURRENCY") or DEFAULT_CONCURRENCY))
+        self.retries = max(1, retries)
+        self.logged_in = False
+        # 登录后停留在 /account 时保存该页面，courses() 第一次调用时直接使用
+        self._account_page: str | None = None
+
+    async def _request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        """
+        Sends a request the way main.safe_request() does (rate limits,
+        classified retries, circuit breaker) and returns the response, or
+        raises RequestError.
+        """
+        host = urlsplit(url).netloc
+        with span("request", method=method, url=url) as s:
+            permit = throttle.breaker.allow(host)
+            if not permit:
+                s.set(error="circuit open")
+                raise RequestError(f"{method} {url}: circuit breaker for {host} is open")
+
+            try:
+                last_error = None
+                for attempt in range(1, self.retries + 1):
+                    await throttle.athrottle(host)
+                    throttle.record("requests")
+                    response = None
+                    try:
+                        response = await self._http.request(method, url, **kwargs)
+                    except httpx.TransportError as e:
+                        last_error = repr(e)
+                        reason, retryable, host_failure = throttle.policy.classify(error=e)
+                    else:
+                        if response.status_code < 400:
+                            throttle.breaker.record_success(host)
+                            s.set(status=response.status_code, retries=attempt - 1, bytes=len(response.content))
+                            return response
+                        last_error = f"HTTP {response.status_code} {response.reason_phrase}"
+                        reason, retryable, host_failure = throttle.policy.classify(status=response.status_code)
+
+                    if host_failure:
+                        throttle.breaker.record_failure(host, trial=permit is throttle.Permit.TRIAL)
+                    elif response is not None:
+                        throttle.breaker.record_success(host)
+                    if not retryable or attempt >= self.retries or throttle.breaker.is_open(host):
+                        break
+                    delay = throttle.policy.delay(attempt, response)
+                    throttle.record("retries")
+                    throttle.record(f"retry_{reason}")
+                    throttle.record("backoff_s", delay)
+                    bucket = throttle.host_bucket(host) if reason == "429" else None
+                    if bucket is not None:
+                        bucket.pause(delay)
+                    else:
+                        await asyncio.sleep(delay)
+
+                throttle.record("gave_up")
+                s.set(retries=attempt - 1, error=last_error)
+                raise RequestError(f"{method} {url} failed after {attempt} attempt(s): {last_error}")
+            finally:
+                # 与 safe_request() 相同：持有半开试探名额时无论结果如何都要释放
+                if permit is throttle.Permit.TRIAL:
+                    throttle.breaker.release(host)
+
+    async def login(self) -> None:
+        """Logs in; raises LoginError if Gradescope does not accept the credentials."""
+        login_url = f"{self.base_url}/login"
+        with span("login"):
+            page = await self._request("GET", login_url)
+            token = parsers.extract_csrf_token(page.text)
+            if token is None:
+                raise LoginError("no csrf-token on the login page")
+            response = await self._request("POST", login_url, data={
+                "session[email]": self.email,
+                "session[password]": self._password,
+                "authenticity_token": token,
+                "commit": "Log In",
+            })
+        if str(response.url) not in (f"{self.base_url}/courses", f"{self.base_url}/account"):
+            raise LoginError(f"login failed for {self.email} (ended on {response.url})")
+        self.logged_in = True
+        if str(response.url) == f"{self.base_url}/account":
+            self._account_page = response.text
+
+    async def courses(self, terms: str | None = None) -> list[Course]:
+        """
+        The account's courses of the selected terms (default GRADESCOPE_TERMS,
+        see course_list.py). The first call after login() reuses the /account
+        page the login ended on.
+        """
+        url = f"{self.base_url}/account"
+        page, self._account_page = self._account_page, None
+        if page is None:
+            page = (await self._request("GET", url)).text
+        with span("parse", url=url) as s:
+            listed = parsers.extract_courses(page, url)
+            s.set(courses=len(listed))
+        return course_list.select_courses(listed, terms)
+
+    async def assignments(self, course: Course, open_only: bool = False) -> list[Assignment]:
+        """
+        Every row of the course's assignments table, with course_name and
+        course_url filled in. With `open_only`, just the unsubmitted ones
+        that have not expired (see duedates.open_assignments()). Raises
+        RequestError if the page has no assignments table (e.g. the session
+        expired and Gradescope redirected to the login page).
+        """
+        response = await self._request("GET", course.url)
+        with span("parse", url=course.url, backend=parsers.get_backend()) as s:
+            rows = parsers.extract_assignment_rows(response.text, course.url)
+            s.set(rows=len(rows) if rows is not None else 0)
+        if rows is None:
+            # 登录跳转或错误页面不能当作没有作业的课程
+            raise RequestError(f"GET {course.url}: the page has no assignments table")
+        for row in rows:
+            row.course_name = course.name
+            row.course_url = course.url
+        return duedates.open_assignments(rows)[0] if open_only else rows
+
+    async def iter_assignments(
+        self,
+        courses: Iterable[Course] | None = None,
+        open_only: bool = False,
+    ) -> AsyncIterator[CourseResult]:
+        """
+        Fetches the assignments of `courses` (default: courses()) at most
+        `concurrency` at a time and yields one CourseResult per course as
+        soon as it completes. A failed course is reported in its result's
+        `error` instead of ending the iteration.
+        """
+        if courses is None:
+            courses = await self.courses()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(course: Course) -> CourseResult:
+            async with semaphore:
+                with span("course", url=course.url) as s:
+                    try:
+                        return CourseResult(course, await self.assignments(course, open_only))
+                    except Exception as e:
+                        s.set(error=repr(e))
+                        return CourseResult(course, [], e)
+
+        tasks = [asyncio.create_task(fetch(course)) for course in courses]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+        if self._own_pool:
+            await self.pool.aclose()
+
+    async def __aenter__(self) -> "GradescopeClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+
+async def _check(email: str, password: str) -> dict:
+    async with GradescopeClient(email, password) as client:
+        await client.login()
+        results = [result async for result in client.iter_assignments(open_only=True)]
+    return {
+        "assignments": [a.to_dict() for result in results for a in result.assignments],
+        "failed_courses": {result.course.name: repr(result.error) for result in results if not result.ok},
+    }
+
+
+if __name__ == "__main__":
+    email = os.getenv("GRADESCOPE_EMAIL")
+    password = os.getenv("GRADESCOPE_PASSWORD")
+    if not email or not password:
+        print("Error: GRADESCOPE_EMAIL and GRADESCOPE_PASSWORD environment variables must be set.")
+        sys.exit(2)
+    try:
+        print(json.dumps(asyncio.run(_check(email, password)), ensure_ascii=False, indent=2))
+    except GradescopeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,184 @@
+"""
+Course discovery: terms, term selection and the cached course list.
+
+The /account dashboard lists every course the account ever had, grouped into
+`courseList--term` sections ("Fall 2025", "Spring 2026", ...). Past terms
+never produce notifications, so only the courses of the selected terms are
+checked. GRADESCOPE_TERMS chooses them:
+
+- "current" (default): the terms in session today. Every listed term whose
+  rough calendar window (Term.window()) contains today is kept, so a quarter
+  school's Winter and a semester school's Spring both count in February;
+  terms that have not started yet are skipped even though the dashboard
+  already lists them. Between terms, the latest term that has started is
+  used.
+- "all": every course
+- a comma-separated list of terms, e.g. "Fall 2025, Spring 2026"
+
+Courses whose term cannot be recognised are always kept.
+
+Logging in and the session check both download /account already, and the
+course list is read from that page. For runs that do not get it that way,
+the full course list is cached per account for GRADESCOPE_COURSE_CACHE_TTL
+seconds (default 12 hours, `0` disables the cache; GRADESCOPE_FULL_REFRESH=1
+ignores it for one run).
+"""
+import json
+import os
+import re
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+
+from . import duedates
+from . import session_store
+from .records import Course
+
+DEFAULT_TTL = 12 * 3600.0
+
+_SEASONS = {"winter": 0, "wi": 0, "spring": 1, "sp": 1, "summer": 2, "su": 2,
+            "fall": 3, "fa": 3, "autumn": 3, "au": 3}
+# 各学期大致的起止日期（月, 日），有意放宽，使相邻学期在交界处重叠而不是留下空档
+_WINDOWS = {0: ((1, 1), (3, 31)), 1: ((1, 1), (6, 15)), 2: ((5, 1), (8, 31)), 3: ((8, 1), (12, 31))}
+_TERM_RE = re.compile(r"\b(winter|spring|summer|fall|autumn|wi|sp|su|fa|au)\s*'?(\d{4}|\d{2})\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True, order=True, slots=True)
+class Term:
+    year: int
+    # 学期在一年中的顺序：Winter < Spring < Summer < Fall
+    season: int
+
+    @classmethod
+    def parse(cls, text: str) -> "Term | None":
+        """
+        Recognises a term name, long or short; None if there is none.
+
+        >>> Term.parse("Fall 2025"), Term.parse("SP26")
+        (Term(year=2025, season=3), Term(year=2026, season=1))
+        >>> Term.parse("Autumn 2025") == Term.parse("fa 25"), Term.parse("Summer Session") is None
+        (True, True)
+        """
+        match = _TERM_RE.search(text or "")
+        if match is None:
+            return None
+        year = int(match[2])
+        return cls(year + 2000 if year < 100 else year, _SEASONS[match[1].lower()])
+
+    def window(self) -> tuple[date, date]:
+        """
+        The rough first and last day of the term, generous enough to cover
+        both quarter and semester calendars.
+
+        >>> Term(2026, 1).window()
+        (datetime.date(2026, 1, 1), datetime.date(2026, 6, 15))
+        """
+        (start_month, start_day), (end_month, end_day) = _WINDOWS[self.season]
+        return date(self.year, start_month, start_day), date(self.year, end_month, end_day)
+
+
+def current_terms(terms: Iterable[Term], today: date) -> set[Term]:
+    """
+    The terms in session on `today` (see the module docstring): those whose
+    window contains it, else the latest one that has started, else (only
+    upcoming terms listed) the earliest one.
+    """
+    terms = set(terms)
+    in_session = {term for term in terms if term.window()[0] <= today <= term.window()[1]}
+    if in_session:
+        return in_session
+    started = [term for term in terms if term.window()[0] <= today]
+    if started:
+        return {max(started)}
+    return {min(terms)} if terms else set()
+
+
+def selected_terms() -> str:
+    return os.getenv("GRADESCOPE_TERMS", "current").strip() or "current"
+
+
+def select_courses(courses: Iterable[Course], terms: str | None = None, today: date | None = None) -> list[Course]:
+    """
+    Keeps the courses of the selected terms (default: GRADESCOPE_TERMS).
+    "current" is judged on `today` (default: the date of
+    duedates.current_time(), which a cassette replay pins).
+
+    >>> listed = [Course("A - Fall 2025", "/a", "Fall 2025"), Course("B - Spring 2026", "/b", "Spring 2026"),
+    ...           Course("C", "/c")]
+    >>> [c.url for c in select_courses(listed, "current", today=date(2026, 3, 2))]
+    ['/b', '/c']
+    >>> [c.url for c in select_courses(listed, "fa25")]
+    ['/a', '/c']
+
+    The next term is listed before it starts; the term in progress is kept:
+
+    >>> [c.url for c in select_courses(listed, "current", today=date(2025, 11, 20))]
+    ['/a', '/c']
+    >>> [c.url for c in select_courses(listed, "current", today=date(2026, 7, 10))]
+    ['/b', '/c']
+    """
+    courses = list(courses)
+    terms = (terms or selected_terms()).lower()
+    if terms == "all":
+        return courses
+    parsed = {course.url: Term.parse(course.term) for course in courses}
+    if terms == "current":
+        known = [term for term in parsed.values() if term is not None]
+        if not known:
+            return courses
+        wanted_terms = current_terms(known, today or duedates.current_time().date())
+        wanted_names: set[str] = set()
+    else:
+        names = [name.strip() for name in terms.split(",") if name.strip()]
+        wanted_terms = {term for term in map(Term.parse, names) if term is not None}
+        wanted_names = set(names)
+    return [
+        course for course in courses
+        if parsed[course.url] is None or parsed[course.url] in wanted_terms or course.term.lower() in wanted_names
+    ]
+
+
+def cache_ttl() -> float:
+    """The course list cache lifetime from GRADESCOPE_COURSE_CACHE_TTL (seconds)."""
+    value = os.getenv("GRADESCOPE_COURSE_CACHE_TTL")
+    if not value:
+        return DEFAULT_TTL
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        print(f"Warning: GRADESCOPE_COURSE_CACHE_TTL must be a number, got {value!r}; using {DEFAULT_TTL:g}.")
+        return DEFAULT_TTL
+
+
+def _cache_path(email: str) -> str:
+    return os.path.join(session_store.cache_dir(), f"courses-{session_store.account_key(email)}.json")
+
+
+def load_cached(email: str, source: str, max_age: float | None = None) -> list[Course] | None:
+    """
+    Returns the account's cached course list, or None if there is none, it
+    is older than `max_age` seconds (default: cache_ttl()), was read from
+    another page than `source` (the /account URL) or is unreadable.
+    """
+    max_age = cache_ttl() if max_age is None else max_age
+    if max_age <= 0 or os.getenv("GRADESCOPE_FULL_REFRESH") == "1":
+        return None
+    try:
+        with open(_cache_path(email), encoding="utf-8") as f:
+            data = json.load(f)
+        if data["source"] != source or time.time() - data["saved_at"] > max_age:
+            return None
+        return [Course.from_dict(course) for course in data["courses"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_cached(email: str, source: str, courses: list[Course]) -> None:
+    path = _cache_path(email)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"saved_at": time.time(), "source": source,
+                   "courses": [course.to_dict() for course in courses]}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
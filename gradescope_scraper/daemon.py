@@ -0,0 +1,254 @@
+"""
+Daemon mode: stays running and re-checks courses on a deadline-aware schedule.
+
+Instead of checking every course at fixed times, each course gets its own next
+check time, kept in a priority queue. After a course is checked, its next
+check is scheduled a fraction of the time left until its nearest open
+deadline away, bounded by --min-interval and --max-interval:
+
+    deadline in 3 days  -> checked again in 6 hours (the maximum)
+    deadline in 4 hours -> checked again in 1 hour
+    deadline in 30 min  -> checked again in 7.5 minutes
+
+Courses with nothing due are checked at the maximum interval. The session
+stays logged in between checks (it is re-validated before each round), the
+course list is refreshed every --course-refresh seconds, and email is sent
+only for new or changed assignments (see state.py). The timing summary is
+printed after every round and its spans are then discarded, so memory use
+stays flat however long the daemon runs.
+
+Usage:
+    gradescope-scraper daemon [--min-interval S] [--max-interval S] [--course-refresh S]
+
+Credentials and SMTP settings come from the same environment variables as
+main.py. Stop it with Ctrl-C or SIGTERM.
+"""
+import argparse
+import contextlib
+import heapq
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+
+from .main import (
+    collect_unsubmitted,
+    create_session,
+    discover_courses,
+    login_with_cache,
+    page_cache_enabled,
+    report_changes,
+    send_notification,
+    session_is_valid,
+)
+from .page_cache import PageCache
+from .records import Assignment, Course
+from . import instrument
+from . import mailer
+from . import notifiers
+from . import throttle
+
+DEFAULT_MIN_INTERVAL = 5 * 60
+DEFAULT_MAX_INTERVAL = 6 * 60 * 60
+DEFAULT_COURSE_REFRESH = 12 * 60 * 60
+# 下次检查时间 = 距最近截止时间的 1/4
+DEADLINE_FRACTION = 0.25
+
+
+def next_interval(
+    due_ats: list[datetime],
+    now: datetime,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+) -> float:
+    """
+    Seconds until a course should be checked again, given the deadlines of
+    its open assignments.
+
+    >>> now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    >>> next_interval([datetime(2025, 1, 1, 4, tzinfo=timezone.utc)], now)
+    3600.0
+    >>> next_interval([], now)
+    21600
+    """
+    upcoming = [due for due in due_ats if due > now]
+    if not upcoming:
+        return max_interval
+    remaining = (min(upcoming) - now).total_seconds()
+    return min(max_interval, max(min_interval, remaining * DEADLINE_FRACTION))
+
+
+class CourseScheduler:
+    """
+    A priority queue of course URLs ordered by their next check time.
+
+    Rescheduling a course replaces its previous entry; stale heap entries are
+    skipped when popped.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, str]] = []
+        self._next: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._next)
+
+    def schedule(self, url: str, at: float) -> None:
+        self._next[url] = at
+        heapq.heappush(self._heap, (at, url))
+
+    def remove(self, url: str) -> None:
+        self._next.pop(url, None)
+
+    def next_at(self) -> float | None:
+        """Time of the earliest scheduled check, or None if nothing is scheduled."""
+        while self._heap and self._next.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[str]:
+        """Removes and returns every course whose check time has come."""
+        due = []
+        while (at := self.next_at()) is not None and at <= now:
+            _, url = heapq.heappop(self._heap)
+            del self._next[url]
+            due.append(url)
+        return due
+
+
+def _due_ats(assignments: list[Assignment]) -> dict[str, list[datetime]]:
+    """Groups the deadlines of open assignments by course URL."""
+    by_course: dict[str, list[datetime]] = {}
+    for assignment in assignments:
+        if assignment.due_at is not None:
+            by_course.setdefault(assignment.course_url, []).append(assignment.due_at)
+    return by_course
+
+
+def run_daemon(
+    email: str,
+    password: str,
+    min_interval: float = DEFAULT_MIN_INTERVAL,
+    max_interval: float = DEFAULT_MAX_INTERVAL,
+    course_refresh: float = DEFAULT_COURSE_REFRESH,
+    stop: threading.Event | None = None,
+) -> None:
+    """Runs the check loop until `stop` is set."""
+    stop = stop or threading.Event()
+    session = create_session()
+    cache = PageCache.for_account(email) if page_cache_enabled() else None
+    scheduler = CourseScheduler()
+    courses: dict[str, Course] = {}
+    refresh_at = 0.0
+    logged_in = False
+
+    while not stop.is_set():
+        # 每轮开始前确认登录状态仍然有效，失效则重新登录
+        if not logged_in or not session_is_valid(session):
+            session.cookies.clear()
+            logged_in = login_with_cache(session, email, password) is not None
+            if not logged_in:
+                print(f"Login failed; retrying in {min_interval:.0f}s.")
+                stop.wait(min_interval)
+                continue
+
+        now = time.time()
+        if now >= refresh_at:
+            # 常驻模式按 course_refresh 自行刷新课程列表，不使用缓存
+            listed = discover_courses(session, email, max_age=0)
+            if listed:
+                listed_urls = {course.url for course in listed}
+                for url in set(courses) - listed_urls:
+                    scheduler.remove(url)
+                for course in listed:
+                    if course.url not in courses:
+                        scheduler.schedule(course.url, now)
+                courses = {course.url: course for course in listed}
+                if cache is not None:
+                    cache.prune(listed_urls)
+                print(f"Tracking {len(courses)} courses.")
+                refresh_at = now + course_refresh
+            else:
+                print("No courses found; retrying the course list later.")
+                refresh_at = now + min_interval
+
+        due_courses = [courses[url] for url in scheduler.pop_due(now) if url in courses]
+        if due_courses:
+            with instrument.span("round", courses=len(due_courses)):
+                check_courses(session, email, due_courses, list(courses.values()), scheduler, cache,
+                              min_interval, max_interval)
+            # 每轮结束后输出本轮耗时并清空记录，否则常驻进程的内存会持续增长
+            print(instrument.summary())
+            instrument.reset()
+
+        next_at = scheduler.next_at()
+        wake_at = refresh_at if next_at is None else min(next_at, refresh_at)
+        stop.wait(max(0.0, wake_at - time.time()))
+
+
+def check_courses(
+    session,
+    email: str,
+    due_courses: list[Course],
+    all_courses: list[Course],
+    scheduler: CourseScheduler,
+    cache: PageCache | None,
+    min_interval: float,
+    max_interval: float,
+) -> None:
+    """Checks `due_courses` once, notifies about changes and reschedules them."""
+    print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Checking {len(due_courses)} course(s)...")
+    assignments, failed_courses = collect_unsubmitted(session, due_courses, cache=cache, prune=False)
+    if failed_courses:
+        print(f"Warning: failed to check {len(failed_courses)} course(s): {', '.join(failed_courses)}")
+
+    diff = report_changes(email, due_courses, assignments, failed_courses, all_courses)
+    if diff is None and assignments:
+        send_notification(assignments, account=email)
+
+    now = datetime.now(timezone.utc)
+    due_ats = _due_ats(assignments)
+    for course in due_courses:
+        if course.name in failed_courses:
+            interval = min_interval
+        else:
+            interval = next_interval(due_ats.get(course.url, []), now, min_interval, max_interval)
+        scheduler.schedule(course.url, now.timestamp() + interval)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="gradescope-scraper daemon",
+                                     description="Keep checking Gradescope, more often as deadlines approach.")
+    parser.add_argument("--min-interval", type=float,
+                        default=float(os.getenv("GRADESCOPE_DAEMON_MIN_INTERVAL", DEFAULT_MIN_INTERVAL)),
+                        help=f"shortest time between checks of a course, in seconds (default {DEFAULT_MIN_INTERVAL})")
+    parser.add_argument("--max-interval", type=float,
+                        default=float(os.getenv("GRADESCOPE_DAEMON_MAX_INTERVAL", DEFAULT_MAX_INTERVAL)),
+                        help=f"longest time between checks of a course, in seconds (default {DEFAULT_MAX_INTERVAL})")
+    parser.add_argument("--course-refresh", type=float, default=DEFAULT_COURSE_REFRESH,
+                        help=f"how often the course list is reloaded, in seconds (default {DEFAULT_COURSE_REFRESH})")
+    args = parser.parse_args(argv)
+
+    email = os.getenv("GRADESCOPE_EMAIL")
+    password = os.getenv("GRADESCOPE_PASSWORD")
+    if not email or not password:
+        print("Error: GRADESCOPE_EMAIL and GRADESCOPE_PASSWORD environment variables must be set.")
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        # 只有启用邮件通知时才需要后台投递发件箱
+        with mailer.Deliverer() if notifiers.email_enabled() else contextlib.nullcontext():
+            run_daemon(email, password, args.min_interval, max(args.min_interval, args.max_interval),
+                       args.course_refresh, stop)
+    except KeyboardInterrupt:
+        pass
+    print("\n--- Timing Summary ---")
+    print(instrument.summary())
+    print(f"Request stats: {throttle.stats()}")
+
+
+if __name__ == "__main__":
+    main()
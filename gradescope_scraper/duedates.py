@@ -0,0 +1,162 @@
+"""
+Due-date parsing and the deadline filter.
+
+Gradescope writes deadlines as `datetime` attributes like
+"2025-10-20 23:59:00 -0700". parse() turns that exact layout into one
+datetime.fromisoformat() call, handles every other offset format with one
+precompiled pattern, and memoizes the result. parse_many() resolves all the
+timestamps of a page in one call; it converts the standard layout inline,
+without the memo, because most timestamps on a page are distinct and a cache
+lookup would cost more than it saves (see bench/micro.py).
+
+open_assignments() applies the expiry rules to a whole list at once: an
+unsubmitted assignment stays open until its latest deadline (the late
+deadline, if any) is more than the grace window in the past. The window is
+GRADESCOPE_GRACE_HOURS (default 24). Deadlines are compared with
+current_time(), which a cassette replay (cassette.py) pins to the time of the
+recording so that the same assignments are filtered out every time.
+
+    python -m bench.micro    # microbenchmarks for this module
+"""
+import os
+import re
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from .records import Assignment, Status
+
+DEFAULT_GRACE_HOURS = 24.0
+# 非 None 时 current_time() 返回此时刻（回放录制的请求时使用）
+_pinned_time: datetime | None = None
+
+_TIMESTAMP_RE = re.compile(
+    r"\s*(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?)"
+    r"\s*(?:(Z)|([+-]\d{2}):?(\d{2}))?\s*",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=4096)
+def parse(value: str) -> datetime:
+    """
+    Parses a Gradescope timestamp into an aware datetime.
+
+    Accepts a space or "T" between date and time, optional seconds and
+    fractions, and an offset written as "-0700", "+05:30" or "Z". A timestamp
+    without an offset is taken to be UTC. Raises ValueError otherwise.
+
+    >>> parse("2025-10-20 23:59:00 -0700")
+    datetime.datetime(2025, 10, 20, 23, 59, tzinfo=datetime.timezone(datetime.timedelta(days=-1, seconds=61200)))
+    >>> parse("2025-10-20 23:59:00 +0800").isoformat()
+    '2025-10-20T23:59:00+08:00'
+    >>> parse("2025-10-20T23:59+05:30").isoformat()
+    '2025-10-20T23:59:00+05:30'
+    >>> parse("2025-10-20T23:59:00.123Z").isoformat()
+    '2025-10-20T23:59:00.123000+00:00'
+    >>> parse("2025-10-20 23:59:00").isoformat()
+    '2025-10-20T23:59:00+00:00'
+    >>> parse("2025-10-20 23:59:00 -0000") == parse("2025-10-20 23:59:00 Z")
+    True
+    >>> parse("2025-10-20 23:59:00 +1345").utcoffset()
+    datetime.timedelta(seconds=49500)
+    >>> parse("2025-10-20 23:59:00.1234567 -0700")
+    Traceback (most recent call last):
+    ...
+    ValueError: unrecognised timestamp '2025-10-20 23:59:00.1234567 -0700'
+    >>> parse("Oct 20 at 11:59PM")
+    Traceback (most recent call last):
+    ...
+    ValueError: unrecognised timestamp 'Oct 20 at 11:59PM'
+    """
+    # 快速路径：Gradescope 的标准格式 "YYYY-MM-DD HH:MM:SS ±HHMM"
+    if len(value) == 25 and value[10] == " " and value[19] == " " and value[20] in "+-":
+        try:
+            return datetime.fromisoformat(value[:19] + value[20:23] + ":" + value[23:])
+        except ValueError:
+            pass
+    match = _TIMESTAMP_RE.fullmatch(value)
+    if match is None:
+        raise ValueError(f"unrecognised timestamp {value!r}")
+    date, time, _, offset_hours, offset_minutes = match.groups()
+    offset = f"{offset_hours}:{offset_minutes}" if offset_hours else "+00:00"
+    try:
+        return datetime.fromisoformat(f"{date}T{time}{offset}")
+    except ValueError:
+        raise ValueError(f"unrecognised timestamp {value!r}") from None
+
+
+def parse_many(values: Iterable[str | None]) -> dict[str, datetime | None]:
+    """
+    Parses a batch of timestamps (e.g. every deadline on a page).
+
+    Returns a mapping from each distinct string to its datetime, or None if
+    it could not be parsed (reported once per string).
+    """
+    parsed: dict[str, datetime | None] = {}
+    fromisoformat = datetime.fromisoformat
+    for value in dict.fromkeys(values):
+        if not isinstance(value, str):
+            continue
+        # 与 parse() 相同的快速路径，内联以省去函数调用和缓存查找（一页中的时间戳大多互不相同）
+        if len(value) == 25 and value[10] == " " and value[19] == " " and value[20] in "+-":
+            try:
+                parsed[value] = fromisoformat(value[:19] + value[20:23] + ":" + value[23:])
+                continue
+            except ValueError:
+                pass
+        try:
+            parsed[value] = parse(value)
+        except ValueError as e:
+            print(f"  [错误] 解析日期失败 '{value}': {e}")
+            parsed[value] = None
+    return parsed
+
+
+def pin_time(at: datetime | None) -> None:
+    """Makes current_time() return `at` from now on; None restores the real clock."""
+    global _pinned_time
+    _pinned_time = at
+
+
+def current_time() -> datetime:
+    """The time deadlines are compared with: the real UTC time unless pinned."""
+    return _pinned_time or datetime.now(timezone.utc)
+
+
+def grace_period() -> timedelta:
+    """The grace window after the last deadline, from GRADESCOPE_GRACE_HOURS."""
+    value = os.getenv("GRADESCOPE_GRACE_HOURS")
+    if not value:
+        return timedelta(hours=DEFAULT_GRACE_HOURS)
+    try:
+        return timedelta(hours=float(value))
+    except ValueError:
+        print(f"Warning: GRADESCOPE_GRACE_HOURS must be a number, got {value!r}; using {DEFAULT_GRACE_HOURS:g}.")
+        return timedelta(hours=DEFAULT_GRACE_HOURS)
+
+
+def open_assignments(
+    rows: Iterable[Assignment],
+    now: datetime | None = None,
+    grace: timedelta | None = None,
+) -> tuple[list[Assignment], list[Assignment]]:
+    """
+    Splits the "No Submission" rows into (open, expired).
+
+    A row is expired once its latest deadline, late deadlines included, lies
+    more than `grace` (default: grace_period()) before `now`. Rows without any
+    deadline stay open. The cut-off is computed once for the whole batch.
+    """
+    cutoff = (now or current_time()) - (grace if grace is not None else grace_period())
+    still_open = []
+    expired = []
+    for row in rows:
+        if row.status is not Status.NO_SUBMISSION:
+            continue
+        due_at = row.due_at
+        if due_at is not None and due_at < cutoff:
+            expired.append(row)
+        else:
+            still_open.append(row)
+    return still_open, expired
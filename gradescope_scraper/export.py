@@ -0,0 +1,296 @@
+"""
+Export mode: every assignment of every course, whatever its status.
+
+Unlike main.py, which only reports open "No Submission" rows, this writes one
+line per row of every course's assignments table (graded, submitted and
+unsubmitted), with the score, the late flag and the release, due and late due
+dates, for analysing a whole semester or several terms at once:
+
+    gradescope-scraper export assignments.csv [--format csv|parquet] [--terms all] [--chunk-size 500]
+
+The format follows the file extension (.parquet) unless --format is given;
+Parquet needs the optional `pyarrow` package. Course pages are fetched
+concurrently (GRADESCOPE_CONCURRENCY) and rows are written as the pages
+arrive, in chunks of --chunk-size rows (one Parquet row group each), so memory
+use does not grow with the number of courses. Rows appear in the order the
+courses finish. The output is written to a temporary file and moved into
+place when complete. The page cache is not used: it would keep every row in
+memory and evict the entries of regular runs.
+
+Every term is exported unless --terms selects some ("current" or a
+comma-separated list, see course_list.py). Credentials and all other settings
+come from the same environment variables as main.py.
+"""
+import argparse
+import csv
+import os
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import requests
+
+from .main import (
+    create_session,
+    discover_courses,
+    get_assignment_rows,
+    get_concurrency,
+    login_with_cache,
+)
+from .records import Assignment, Course
+from . import instrument
+from . import throttle
+
+DEFAULT_CHUNK_SIZE = 500
+
+# (列名, 类型)；类型用于 Parquet schema
+COLUMNS = [
+    ("course", "string"),
+    ("course_url", "string"),
+    ("assignment", "string"),
+    ("link", "string"),
+    ("status", "string"),
+    ("status_text", "string"),
+    ("score", "float"),
+    ("max_score", "float"),
+    ("submitted_late", "bool"),
+    ("released_at", "timestamp"),
+    ("due_at", "timestamp"),
+    ("late_due_at", "timestamp"),
+    ("has_late_deadline", "bool"),
+]
+
+
+def export_row(assignment: Assignment) -> dict:
+    """Flattens an assignment into one export line (see COLUMNS)."""
+    score = assignment.score
+    regular = [d.at for d in assignment.due_dates if not d.late]
+    late = [d.at for d in assignment.due_dates if d.late]
+    return {
+        "course": assignment.course_name,
+        "course_url": assignment.course_url,
+        "assignment": assignment.name,
+        "link": assignment.link,
+        "status": assignment.status.value,
+        "status_text": assignment.status_text,
+        "score": score[0] if score else None,
+        "max_score": score[1] if score else None,
+        "submitted_late": assignment.submitted_late,
+        "released_at": assignment.released_at,
+        "due_at": max(regular) if regular else None,
+        "late_due_at": max(late) if late else None,
+        "has_late_deadline": assignment.has_late_deadline,
+    }
+
+
+class Exporter(ABC):
+    """
+    Buffers export lines and writes them out `chunk_size` at a time.
+
+    Subclasses implement _open(), _write_chunk() and _close(). Data goes to
+    `path + ".tmp"`, which close() moves to `path`; abort() discards it.
+    """
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = max(1, chunk_size)
+        self.rows_written = 0
+        self._tmp_path = path + ".tmp"
+        self._buffer: list[dict] = []
+        self._open(self._tmp_path)
+
+    def add(self, assignments: list[Assignment]) -> None:
+        self._buffer.extend(export_row(a) for a in assignments)
+        while len(self._buffer) >= self.chunk_size:
+            self._flush(self.chunk_size)
+
+    def _flush(self, count: int) -> None:
+        chunk, self._buffer = self._buffer[:count], self._buffer[count:]
+        with instrument.span("export", rows=len(chunk)):
+            self._write_chunk(chunk)
+        self.rows_written += len(chunk)
+
+    def close(self) -> None:
+        if self._buffer:
+            self._flush(len(self._buffer))
+        self._close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        self._close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "Exporter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @abstractmethod
+    def _open(self, path: str) -> None:
+        """Creates the output file at `path`."""
+
+    @abstractmethod
+    def _write_chunk(self, rows: list[dict]) -> None:
+        """Appends export lines to the output file."""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Finishes the output file; may be called more than once."""
+
+
+class CsvExporter(Exporter):
+    """UTF-8 CSV with a header line; timestamps in ISO 8601, empty when unknown."""
+
+    def _open(self, path: str) -> None:
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=[name for name, _ in COLUMNS])
+        self._writer.writeheader()
+
+    def _write_chunk(self, rows: list[dict]) -> None:
+        self._writer.writerows(
+            {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()} for row in rows
+        )
+        self._file.flush()
+
+    def _close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+class ParquetExporter(Exporter):
+    """Parquet with one row group per chunk; timestamps are stored in UTC."""
+
+    def _open(self, path: str) -> None:
+        # pyarrow 很大，只在导出 Parquet 时才导入
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is not installed: pip install pyarrow") from None
+        self._pa = pa
+        types = {"string": pa.string(), "float": pa.float64(), "bool": pa.bool_(),
+                 "timestamp": pa.timestamp("us", tz="UTC")}
+        self._schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def _write_chunk(self, rows: list[dict]) -> None:
+        columns = {}
+        for name, kind in COLUMNS:
+            values = [row[name] for row in rows]
+            if kind == "timestamp":
+                values = [v.astimezone(timezone.utc) if v is not None else None for v in values]
+            columns[name] = values
+        self._writer.write_table(self._pa.table(columns, schema=self._schema))
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+EXPORTERS = {"csv": CsvExporter, "parquet": ParquetExporter}
+
+
+def export_assignments(
+    session: requests.Session,
+    courses: list[Course],
+    exporter: Exporter,
+    max_workers: int | None = None,
+) -> list[str]:
+    """
+    Fetches every course and hands all of its rows to `exporter` as soon as
+    the page has been parsed.
+
+    Returns the names of the courses whose page could not be fetched. Rows
+    are not kept after they have been handed over.
+    """
+    if max_workers is None:
+        max_workers = get_concurrency()
+
+    def fetch_one(course: Course) -> list[Assignment] | None:
+        with instrument.span("course", url=course.url) as s:
+            try:
+                return get_assignment_rows(session, course.url)
+            except Exception as e:
+                print(f"Error while checking course {course.name!r}: {e!r}")
+                s.set(error=repr(e))
+                return None
+
+    failed_courses = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(courses)))) as pool:
+        futures = {pool.submit(fetch_one, course): course for course in courses}
+        for future in as_completed(futures):
+            course, rows = futures[future], future.result()
+            if rows is None:
+                failed_courses.append(course.name)
+                continue
+            for row in rows:
+                row.course_name = course.name
+                row.course_url = course.url
+            exporter.add(rows)
+    return failed_courses
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="gradescope-scraper export",
+                                     description="Export every Gradescope assignment to CSV or Parquet.")
+    parser.add_argument("output", help="output file (.csv or .parquet)")
+    parser.add_argument("--format", choices=sorted(EXPORTERS),
+                        help="output format (default: from the file extension, else csv)")
+    parser.add_argument("--terms", default="all",
+                        help='terms to export: "all" (default), "current" or a comma-separated list')
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"rows written at a time / per Parquet row group (default {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+    fmt = args.format or ("parquet" if args.output.lower().endswith(".parquet") else "csv")
+
+    email = os.getenv("GRADESCOPE_EMAIL")
+    password = os.getenv("GRADESCOPE_PASSWORD")
+    if not email or not password:
+        print("Error: GRADESCOPE_EMAIL and GRADESCOPE_PASSWORD environment variables must be set.")
+        return 2
+
+    session = create_session()
+    if login_with_cache(session, email, password) is None:
+        print("Login failed.")
+        return 1
+    courses = discover_courses(session, email, terms=args.terms)
+    if not courses:
+        print("No courses found.")
+        return 1
+    print(f"Found {len(courses)} courses.")
+
+    try:
+        with EXPORTERS[fmt](args.output, args.chunk_size) as exporter:
+            failed_courses = export_assignments(session, courses, exporter)
+    except (OSError, RuntimeError) as e:
+        print(f"Error: export failed: {e}")
+        return 1
+
+    print(f"\nExported {exporter.rows_written} assignment(s) from {len(courses) - len(failed_courses)} "
+          f"course(s) to {args.output} ({fmt}).")
+    if failed_courses:
+        print(f"Warning: failed to check {len(failed_courses)} course(s): {', '.join(failed_courses)}")
+    return 1 if failed_courses else 0
+
+
+def run(argv: list[str] | None = None) -> int:
+    """Runs main() with profiling and prints the timing summary; returns the exit status."""
+    with instrument.profiling(), instrument.span("run"):
+        status = main(argv)
+    print("\n--- Timing Summary ---")
+    print(instrument.summary())
+    print(f"Request stats: {throttle.stats()}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,164 @@
+"""
+Lightweight timing instrumentation for the scraper's hot paths.
+
+Code under measurement is wrapped in span():
+
+    with span("parse", url=course_url) as s:
+        rows = parse(...)
+        s.set(rows=len(rows))
+
+Every finished span is kept in memory for summary() and, when GRADESCOPE_TRACE
+names a file, appended to it as one JSON object per line. Spans are safe to
+record from worker threads.
+
+GRADESCOPE_PROFILE=cprofile or GRADESCOPE_PROFILE=tracemalloc additionally
+profiles the whole run (see profiling()).
+"""
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_spans: list[dict] = []
+_trace_file = None
+_trace_path: str | None = None
+
+
+class Span:
+    """A timed stage; extra attributes can be attached while it runs."""
+
+    __slots__ = ("stage", "attrs", "start", "duration")
+
+    def __init__(self, stage: str, attrs: dict):
+        self.stage = stage
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration = 0.0
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+def _write_trace(record: dict) -> None:
+    global _trace_file, _trace_path
+    path = os.getenv("GRADESCOPE_TRACE")
+    if not path:
+        return
+    if _trace_file is None or _trace_path != path:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(path, "a", encoding="utf-8")
+        _trace_path = path
+    _trace_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    _trace_file.flush()
+
+
+@contextmanager
+def span(stage: str, **attrs) -> Iterator[Span]:
+    """
+    Times the enclosed block as one `stage` span.
+
+    If the block raises, the span is still recorded with an 'error' attribute.
+    """
+    s = Span(stage, attrs)
+    started = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.attrs.setdefault("error", repr(e))
+        raise
+    finally:
+        s.duration = time.perf_counter() - started
+        record(s.stage, s.start, s.duration, **s.attrs)
+
+
+def record(stage: str, start: float, duration: float, **attrs) -> None:
+    """Records a span timed elsewhere (e.g. in a worker process)."""
+    entry = {"stage": stage, "start": start, "duration": duration,
+             "thread": threading.current_thread().name, **attrs}
+    with _lock:
+        _spans.append(entry)
+        _write_trace(entry)
+
+
+def spans() -> list[dict]:
+    """Returns a copy of every span recorded so far."""
+    with _lock:
+        return list(_spans)
+
+
+def reset() -> None:
+    """Forgets all recorded spans (the trace file is left untouched)."""
+    with _lock:
+        _spans.clear()
+
+
+def summary() -> str:
+    """
+    Formats a per-stage table: span count, total and mean/max time, retries
+    and bytes downloaded.
+    """
+    stages: dict[str, dict] = {}
+    for record in spans():
+        stats = stages.setdefault(record["stage"], {"count": 0, "total": 0.0, "max": 0.0, "retries": 0, "bytes": 0})
+        stats["count"] += 1
+        stats["total"] += record["duration"]
+        stats["max"] = max(stats["max"], record["duration"])
+        stats["retries"] += record.get("retries") or 0
+        stats["bytes"] += record.get("bytes") or 0
+
+    header = f"{'stage':<14} {'count':>6} {'total s':>9} {'mean ms':>9} {'max ms':>9} {'retries':>8} {'KiB':>9}"
+    lines = [header, "-" * len(header)]
+    for stage, stats in stages.items():
+        lines.append(
+            f"{stage:<14} {stats['count']:>6} {stats['total']:>9.3f} "
+            f"{stats['total'] / stats['count'] * 1000:>9.1f} {stats['max'] * 1000:>9.1f} "
+            f"{stats['retries']:>8} {stats['bytes'] / 1024:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+@contextmanager
+def profiling() -> Iterator[None]:
+    """
+    Profiles the enclosed block according to GRADESCOPE_PROFILE.
+
+    - "cprofile": writes pstats data to GRADESCOPE_PROFILE_OUT (default
+      gradescope.prof) and prints the 20 most expensive functions.
+    - "tracemalloc": prints the peak traced memory and the top allocation sites.
+
+    Any other value (or unset) does nothing.
+    """
+    mode = (os.getenv("GRADESCOPE_PROFILE") or "").lower()
+    if mode == "cprofile":
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = os.getenv("GRADESCOPE_PROFILE_OUT", "gradescope.prof")
+            profiler.dump_stats(out)
+            print(f"\n--- cProfile (saved to {out}) ---")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+    elif mode == "tracemalloc":
+        import tracemalloc
+
+        tracemalloc.start(25)
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\n--- tracemalloc: peak {peak / 1024:.1f} KiB ---")
+            for stat in snapshot.statistics("lineno")[:10]:
+                print(f"  {stat}")
+    else:
+        yield
@@ -0,0 +1,323 @@
+"""
+Email delivery through a persistent outbox.
+
+The email notifier (notifiers.EmailNotifier) does not talk to the SMTP server
+itself: it puts the message into an outbox directory (`outbox/` under the
+cache directory) and asks for delivery. deliver_pending() then sends every
+due message over one SMTP connection (one TLS handshake and one login per
+batch). A message is removed from the outbox only after the server accepted
+it; a failed send is retried later with exponential backoff and is moved to
+`outbox/failed/` after MAX_ATTEMPTS.
+
+Delivery is synchronous by default: submit() sends right away and, if the
+server did not accept the message, takes it back out of the outbox and raises
+DeliveryError, so the caller keeps its state and reports the same changes
+next run (the scheduled workflow does not keep the outbox between runs).
+Long-running modes (batch.py, daemon.py) start a Deliverer, a background
+thread that sends while scraping continues and retries from the outbox in
+the local cache directory:
+
+    with mailer.Deliverer():
+        ...  # email notifications only enqueue and wake the thread
+
+SMTP settings come from SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD,
+SMTP_FROM, SMTP_DEBUG and SMTP_SECURITY (ssl, starttls or none; by default ssl
+for port 465 and starttls otherwise). Without SMTP_USER no login is attempted.
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from . import session_store
+from .instrument import span
+
+if TYPE_CHECKING:
+    # smtplib（连同 ssl、email）只在真正发信时才导入；读取 SMTP 配置不需要它们
+    import smtplib
+    from email.message import EmailMessage
+
+MAX_ATTEMPTS = 8
+RETRY_BASE = 30.0
+RETRY_CAP = 3600.0
+SMTP_TIMEOUT = 15
+
+
+class DeliveryError(Exception):
+    """The SMTP server did not accept a message that submit() had to deliver right away."""
+
+
+@dataclass
+class SmtpConfig:
+    host: str
+    port: int
+    security: str
+    user: str | None = None
+    password: str | None = None
+    from_addr: str | None = None
+    debug: bool = False
+
+    @classmethod
+    def from_env(cls) -> "SmtpConfig | None":
+        """Reads the SMTP_* variables; prints the problem and returns None if unusable."""
+        host = os.getenv("SMTP_HOST")
+        port_str = os.getenv("SMTP_PORT", "465")
+        user = os.getenv("SMTP_USER") or None
+        password = os.getenv("SMTP_PASSWORD") or None
+        try:
+            port = int(port_str)
+        except ValueError:
+            print(f"Error: SMTP_PORT must be an integer, got {port_str!r}")
+            return None
+        security = (os.getenv("SMTP_SECURITY") or ("ssl" if port == 465 else "starttls")).lower()
+        if security not in ("ssl", "starttls", "none"):
+            print(f"Error: SMTP_SECURITY must be ssl, starttls or none, got {security!r}")
+            return None
+        if not host or (user and not password):
+            print("Error: Missing SMTP environment variables (SMTP_HOST/PORT/USER/PASSWORD/TO).")
+            return None
+        return cls(host, port, security, user, password, os.getenv("SMTP_FROM") or user,
+                   os.getenv("SMTP_DEBUG") == "1")
+
+    def connect(self) -> "smtplib.SMTP":
+        """Opens an SMTP connection, secured and logged in as configured."""
+        import smtplib
+
+        if self.security == "ssl":
+            server: smtplib.SMTP = smtplib.SMTP_SSL(self.host, self.port, timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            if self.debug:
+                server.set_debuglevel(1)
+                print(f"SMTP DEBUG: using {self.security} connect to {self.host}:{self.port}")
+            server.ehlo()
+            if self.security == "starttls":
+                server.starttls()
+                server.ehlo()
+            if self.user:
+                server.login(self.user, self.password or "")
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+
+class Outbox:
+    """
+    A directory of queued messages, one JSON file each.
+
+    Every entry holds the raw message plus its delivery state (attempts,
+    next_attempt, last_error). Writes are atomic, so a crash never leaves a
+    half-written message behind.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(session_store.cache_dir(), "outbox")
+        self._lock = threading.Lock()
+
+    def _write(self, name: str, entry: dict) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, name)
+        tmp_path = path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    def enqueue(self, msg: "EmailMessage") -> str:
+        """Adds a message to the outbox and returns its id."""
+        name = f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.json"
+        entry = {"message": msg.as_string(), "attempts": 0, "next_attempt": 0.0, "last_error": None}
+        with self._lock:
+            self._write(name, entry)
+        return name
+
+    def due(self, now: float | None = None) -> list[tuple[str, dict]]:
+        """Returns the (id, entry) pairs ready to be sent, oldest first."""
+        now = time.time() if now is None else now
+        entries = []
+        with self._lock:
+            try:
+                names = sorted(n for n in os.listdir(self.path) if n.endswith(".json"))
+            except FileNotFoundError:
+                return []
+            for name in names:
+                try:
+                    with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if entry.get("next_attempt", 0) <= now:
+                    entries.append((name, entry))
+        return entries
+
+    def next_attempt(self) -> float | None:
+        """When the earliest queued message may be sent, or None if empty."""
+        times = [entry.get("next_attempt", 0.0) for _, entry in self.due(float("inf"))]
+        return min(times) if times else None
+
+    def withdraw(self, name: str) -> dict | None:
+        """Takes a message out of the outbox; returns its entry, or None if it is no longer queued."""
+        path = os.path.join(self.path, name)
+        with self._lock:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.remove(path)
+            except FileNotFoundError:
+                return None
+        return entry
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+
+    def defer(self, name: str, entry: dict, error: BaseException) -> None:
+        """Records a failed attempt; gives up after MAX_ATTEMPTS."""
+        entry["attempts"] = entry.get("attempts", 0) + 1
+        entry["last_error"] = repr(error)
+        entry["next_attempt"] = time.time() + random.uniform(0.5, 1) * min(RETRY_CAP, RETRY_BASE * 2 ** (entry["attempts"] - 1))
+        with self._lock:
+            if entry["attempts"] >= MAX_ATTEMPTS:
+                failed_dir = os.path.join(self.path, "failed")
+                os.makedirs(failed_dir, exist_ok=True)
+                self._write(os.path.join("failed", name), entry)
+                os.remove(os.path.join(self.path, name))
+                print(f"Giving up on email {name} after {entry['attempts']} attempts: {error!r}")
+            else:
+                self._write(name, entry)
+
+
+def deliver_pending(outbox: Outbox, config: SmtpConfig) -> tuple[int, int]:
+    """
+    Sends every due message in `outbox` over a single connection.
+
+    Returns (sent, failed). Messages that could not be sent stay queued.
+    """
+    pending = outbox.due()
+    if not pending:
+        return 0, 0
+    import smtplib
+    from email import policy
+    from email.parser import BytesParser
+
+    sent = failed = 0
+    parser = BytesParser(policy=policy.default)
+    with span("smtp", host=config.host, port=config.port, messages=len(pending)) as s:
+        server = None
+        try:
+            server = config.connect()
+            for name, entry in pending:
+                try:
+                    server.send_message(parser.parsebytes(entry["message"].encode("utf-8")))
+                except smtplib.SMTPServerDisconnected:
+                    raise
+                except (smtplib.SMTPException, OSError) as e:
+                    print(f"Error sending email {name}: {e!r}")
+                    outbox.defer(name, entry, e)
+                    failed += 1
+                else:
+                    outbox.remove(name)
+                    sent += 1
+        except (smtplib.SMTPException, OSError) as e:
+            # 连接级别的错误：本批剩余邮件全部稍后重试
+            print(f"Error during SMTP {config.security} send: {e!r}")
+            remaining = pending[sent + failed:]
+            for name, entry in remaining:
+                outbox.defer(name, entry, e)
+            failed += len(remaining)
+        finally:
+            if server is not None:
+                try:
+                    server.quit()
+                except (smtplib.SMTPException, OSError):
+                    server.close()
+        s.set(sent=sent, failed=failed)
+    if sent:
+        print(f"Notification email sent ({sent} message(s)).")
+    return sent, failed
+
+
+class Deliverer:
+    """
+    Background thread that delivers the outbox while the caller keeps working.
+
+    wake() asks for an immediate delivery pass; otherwise the thread sleeps
+    until the next deferred message is due. stop() (or leaving the `with`
+    block) makes one final pass and waits up to `flush_timeout` seconds.
+    """
+
+    def __init__(self, outbox: Outbox | None = None, config: SmtpConfig | None = None, flush_timeout: float = 60.0):
+        self.outbox = outbox or Outbox()
+        self.config = config
+        self.flush_timeout = flush_timeout
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="mailer", daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            config = self.config or SmtpConfig.from_env()
+            if config is not None:
+                deliver_pending(self.outbox, config)
+            if self._stopping:
+                return
+            # 未配置 SMTP 时不轮询，等待下一次 wake()
+            next_attempt = self.outbox.next_attempt() if config is not None else None
+            self._wake.wait(None if next_attempt is None else max(0.0, next_attempt - time.time()))
+
+    def start(self) -> "Deliverer":
+        global _deliverer
+        _deliverer = self
+        self._thread.start()
+        return self
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self) -> None:
+        global _deliverer
+        if _deliverer is self:
+            _deliverer = None
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(self.flush_timeout)
+
+    def __enter__(self) -> "Deliverer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+_deliverer: Deliverer | None = None
+
+
+def submit(msg: "EmailMessage", config: SmtpConfig) -> None:
+    """
+    Queues `msg` and gets it delivered: by the running Deliverer if there is
+    one, otherwise right away (together with any earlier undelivered mail).
+
+    Without a Deliverer, raises DeliveryError if the server did not accept
+    `msg`; the message is then no longer queued, so it is sent only once the
+    caller notifies again.
+    """
+    outbox = _deliverer.outbox if _deliverer is not None else Outbox()
+    name = outbox.enqueue(msg)
+    if _deliverer is not None:
+        _deliverer.wake()
+        return
+    deliver_pending(outbox, config)
+    # 未送达：从发件箱撤回并报告失败，由调用方保留状态下次重新通知，不依赖发件箱在运行之间保留
+    entry = outbox.withdraw(name)
+    if entry is not None:
+        raise DeliveryError(f"email not delivered: {entry.get('last_error')}")
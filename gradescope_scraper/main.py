@@ -0,0 +1,739 @@
+import requests
+import contextlib
+import os
+import sqlite3
+import time
+import weakref
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from . import course_list
+from . import parsers
+from . import session_store
+from . import state
+from .page_cache import PageCache, table_fingerprint
+from .pipeline import ParsePipeline, parse_processes
+from .records import Assignment, Course
+from . import duedates
+from . import instrument
+from .instrument import profiling, span
+from . import throttle
+from . import settings
+from . import transport
+# 地址、请求头和并发数与 client.py 共用（settings.py）
+from .settings import BASE_URL, DEFAULT_CONCURRENCY, DEFAULT_HEADERS, LOGIN_URL
+
+# --- 常量定义 ---
+# 页面中没有作业表格（登录跳转、错误页面或页面结构变化）时的提示，该课程按抓取失败处理
+NO_TABLE_WARNING = "  [警告] 未找到作业表格主体，按抓取失败处理"
+
+# 登录或登录状态检查时顺带取得的 /account 页面（课程列表），供 discover_courses() 直接使用
+_account_pages: "weakref.WeakKeyDictionary[requests.Session, str]" = weakref.WeakKeyDictionary()
+
+# --- 核心功能 ---
+
+
+def create_session() -> requests.Session:
+    """
+    Creates a fresh session with its own cookie jar and the browser-like headers.
+
+    The transport (connection pool sized for the course fetch concurrency,
+    compression, optional HTTP/2) is configured by transport.create_session().
+    """
+    return transport.create_session(DEFAULT_HEADERS, pool_size=max(get_concurrency(), settings.DEFAULT_POOL_SIZE))
+
+
+def safe_request(session: requests.Session, method: str, url: str, retries: int = 2,
+                 timeout: float | tuple[float, float] | None = None, backoff: float = 1, **kwargs):
+    """
+    A small wrapper around session.get/post that adds timeout, rate limiting
+    and retries.
+
+    Each attempt first waits for the rate limits in throttle.py. Failures are
+    retried according to their class (throttle.RetryPolicy): connection errors,
+    timeouts, 429 and 502/503/504-style errors are retried with jittered
+    exponential backoff starting at `backoff` seconds, or after the server's
+    Retry-After; other 4xx responses are not retried. Requests to a host whose
+    circuit breaker is open are not sent at all.
+
+    `timeout` defaults to the separate (connect, read) timeouts of
+    settings.timeouts().
+
+    Returns the Response on success, or None on persistent failure.
+    """
+    if timeout is None:
+        timeout = settings.timeouts()
+    host = urlsplit(url).netloc
+    last_error = None
+    with span("request", method=method.upper(), url=url) as s:
+        permit = throttle.breaker.allow(host)
+        if not permit:
+            print(f"Skipping {url!r}: circuit breaker for {host} is open.")
+            s.set(error="circuit open")
+            return None
+
+        try:
+            waited = 0.0
+            for attempt in range(1, retries + 1):
+                throttle.throttle(host)
+                throttle.record("requests")
+                resp = None
+                try:
+                    if method.lower() == "get":
+                        resp = session.get(url, timeout=timeout, **kwargs)
+                    else:
+                        resp = session.post(url, timeout=timeout, **kwargs)
+                except requests.exceptions.RequestException as e:
+                    last_error = repr(e)
+                    reason, retryable, host_failure = throttle.policy.classify(error=e)
+                else:
+                    if resp.status_code < 400:
+                        throttle.breaker.record_success(host)
+                        s.set(status=resp.status_code, retries=attempt - 1, backoff_s=waited,
+                              bytes=_response_size(resp, kwargs.get("stream", False)))
+                        return resp
+                    last_error = f"HTTP {resp.status_code} {resp.reason}"
+                    reason, retryable, host_failure = throttle.policy.classify(status=resp.status_code)
+
+                if host_failure:
+                    throttle.breaker.record_failure(host, trial=permit is throttle.Permit.TRIAL)
+                elif resp is not None:
+                    # 服务器有应答（404、429 等）说明主机可用，关闭熔断
+                    throttle.breaker.record_success(host)
+                print(f"Request error ({method.upper()}) {url!r} attempt {attempt}/{retries}: {last_error}")
+                if not retryable or attempt >= retries or throttle.breaker.is_open(host):
+                    break
+
+                delay = throttle.policy.delay(attempt, resp, base=backoff)
+                if resp is not None:
+                    resp.close()
+                throttle.record("retries")
+                throttle.record(f"retry_{reason}")
+                throttle.record("backoff_s", delay)
+                bucket = throttle.host_bucket(host) if reason == "429" else None
+                if bucket is not None:
+                    # 服务器要求限速：暂停该主机的令牌桶，下一次 throttle() 时所有线程一起等待
+                    bucket.pause(delay)
+                else:
+                    time.sleep(delay)
+                waited += delay
+
+            throttle.record("gave_up")
+            s.set(status=resp.status_code if resp is not None else None,
+                  retries=attempt - 1, backoff_s=waited, error=last_error)
+            if resp is not None:
+                resp.close()
+            print(f"Failed to fetch {url!r} after {attempt} attempt(s). Last error: {last_error}")
+            return None
+        finally:
+            # 持有半开试探名额时无论结果如何都要释放，否则该主机会被永久拒绝
+            if permit is throttle.Permit.TRIAL:
+                throttle.breaker.release(host)
+
+
+def _response_size(resp: requests.Response, stream: bool) -> int | None:
+    """Body size for instrumentation, without consuming a streamed body."""
+    if stream:
+        length = resp.headers.get("Content-Length")
+        return int(length) if length and length.isdigit() else None
+    return len(resp.content)
+
+
+def login_to_gradescope(session, email, password):
+    """
+    处理登录逻辑，返回一个保持登录状态的 session 对象。
+    """
+    # 1. GET 请求：访问登录页面
+    print("正在访问登录页面...")
+    get_response = safe_request(session, "get", LOGIN_URL)
+    if get_response is None:
+        print("访问登录页面失败: 多次尝试均未成功。")
+        return None
+
+    # 2. 解析 HTML，找到 authenticity_token（使用与课程页面相同的解析后端）
+    authenticity_token = parsers.extract_csrf_token(get_response.text)
+    if not authenticity_token:
+        print("无法在页面上找到 'csrf-token' meta 标签或其 'content' 属性，登录失败。")
+        return None
+    
+    print("成功获取 authenticity_token。")
+
+    # 3. 构造 POST 请求的 payload
+    payload = {
+        "session[email]": email,
+        "session[password]": password,
+        "authenticity_token": authenticity_token,
+        "commit": "Log In"
+    }
+
+    # 4. 发送 POST 请求，完成登录
+    print("正在提交登录信息...")
+    post_response = safe_request(session, "post", LOGIN_URL, data=payload)
+    if post_response is None:
+        print("提交登录信息失败: 多次尝试均未成功。")
+        return None
+
+    # 5. 验证登录是否成功
+    # 根据我们的实验，登录成功后可能跳转到 /courses 或 /account
+    successful_urls = [f"{BASE_URL}/courses", f"{BASE_URL}/account"]
+    if post_response.url in successful_urls:
+        print("登录成功！")
+        if post_response.url == f"{BASE_URL}/account":
+            # 登录后停留在仪表盘：记下页面，discover_courses() 无需再次请求
+            _account_pages[session] = post_response.text
+        return session
+    else:
+        print("登录失败，请检查账号或密码。")
+        print(f"提示：登录后页面停留在 {post_response.url} (预期为 {successful_urls[0]} 或 {successful_urls[1]})")
+        return None
+
+
+def session_is_valid(session: requests.Session) -> bool:
+    """
+    Cheaply checks whether the session is still logged in.
+
+    Requests /account without following redirects: a logged-in session gets
+    the page itself, an expired one is redirected to the login page. The
+    page is kept for the next discover_courses() call on this session.
+    """
+    response = safe_request(session, "get", f"{BASE_URL}/account", retries=1, allow_redirects=False)
+    if response is None or response.status_code != 200:
+        return False
+    _account_pages[session] = response.text
+    return True
+
+
+def login_with_cache(session: requests.Session, email: str, password: str) -> requests.Session | None:
+    """
+    Logs in, reusing the cached cookies from a previous run when they still work.
+
+    Falls back to login_to_gradescope() only when there is no usable cache
+    entry or the probe shows the cached session has expired. Set
+    GRADESCOPE_SESSION_CACHE=0 to always perform a full login.
+    """
+    with span("login") as s:
+        if not session_store.session_cache_enabled():
+            return login_to_gradescope(session, email, password)
+
+        if session_store.load_session(session, email):
+            if session_is_valid(session):
+                print("复用已缓存的登录状态。")
+                s.set(cached=True)
+                return session
+            print("缓存的登录状态已失效，重新登录...")
+            session.cookies.clear()
+            session_store.clear_session(email)
+
+        logged_in_session = login_to_gradescope(session, email, password)
+        if logged_in_session is not None:
+            try:
+                session_store.save_session(logged_in_session, email)
+            except OSError as e:
+                print(f"Warning: could not save session cache: {e!r}")
+        return logged_in_session
+
+
+def get_courses(session: requests.Session) -> list[Course]:
+    """
+    Fetches all courses from the Gradescope dashboard.
+
+    Args:
+        session: The logged-in requests session.
+
+    Returns:
+        A list of records.Course, each with a 'name' and an absolute 'url'.
+    """
+    courses_url = f"{BASE_URL}/account"
+    response = safe_request(session, "get", courses_url)
+    if response is None:
+        print("Error fetching courses page: 多次尝试均未成功。")
+        return []
+    return _parse_courses(response.text)
+
+
+def _parse_courses(html: str) -> list[Course]:
+    courses_url = f"{BASE_URL}/account"
+    with span("parse", url=courses_url) as s:
+        courses = parsers.extract_courses(html, courses_url)
+        s.set(courses=len(courses))
+    return courses
+
+
+def discover_courses(
+    session: requests.Session,
+    email: str,
+    terms: str | None = None,
+    max_age: float | None = None,
+) -> list[Course]:
+    """
+    Returns the courses to check.
+
+    The account's course list is read from the /account page that logging in
+    or session_is_valid() already downloaded on this session, if any. Without
+    that page it comes from the course list cache while the cache is younger
+    than `max_age` seconds (default GRADESCOPE_COURSE_CACHE_TTL), otherwise
+    from get_courses(). The list is then narrowed to the selected terms
+    (default GRADESCOPE_TERMS). See course_list.py.
+    """
+    page = _account_pages.pop(session, None)
+    cached = None
+    if page is not None:
+        listed = _parse_courses(page)
+    else:
+        cached = course_list.load_cached(email, f"{BASE_URL}/account", max_age)
+        if cached is not None:
+            print(f"复用已缓存的课程列表（{len(cached)} 门课程）。")
+        listed = cached if cached is not None else get_courses(session)
+    if cached is None and listed:
+        try:
+            course_list.save_cached(email, f"{BASE_URL}/account", listed)
+        except OSError as e:
+            print(f"Warning: could not save course list cache: {e!r}")
+    selected = course_list.select_courses(listed, terms)
+    if len(selected) < len(listed):
+        print(f"Checking {len(selected)} of {len(listed)} courses (terms: {terms or course_list.selected_terms()}).")
+    return selected
+
+
+def parse_assignment_rows(html: str, course_url: str) -> list[Assignment] | None:
+    """
+    Extracts every row of a course's assignments table, whatever its status.
+
+    Each row is a records.Assignment holding the parsed date of every
+    `submissionTimeChart--dueDate` tag in the row. The HTML parser backend
+    is selected by GRADESCOPE_PARSER (see parsers.py).
+
+    Returns None if the page has no assignments table: a login redirect, an
+    error page or a changed layout must not look like a course without
+    assignments.
+    """
+    with span("parse", url=course_url, backend=parsers.get_backend()) as s:
+        rows = parsers.extract_assignment_rows(html, course_url)
+        s.set(rows=len(rows) if rows is not None else 0)
+    if rows is None:
+        print(NO_TABLE_WARNING)
+    return rows
+
+
+def filter_unsubmitted(
+    rows: Iterable[Assignment],
+    now: datetime | None = None,
+    grace: timedelta | None = None,
+) -> list[Assignment]:
+    """
+    Keeps the "No Submission" rows whose latest deadline (including late
+    deadlines) has not been over for longer than the grace window
+    (GRADESCOPE_GRACE_HOURS, default 24 hours).
+
+    `rows` may be any iterable of records.
+    """
+    if grace is None:
+        grace = duedates.grace_period()
+    unsubmitted_assignments, expired = duedates.open_assignments(rows, now, grace)
+    for row in expired:
+        print(f"  [过滤] 作业 '{row.name}' 所有提交机会（含迟交）均已过期超过 {grace.total_seconds() / 3600:g}h")
+    for row in unsubmitted_assignments:
+        if not row.due_dates:
+            print(f"  [警告] 作业 '{row.name}' 未找到任何时间标签")
+    return unsubmitted_assignments
+
+
+def streaming_enabled() -> bool:
+    """Course pages are parsed while downloading when GRADESCOPE_STREAMING=1."""
+    return os.getenv("GRADESCOPE_STREAMING") == "1"
+
+
+def get_assignment_rows(
+    session: requests.Session,
+    course_url: str,
+    cache: PageCache | None = None,
+) -> list[Assignment] | None:
+    """
+    获取课程作业表格中的全部行（不论提交状态）。
+
+    课程页面请求失败或页面中没有作业表格时返回 None，以便调用方区分“没有作业”和“抓取失败”。
+    传入 cache 时使用条件请求（ETag/Last-Modified）和作业表格哈希，页面未变化则复用上次解析的结果。
+    GRADESCOPE_STREAMING=1 时边下载边解析，作业表格结束后立即关闭连接，不再下载页面剩余部分；
+    这只节省内存和下载量，作业行仍在整个表格读完后一起返回。
+    """
+    print(f"Fetching assignments from {course_url}...")
+    streaming = streaming_enabled()
+    headers = cache.conditional_headers(course_url) if cache is not None else {}
+    response = safe_request(session, "get", course_url, headers=headers, stream=streaming)
+    if response is None:
+        return None
+
+    if response.status_code == 304:
+        # 以 stream=True 打开的响应必须显式关闭，连接才会回到连接池
+        response.close()
+        rows = cache.rows(course_url) if cache is not None else None
+        if rows is not None:
+            print("  [缓存] 页面未变化，复用上次解析结果")
+            return rows
+        # 缓存条目已被清除但服务器仍返回 304：不带条件头重新请求
+        response = safe_request(session, "get", course_url, stream=streaming)
+        if response is None:
+            return None
+
+    with response:
+        return _read_assignment_rows(response, course_url, cache, streaming)
+
+
+def _read_assignment_rows(
+    response: requests.Response,
+    course_url: str,
+    cache: PageCache | None,
+    streaming: bool,
+) -> list[Assignment] | None:
+    """Parses (or takes from the cache) the rows of a fetched course page; the caller closes the response."""
+    validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    if streaming:
+        # 流式模式下没有完整页面可供计算表格哈希，只依赖条件请求
+        # 该 span 同时包含下载和解析时间，二者在流式模式下无法分开
+        with span("parse", url=course_url, backend="streaming") as s:
+            rows = parsers.read_response_rows(response, course_url)
+            s.set(rows=len(rows) if rows is not None else 0)
+        if rows is None:
+            print(NO_TABLE_WARNING)
+            return None
+        if cache is not None:
+            cache.store(course_url, rows, None, **validators)
+        return rows
+
+    fingerprint = None
+    if cache is not None:
+        fingerprint = table_fingerprint(response.text)
+        rows = cache.rows(course_url, fingerprint) if fingerprint is not None else None
+        if rows is not None:
+            print("  [缓存] 页面未变化，复用上次解析结果")
+            cache.store(course_url, rows, fingerprint, **validators)
+            return rows
+
+    rows = parse_assignment_rows(response.text, course_url)
+    if rows is None:
+        return None
+    if cache is not None:
+        cache.store(course_url, rows, fingerprint, **validators)
+    return rows
+
+
+def get_assignments(
+    session: requests.Session,
+    course_url: str,
+    cache: PageCache | None = None,
+) -> list[Assignment] | None:
+    """
+    获取课程作业，并过滤掉已过期超过 24 小时的未提交作业。
+
+    课程页面请求失败时返回 None。页面抓取与缓存见 get_assignment_rows()。
+    """
+    rows = get_assignment_rows(session, course_url, cache)
+    return filter_unsubmitted(rows) if rows is not None else None
+
+
+def get_concurrency() -> int:
+    """Reads the course fetch concurrency from GRADESCOPE_CONCURRENCY."""
+    value = os.getenv("GRADESCOPE_CONCURRENCY", str(DEFAULT_CONCURRENCY))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        print(f"Warning: GRADESCOPE_CONCURRENCY must be an integer, got {value!r}; using {DEFAULT_CONCURRENCY}.")
+        return DEFAULT_CONCURRENCY
+
+
+def page_cache_enabled() -> bool:
+    """The page cache is on unless GRADESCOPE_PAGE_CACHE=0."""
+    return os.getenv("GRADESCOPE_PAGE_CACHE", "1") != "0"
+
+
+def fetch_all_assignments(
+    session: requests.Session,
+    courses: list[Course],
+    max_workers: int | None = None,
+    cache: PageCache | None = None,
+    pipeline: ParsePipeline | None = None,
+) -> list[list[Assignment] | None]:
+    """
+    Fetches the assignments of every course, several courses at a time.
+
+    Args:
+        session: The logged-in requests session, shared by all workers.
+        courses: Courses as returned by get_courses().
+        max_workers: Upper bound on concurrent course requests. Defaults to
+            get_concurrency(); 1 fetches the courses one after another.
+        cache: Optional page cache passed on to get_assignments().
+        pipeline: Optional ParsePipeline; the threads then only download the
+            pages and the pipeline's worker processes parse them.
+
+    Returns:
+        One entry per course, in the same order as `courses`. An entry is the
+        list returned by get_assignments(), or None if that course failed
+        (request error or unexpected exception), so one broken course never
+        hides the results of the others.
+    """
+    if max_workers is None:
+        max_workers = get_concurrency()
+
+    if pipeline is not None:
+        def get(url: str, headers: dict[str, str]) -> requests.Response | None:
+            return safe_request(session, "get", url, headers=headers)
+
+        return [filter_unsubmitted(rows) if rows is not None else None
+                for rows in pipeline.fetch_rows(courses, get, max_workers, cache)]
+
+    def fetch_one(course: Course) -> list[Assignment] | None:
+        with span("course", url=course.url) as s:
+            try:
+                return get_assignments(session, course.url, cache)
+            except Exception as e:
+                print(f"Error while checking course {course.name!r}: {e!r}")
+                s.set(error=repr(e))
+                return None
+
+    if max_workers <= 1 or len(courses) <= 1:
+        return [fetch_one(course) for course in courses]
+
+    results: list[list[Assignment] | None] = [None] * len(courses)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(courses))) as pool:
+        futures = {pool.submit(fetch_one, course): i for i, course in enumerate(courses)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
+
+
+def collect_unsubmitted(
+    session: requests.Session,
+    courses: list[Course],
+    max_workers: int | None = None,
+    cache: PageCache | None = None,
+    prune: bool = True,
+    pipeline: ParsePipeline | None = None,
+) -> tuple[list[Assignment], list[str]]:
+    """
+    Checks every course and gathers the unsubmitted assignments.
+
+    If a page cache is given, it is written back to disk afterwards; with
+    `prune` (the default) entries of courses not in `courses` are evicted
+    first. Pass prune=False when `courses` is only part of the course list.
+    `pipeline` is passed on to fetch_all_assignments().
+
+    Returns:
+        A tuple (assignments, failed_courses). Each assignment has its
+        course_name and course_url filled in; failed_courses lists the names
+        of courses whose page could not be fetched or had no assignments
+        table.
+    """
+    all_unsubmitted_assignments = []
+    failed_courses = []
+    results = fetch_all_assignments(session, courses, max_workers, cache, pipeline)
+    for course, unsubmitted_assignments in zip(courses, results):
+        if unsubmitted_assignments is None:
+            failed_courses.append(course.name)
+            continue
+        for assignment in unsubmitted_assignments:
+            assignment.course_name = course.name # Add course name to assignment info
+            assignment.course_url = course.url
+        all_unsubmitted_assignments.extend(unsubmitted_assignments)
+
+    if cache is not None:
+        if prune and courses:
+            cache.prune([course.url for course in courses])
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"Warning: could not save page cache: {e!r}")
+    return all_unsubmitted_assignments, failed_courses
+
+
+def sync_state(
+    email: str,
+    courses: list[Course],
+    assignments: list[Assignment],
+    failed_courses: list[str],
+    all_courses: list[Course] | None = None,
+    commit: bool = True,
+) -> state.StateDiff | None:
+    """
+    Records the run in the assignment state store and returns the changes
+    since the previous run, or None if the store is disabled or unusable.
+
+    `courses` are the courses checked in this run; `all_courses` is the full
+    course list when only some of them were checked (defaults to `courses`).
+    With `commit=False` the changes are only computed, see report_changes().
+    """
+    if not state.state_enabled():
+        return None
+    checked = {course.url for course in courses if course.name not in failed_courses}
+    listed = {course.url for course in (all_courses or courses)}
+    try:
+        return state.AssignmentStore().sync(email, assignments, checked, listed, commit=commit)
+    except sqlite3.Error as e:
+        print(f"Warning: could not update assignment state: {e!r}")
+        return None
+
+
+def report_changes(
+    email: str,
+    courses: list[Course],
+    assignments: list[Assignment],
+    failed_courses: list[str],
+    all_courses: list[Course] | None = None,
+    notify: bool = True,
+    to_addr: str | None = None,
+    verbose: bool = True,
+) -> state.StateDiff | None:
+    """
+    Compares the run with the state store, notifies about new or changed
+    assignments and then records the run (arguments as for sync_state()).
+
+    The run is only recorded once every notifier succeeded: if a webhook or
+    command fails or times out, the same changes are reported again by the
+    next run instead of being lost. Email counts as sent once the SMTP server
+    accepted it, or, while a mailer.Deliverer runs (batch and daemon mode),
+    once it is in the outbox that the Deliverer keeps retrying. With
+    `notify=False` the run is not recorded either, so the next run that
+    notifies still reports these changes. Returns the changes, or None if the
+    state store is disabled or unusable.
+    """
+    diff = sync_state(email, courses, assignments, failed_courses, all_courses, commit=False)
+    if diff is None:
+        return None
+    if verbose:
+        print_diff(diff)
+    if not notify:
+        return diff
+    outcomes = {}
+    # 只有出现新增或变动的作业时才发送通知
+    if diff.actionable:
+        outcomes = send_notification(diff.actionable, to_addr=to_addr, diff=diff, account=email)
+    failed = [name for name, outcome in outcomes.items() if outcome != "ok"]
+    if failed:
+        print(f"Warning: the {', '.join(failed)} notifier(s) failed; the state is left unchanged so these "
+              f"changes are reported again next run.")
+    else:
+        sync_state(email, courses, assignments, failed_courses, all_courses)
+    return diff
+
+
+def print_diff(diff: state.StateDiff) -> None:
+    if not diff:
+        print("\nNo changes since the last check.")
+        return
+    for title, items in (("New", diff.new), ("Changed", diff.changed),
+                         ("Submitted", diff.submitted), ("Expired", diff.expired)):
+        if not items:
+            continue
+        print(f"\n--- {title} ({len(items)}) ---")
+        for assignment in items:
+            print(f"  Course: {assignment.course_name}")
+            print(f"  Assignment: {assignment.name}")
+            print(f"  Due Date: {assignment.due_text}")
+            print("-" * 20)
+
+
+def send_notification(
+    assignments: list[Assignment],
+    to_addr: str | None = None,
+    diff: state.StateDiff | None = None,
+    account: str | None = None,
+) -> dict[str, str]:
+    """
+    Sends the unsubmitted assignments to every configured notifier.
+
+    The backends come from GRADESCOPE_NOTIFIERS (default: email only, see
+    notifiers.py) and run concurrently. `to_addr` overrides SMTP_TO for the
+    email backend (used by batch mode to notify each account separately).
+    When `diff` is given (see state.AssignmentStore.sync()), `assignments`
+    should be diff.actionable and the notification reports the changes only.
+
+    Returns each backend's outcome ("ok", "timeout" or an error).
+    """
+    if not assignments:
+        print("No assignments to notify; skipping notification.")
+        return {}
+    # 通知后端（smtplib、email 等）只在确实要发送时才导入
+    from . import notifiers
+
+    return notifiers.dispatch(notifiers.configured_notifiers(to_addr), assignments, diff, account)
+
+
+# --- 主程序入口 ---
+
+def main() -> None:
+    """Checks the account given by GRADESCOPE_EMAIL/GRADESCOPE_PASSWORD once."""
+    # Load email and password from environment variables
+    email = os.getenv("GRADESCOPE_EMAIL")
+    password = os.getenv("GRADESCOPE_PASSWORD")
+
+    if not email or not password:
+        print("Error: GRADESCOPE_EMAIL and GRADESCOPE_PASSWORD environment variables must be set.")
+    else:
+        session = create_session()
+        logged_in_session = login_with_cache(session, email, password)
+
+        if logged_in_session:
+            print("Login successful.")
+            courses = discover_courses(logged_in_session, email)
+            if not courses:
+                print("No courses found.")
+            else:
+                print(f"Found {len(courses)} courses.")
+                cache = PageCache.for_account(email) if page_cache_enabled() else None
+                processes = parse_processes()
+                with ParsePipeline(processes) if processes else contextlib.nullcontext() as pipeline:
+                    all_unsubmitted_assignments, failed_courses = collect_unsubmitted(
+                        logged_in_session, courses, cache=cache, pipeline=pipeline)
+
+                if failed_courses:
+                    print(f"\nWarning: failed to check {len(failed_courses)} course(s): {', '.join(failed_courses)}")
+
+                # 测试注入逻辑已注释（不再在生产环境自动注入假作业）。
+                # 如需再次启用，可临时取消下面的注释块。
+                # if not all_unsubmitted_assignments and os.getenv("SMTP_FORCE_TEST") == "1":
+                #     print("INFO: SMTP_FORCE_TEST=1 detected — injecting test assignment for email test.")
+                #     all_unsubmitted_assignments = [
+                #         {
+                #             "course_name": "测试课程",
+                #             "name": "测试作业",
+                #             "status": "No Submission",
+                #             "due_date": "N/A",
+                #             "link": "https://www.gradescope.com"
+                #         }
+                #     ]
+
+                if state.state_enabled():
+                    print(f"\n{len(all_unsubmitted_assignments)} unsubmitted assignment(s) open.")
+                diff = report_changes(email, courses, all_unsubmitted_assignments, failed_courses)
+                if diff is None and not all_unsubmitted_assignments:
+                    print("\nNo unsubmitted assignments found in any course. Great job!")
+                elif diff is None:
+                    print("\n--- Summary of Unsubmitted Assignments ---")
+                    for assignment in all_unsubmitted_assignments:
+                        print(f"  Course: {assignment.course_name}")
+                        print(f"  Assignment: {assignment.name}")
+                        print(f"  Status: {assignment.status_text}")
+                        print(f"  Due Date: {assignment.due_text}")
+                        print("-" * 20)
+
+                    # 打印全部条目后只发送一次邮件通知（避免重复发送）
+                    send_notification(all_unsubmitted_assignments, account=email)
+        else:
+            print("Login failed.")
+
+        print(f"\nConnection stats: {transport.connection_stats(session)}")
+
+
+def run() -> None:
+    """Runs main() with profiling and prints the timing summary (the CLI's default command)."""
+    with profiling(), span("run"):
+        main()
+    print("\n--- Timing Summary ---")
+    print(instrument.summary())
+    print(f"Request stats: {throttle.stats()}")
+
+
+if __name__ == "__main__":
+    run()
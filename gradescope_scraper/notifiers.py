@@ -0,0 +1,292 @@
+"""
+Notification backends.
+
+send_notification() hands the same records.Assignment objects returned by
+get_assignments() (with course_name and course_url filled in) to every backend
+listed in GRADESCOPE_NOTIFIERS (comma-separated, default "email"):
+
+- email:   the SMTP email, through the outbox in mailer.py
+- webhook: POSTs a JSON document to GRADESCOPE_WEBHOOK_URL
+- file:    appends one JSON line to GRADESCOPE_NOTIFY_FILE ("-" for stdout)
+- command: runs GRADESCOPE_NOTIFY_COMMAND with the JSON document on stdin
+
+The backends run at the same time, each on its own thread with its own
+timeout (GRADESCOPE_NOTIFY_TIMEOUT, default 30 s), so a slow or hanging
+channel neither delays the others nor keeps the process alive.
+"""
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+from . import mailer
+from . import state
+from .records import Assignment
+from .instrument import span
+
+DEFAULT_TIMEOUT = 30.0
+
+
+def _format_assignment(lines: list[str], index: int, a: Assignment) -> None:
+    course = a.course_name or "(未识别课程)"
+    name = a.name or "(未识别作业)"
+    status = a.status_text
+    due = a.due_text
+    link = a.link
+    lines.append(f"{index}. 课程: {course}")
+    lines.append(f"   作业: {name}")
+    if status:
+        lines.append(f"   状态: {status}")
+    if due:
+        lines.append(f"   截止: {due}")
+    if link:
+        lines.append(f"   链接: {link}")
+    lines.append("-" * 20)
+
+
+def format_notification(assignments: list[Assignment], diff: state.StateDiff | None = None) -> tuple[str, str]:
+    """
+    Builds the (subject, body) of a plain-text notification.
+
+    Without a diff the body lists every assignment; with one it has separate
+    sections for new, changed (deadline moved) and resolved assignments.
+    """
+    if diff is None:
+        lines = [f"共发现未提交作业 {len(assignments)} 项："]
+        for i, a in enumerate(assignments, start=1):
+            _format_assignment(lines, i, a)
+        return f"[Gradescope] 未提交作业 {len(assignments)} 项", "\n".join(lines)
+
+    lines = []
+    sections = [
+        ("新增未提交作业", diff.new),
+        ("截止时间有变动", diff.changed),
+        ("已提交", diff.submitted),
+        ("已过期", diff.expired),
+    ]
+    for title, items in sections:
+        if not items:
+            continue
+        if lines:
+            lines.append("")
+        lines.append(f"{title} {len(items)} 项：")
+        for i, a in enumerate(items, start=1):
+            _format_assignment(lines, i, a)
+
+    parts = []
+    if diff.new:
+        parts.append(f"新增 {len(diff.new)} 项")
+    if diff.changed:
+        parts.append(f"变动 {len(diff.changed)} 项")
+    return f"[Gradescope] 未提交作业{'，'.join(parts)}", "\n".join(lines)
+
+
+def notification_document(
+    assignments: list[Assignment],
+    diff: state.StateDiff | None = None,
+    account: str | None = None,
+) -> dict:
+    """The JSON document sent by the webhook, file and command backends."""
+    subject, _ = format_notification(assignments, diff)
+    document = {
+        "subject": subject,
+        "account": account,
+        "sent_at": datetime.now(timezone.utc).isoformat(),
+        "assignments": [a.to_dict() for a in assignments],
+    }
+    if diff is not None:
+        document["changes"] = {key: [a.to_dict() for a in getattr(diff, key)]
+                               for key in ("new", "changed", "submitted", "expired")}
+    return document
+
+
+class Notifier(ABC):
+    """
+    A notification channel.
+
+    Subclasses implement send(); it may block, since dispatch() runs every
+    backend on its own thread and stops waiting after `timeout` seconds.
+    """
+
+    name = "notifier"
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+
+    @abstractmethod
+    def send(self, assignments: list[Assignment], diff: state.StateDiff | None, account: str | None) -> None:
+        """Delivers the notification; raises on failure."""
+
+
+class EmailNotifier(Notifier):
+    name = "email"
+
+    def __init__(self, to_addr: str | None = None, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.to_addr = to_addr
+
+    def send(self, assignments, diff, account):
+        config = mailer.SmtpConfig.from_env()
+        to_addr = self.to_addr or os.getenv("SMTP_TO")
+
+        # 基础校验：配置不完整时报告失败，调用方不会把这次变化记为已通知
+        if config is None:
+            raise RuntimeError("SMTP is not configured")
+        if not to_addr or not config.from_addr:
+            print("Error: Missing SMTP environment variables (SMTP_HOST/PORT/USER/PASSWORD/TO).")
+            raise RuntimeError("SMTP_TO or SMTP_FROM/SMTP_USER is not set")
+
+        from email.message import EmailMessage
+
+        subject, body = format_notification(assignments, diff)
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg["From"] = config.from_addr
+        msg["To"] = to_addr
+        msg.set_content(body)
+
+        # 先写入发件箱再投递；没有后台投递线程时未送达会抛出 mailer.DeliveryError
+        mailer.submit(msg, config)
+
+
+class WebhookNotifier(Notifier):
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.url = url
+
+    def send(self, assignments, diff, account):
+        # 只有 webhook 后端需要 requests；--check-config 读取后端配置时不加载它
+        import requests
+
+        response = requests.post(self.url, json=notification_document(assignments, diff, account), timeout=self.timeout)
+        response.raise_for_status()
+        print(f"Webhook notified ({response.status_code}).")
+
+
+class FileNotifier(Notifier):
+    name = "file"
+
+    _lock = threading.Lock()
+
+    def __init__(self, path: str, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.path = path
+
+    def send(self, assignments, diff, account):
+        line = json.dumps(notification_document(assignments, diff, account), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self.path == "-":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+
+class CommandNotifier(Notifier):
+    name = "command"
+
+    def __init__(self, command: str, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__(timeout)
+        self.command = command
+
+    def send(self, assignments, diff, account):
+        document = json.dumps(notification_document(assignments, diff, account), ensure_ascii=False)
+        result = subprocess.run(shlex.split(self.command), input=document, text=True, timeout=self.timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"notify command exited with status {result.returncode}")
+
+
+def notifier_names() -> list[str]:
+    """The backend names listed in GRADESCOPE_NOTIFIERS (default: email)."""
+    return [name.strip().lower() for name in (os.getenv("GRADESCOPE_NOTIFIERS") or "email").split(",") if name.strip()]
+
+
+def email_enabled() -> bool:
+    """Whether the email backend is listed, i.e. whether the outbox needs a mailer.Deliverer."""
+    return "email" in notifier_names()
+
+
+def configured_notifiers(to_addr: str | None = None) -> list[Notifier]:
+    """
+    Builds the backends named in GRADESCOPE_NOTIFIERS.
+
+    `to_addr` overrides SMTP_TO for the email backend. Backends whose
+    setting is missing are skipped with a warning.
+    """
+    try:
+        timeout = float(os.getenv("GRADESCOPE_NOTIFY_TIMEOUT") or DEFAULT_TIMEOUT)
+    except ValueError:
+        print(f"Warning: GRADESCOPE_NOTIFY_TIMEOUT must be a number; using {DEFAULT_TIMEOUT}.")
+        timeout = DEFAULT_TIMEOUT
+
+    notifiers: list[Notifier] = []
+    for name in notifier_names():
+        if name == "email":
+            notifiers.append(EmailNotifier(to_addr, timeout))
+        elif name == "webhook":
+            url = os.getenv("GRADESCOPE_WEBHOOK_URL")
+            if url:
+                notifiers.append(WebhookNotifier(url, timeout))
+            else:
+                print("Warning: the webhook notifier needs GRADESCOPE_WEBHOOK_URL; skipping it.")
+        elif name == "file":
+            notifiers.append(FileNotifier(os.getenv("GRADESCOPE_NOTIFY_FILE") or "-", timeout))
+        elif name == "command":
+            command = os.getenv("GRADESCOPE_NOTIFY_COMMAND")
+            if command:
+                notifiers.append(CommandNotifier(command, timeout))
+            else:
+                print("Warning: the command notifier needs GRADESCOPE_NOTIFY_COMMAND; skipping it.")
+        else:
+            print(f"Warning: unknown notifier {name!r} in GRADESCOPE_NOTIFIERS; skipping it.")
+    return notifiers
+
+
+def dispatch(
+    notifiers: list[Notifier],
+    assignments: list[Assignment],
+    diff: state.StateDiff | None = None,
+    account: str | None = None,
+) -> dict[str, str]:
+    """
+    Runs every notifier concurrently and waits for each up to its timeout.
+
+    Returns each backend's outcome: "ok", "timeout" or the error's repr. A
+    backend still running after its timeout is abandoned (its thread is a
+    daemon thread and does not keep the process alive).
+    """
+    outcomes: dict[str, str] = {}
+
+    def run(notifier: Notifier) -> None:
+        with span("notify", backend=notifier.name) as s:
+            try:
+                notifier.send(assignments, diff, account)
+                outcomes[notifier.name] = "ok"
+            except Exception as e:
+                print(f"Error in {notifier.name} notifier: {e!r}")
+                outcomes[notifier.name] = repr(e)
+                s.set(error=repr(e))
+
+    started = time.monotonic()
+    threads = []
+    for notifier in notifiers:
+        thread = threading.Thread(target=run, args=(notifier,), name=f"notify-{notifier.name}", daemon=True)
+        thread.start()
+        threads.append((notifier, thread))
+    results = {}
+    for notifier, thread in threads:
+        thread.join(max(0.0, started + notifier.timeout - time.monotonic()))
+        if thread.is_alive():
+            print(f"Warning: {notifier.name} notifier timed out after {notifier.timeout:.0f}s.")
+            results[notifier.name] = "timeout"
+        else:
+            results[notifier.name] = outcomes[notifier.name]
+    return results
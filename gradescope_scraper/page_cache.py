@@ -0,0 +1,142 @@
+"""
+Per-course page cache for incremental scraping.
+
+For every course URL the cache keeps the validators the server sent (ETag /
+Last-Modified), a hash of the `#assignments-student-table` section and the
+rows extracted from it. On the next run the validators are sent as a
+conditional request; if the server answers 304, or the table hash is
+unchanged, the stored rows are reused and the page is not parsed again.
+
+Rows are stored before the due-date filter is applied, so assignments still
+expire correctly while a page stays unchanged. They are kept as
+records.Assignment dicts (see Assignment.to_dict()); entries written in an
+older format are treated as misses.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from . import session_store
+from .records import Assignment
+
+# 超过该时长未被访问的课程条目会被清除
+ENTRY_MAX_AGE = 7 * 24 * 3600
+# 行记录格式变化时递增，旧格式条目视为未命中
+FORMAT = 3
+
+_TABLE_RE = re.compile(
+    r"<table\b[^>]*\bid=[\"']assignments-student-table[\"'].*?</table>",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def table_fingerprint(html: str) -> str | None:
+    """
+    Hashes the assignments table section of a course page without parsing it.
+
+    Returns None if the page has no assignments table.
+    """
+    match = _TABLE_RE.search(html)
+    if match is None:
+        return None
+    return hashlib.sha256(match.group(0).encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    A JSON-backed cache of extracted course rows, safe to share between the
+    threads of fetch_all_assignments().
+    """
+
+    def __init__(self, path: str, entries: dict | None = None):
+        self.path = path
+        self._entries: dict[str, dict] = entries or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_account(cls, email: str, full_refresh: bool | None = None) -> "PageCache":
+        """
+        Loads the cache file of one account.
+
+        With `full_refresh` (default: GRADESCOPE_FULL_REFRESH=1) the existing
+        entries are ignored, so every page is fetched and parsed again; the
+        fresh results still replace the old file on save().
+        """
+        path = os.path.join(session_store.cache_dir(), f"pages-{session_store.account_key(email)}.json")
+        if full_refresh is None:
+            full_refresh = os.getenv("GRADESCOPE_FULL_REFRESH") == "1"
+        if full_refresh:
+            return cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        return cls(path, entries if isinstance(entries, dict) else {})
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Returns If-None-Match / If-Modified-Since headers for `url`."""
+        with self._lock:
+            entry = self._entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def rows(self, url: str, fingerprint: str | None = None) -> list[Assignment] | None:
+        """
+        Returns the cached rows of `url`, or None on a miss.
+
+        If `fingerprint` is given the rows are only returned when the stored
+        table hash matches it.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or entry.get("format") != FORMAT:
+                return None
+            if fingerprint is not None and entry.get("fingerprint") != fingerprint:
+                return None
+            entry["used_at"] = time.time()
+            rows = entry["rows"]
+        return [Assignment.from_dict(row) for row in rows]
+
+    def store(self, url: str, rows: list[Assignment], fingerprint: str | None,
+              etag: str | None = None, last_modified: str | None = None) -> None:
+        rows = [row.to_dict() for row in rows]
+        with self._lock:
+            self._entries[url] = {
+                "format": FORMAT,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fingerprint": fingerprint,
+                "rows": rows,
+                "used_at": time.time(),
+            }
+
+    def prune(self, keep_urls: list[str] | None = None) -> None:
+        """
+        Evicts entries of courses that are no longer listed (when `keep_urls`
+        is given) and entries unused for ENTRY_MAX_AGE.
+        """
+        cutoff = time.time() - ENTRY_MAX_AGE
+        keep = set(keep_urls) if keep_urls is not None else None
+        with self._lock:
+            for url in list(self._entries):
+                entry = self._entries[url]
+                if (keep is not None and url not in keep) or entry.get("used_at", 0) < cutoff:
+                    del self._entries[url]
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
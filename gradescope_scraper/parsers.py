@@ -0,0 +1,640 @@
+"""
+HTML extraction for the Gradescope dashboard and course pages.
+
+Three interchangeable backends produce identical output:
+
+- "selectolax": the lexbor engine, by far the fastest (optional dependency)
+- "lxml": libxml2 via XPath (optional dependency)
+- "bs4": BeautifulSoup with the pure-Python html.parser, always available
+
+The backend is chosen by GRADESCOPE_PARSER (auto, selectolax, lxml or bs4);
+"auto" picks the fastest one installed. The fast paths only touch the
+`courseBox` anchors and the assignment table rows instead of walking the
+whole document.
+
+The assignment rows are read the way a browser builds the table: the rows
+of its first <tbody> (or of the implied one when the markup omits it), with
+unclosed <tr>/<td> tags ending at the next row or cell. lexbor follows these
+rules itself; lxml gets the implied <tbody> added, and bs4 and the streaming
+parser share _TableRows, because html.parser leaves unclosed tags nested.
+
+For very large course pages, iter_assignment_rows() parses the document
+incrementally from a stream of chunks and yields each row as soon as its
+`</tr>` arrives, stopping at the end of the assignments table;
+read_response_rows() applies it to a streamed `requests` response.
+
+To check that the backends agree on saved pages:
+
+    python -m gradescope_scraper.parsers page1.html page2.html ...
+"""
+import codecs
+import functools
+import importlib.util
+import os
+import sys
+from collections.abc import Iterable, Iterator
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from . import duedates
+from .records import Assignment, Course, DueDate, Status
+
+BACKENDS = ("selectolax", "lxml", "bs4")
+TABLE_ID = "assignments-student-table"
+# 各后端所需的模块；只在第一次解析时才导入，启动时只检查是否已安装
+_BACKEND_MODULES = {"selectolax": "selectolax.lexbor", "lxml": "lxml.html", "bs4": "bs4"}
+
+
+@functools.cache
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ImportError:  # pragma: no cover - parent package missing
+        return False
+
+
+def available_backends() -> list[str]:
+    """Returns the installed backends, fastest first (without importing them)."""
+    return [name for name in BACKENDS if _installed(_BACKEND_MODULES[name])]
+
+
+def get_backend(name: str | None = None) -> str:
+    """
+    Resolves a backend name (default: GRADESCOPE_PARSER, then "auto").
+
+    An unknown or uninstalled backend falls back to the fastest available one.
+    """
+    name = (name or os.getenv("GRADESCOPE_PARSER") or "auto").lower()
+    available = available_backends()
+    if name in available:
+        return name
+    if name != "auto":
+        print(f"Warning: parser backend {name!r} is not available; using {available[0]!r}.")
+    return available[0]
+
+
+def _course(name: str | None, term: str | None, href: str, page_url: str) -> Course:
+    full_name = f"{name} - {term}" if term else name
+    return Course(full_name or "", urljoin(page_url, href), term or "")
+
+
+def _rows(raw_rows: list[tuple], course_url: str) -> list[Assignment]:
+    """
+    Builds the records of (name, href, status, [(datetime attr, text), ...],
+    release datetime attr) tuples, parsing every timestamp of the batch in one
+    duedates.parse_many() call.
+    """
+    parsed = duedates.parse_many(
+        dt for _, _, _, pairs, released in raw_rows for dt in (released, *(dt for dt, _ in pairs))
+    )
+    rows = []
+    for name, href, status, pairs, released in raw_rows:
+        link = urljoin(course_url, href) if isinstance(href, str) else course_url
+        due_dates = []
+        for dt, text in pairs:
+            at = parsed.get(dt) if isinstance(dt, str) else None
+            if at is not None:
+                due_dates.append(DueDate.parse(at, text))
+        rows.append(Assignment(name, link, Status.from_text(status), status, tuple(due_dates),
+                               released_at=parsed.get(released) if isinstance(released, str) else None))
+    return rows
+
+
+# --- BeautifulSoup (html.parser) ---
+
+
+def _bs4_courses(html: str, page_url: str) -> list[Course]:
+    from bs4 import BeautifulSoup
+    from bs4.element import Tag
+
+    soup = BeautifulSoup(html, "html.parser")
+    courses = []
+    # Find all course links on the page. Try multiple selectors for robustness.
+    course_tags = soup.select(".courseList--coursesForTerm a.courseBox[href^='/courses/']")
+    if not course_tags:
+        course_tags = soup.select("a.courseBox")
+    for tag in course_tags:
+        if isinstance(tag, Tag):
+            course_name_tag = tag.find("div", class_="courseBox--name")
+            course_term_tag = tag.find("div", class_="courseBox--shortTerm")
+
+            name: str | None = None
+            term: str | None = None
+            if isinstance(course_name_tag, Tag):
+                name = course_name_tag.get_text(strip=True)
+            if isinstance(course_term_tag, Tag):
+                term = course_term_tag.get_text(strip=True)
+
+            if not name:
+                # Fallback to anchor text if structured name not found
+                name = tag.get_text(strip=True)
+
+            href = tag.get("href")
+            if href and isinstance(href, str):
+                # If term not found inside the anchor, try to lookup from the surrounding section
+                if not term:
+                    parent_section = tag.find_parent("div", class_="courseList")
+                    if isinstance(parent_section, Tag):
+                        term_tag = parent_section.find("div", class_="courseList--term")
+                        if isinstance(term_tag, Tag):
+                            term = term_tag.get_text(strip=True)
+
+                courses.append(_course(name, term, href, page_url))
+
+    return courses
+
+
+def _bs4_csrf_token(html: str) -> str | None:
+    from bs4 import BeautifulSoup
+    from bs4.element import Tag
+
+    tag = BeautifulSoup(html, "html.parser").find("meta", {"name": "csrf-token"})
+    content = tag.get("content") if isinstance(tag, Tag) else None
+    return content if isinstance(content, str) else None
+
+
+def _bs4_rows(html: str, course_url: str) -> list[Assignment] | None:
+    from bs4 import BeautifulSoup
+    from bs4.element import NavigableString, PreformattedString, Tag
+
+    table = BeautifulSoup(html, "html.parser").find("table", id=TABLE_ID)
+    if not isinstance(table, Tag):
+        return None
+    # html.parser 不补全省略的结束标签（未闭合的 <tr>/<td> 会嵌套在前一个里面），
+    # 因此不能直接用 find_all()：按文档顺序把树交给与流式解析相同的 _TableRows
+    reader = _TableRows(course_url)
+    stack: list[tuple[object, bool]] = [(table, False)]
+    while stack and not reader.done:
+        node, closing = stack.pop()
+        if closing:
+            reader.end(node.name)
+        elif isinstance(node, Tag):
+            reader.start(node.name, {key: " ".join(value) if isinstance(value, list) else value
+                                     for key, value in node.attrs.items()})
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.contents))
+        elif isinstance(node, PreformattedString):
+            reader.comment()
+        elif isinstance(node, NavigableString):
+            reader.text(str(node))
+    return reader.take() if reader.found else None
+
+
+# --- selectolax (lexbor) ---
+
+
+def _has_class(node, class_name: str) -> bool:
+    return class_name in (node.attributes.get("class") or "").split()
+
+
+def _selectolax_courses(html: str, page_url: str) -> list[Course]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    course_tags = tree.css(".courseList--coursesForTerm a.courseBox[href^='/courses/']")
+    if not course_tags:
+        course_tags = tree.css("a.courseBox")
+    courses = []
+    for tag in course_tags:
+        name_tag = tag.css_first("div.courseBox--name")
+        term_tag = tag.css_first("div.courseBox--shortTerm")
+        name = name_tag.text(strip=True) if name_tag is not None else None
+        term = term_tag.text(strip=True) if term_tag is not None else None
+        if not name:
+            name = tag.text(strip=True)
+
+        href = tag.attributes.get("href")
+        if href:
+            if not term:
+                parent = tag.parent
+                while parent is not None and not (parent.tag == "div" and _has_class(parent, "courseList")):
+                    parent = parent.parent
+                if parent is not None:
+                    section_term = parent.css_first("div.courseList--term")
+                    if section_term is not None:
+                        term = section_term.text(strip=True)
+            courses.append(_course(name, term, href, page_url))
+    return courses
+
+
+def _selectolax_csrf_token(html: str) -> str | None:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tag = LexborHTMLParser(html).css_first("meta[name='csrf-token']")
+    return tag.attributes.get("content") if tag is not None else None
+
+
+def _selectolax_rows(html: str, course_url: str) -> list[Assignment] | None:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    # lexbor 按 HTML 标准补出省略的 <tbody>
+    table_body = tree.css_first(f"table#{TABLE_ID} > tbody")
+    if table_body is None:
+        return None
+
+    rows = []
+    for row in table_body.iter():
+        if row.tag != "tr":
+            continue
+        name_th = row.css_first("th[scope='row']")
+        if name_th is None:
+            continue
+        status_td = row.css_first("td")
+        if status_td is None:
+            continue
+        link_a = name_th.css_first("a")
+        href = link_a.attributes.get("href") if link_a is not None else None
+
+        due_dates = [(t.attributes.get("datetime"), t.text(strip=True))
+                     for t in row.css("time.submissionTimeChart--dueDate")]
+        release_tag = row.css_first("time.submissionTimeChart--releaseDate")
+        released = release_tag.attributes.get("datetime") if release_tag is not None else None
+        rows.append((name_th.text(strip=True), href, status_td.text(strip=True), due_dates, released))
+    return _rows(rows, course_url)
+
+
+# --- lxml (XPath) ---
+
+
+def _xclass(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _lxml_text(element) -> str:
+    return "".join(s.strip() for s in element.itertext())
+
+
+def _lxml_courses(html: str, page_url: str) -> list[Course]:
+    import lxml.html as lxml_html
+
+    root = lxml_html.document_fromstring(html)
+    course_tags = root.xpath(
+        f"//*[{_xclass('courseList--coursesForTerm')}]//a[{_xclass('courseBox')} and starts-with(@href, '/courses/')]"
+    )
+    if not course_tags:
+        course_tags = root.xpath(f"//a[{_xclass('courseBox')}]")
+    courses = []
+    for tag in course_tags:
+        name_tags = tag.xpath(f".//div[{_xclass('courseBox--name')}]")
+        term_tags = tag.xpath(f".//div[{_xclass('courseBox--shortTerm')}]")
+        name = _lxml_text(name_tags[0]) if name_tags else None
+        term = _lxml_text(term_tags[0]) if term_tags else None
+        if not name:
+            name = _lxml_text(tag)
+
+        href = tag.get("href")
+        if href:
+            if not term:
+                sections = tag.xpath(f"ancestor::div[{_xclass('courseList')}][1]")
+                if sections:
+                    section_terms = sections[0].xpath(f".//div[{_xclass('courseList--term')}]")
+                    if section_terms:
+                        term = _lxml_text(section_terms[0])
+            courses.append(_course(name, term, href, page_url))
+    return courses
+
+
+def _lxml_csrf_token(html: str) -> str | None:
+    import lxml.html as lxml_html
+
+    tags = lxml_html.document_fromstring(html).xpath("//meta[@name='csrf-token']")
+    return tags[0].get("content") if tags else None
+
+
+def _lxml_rows(html: str, course_url: str) -> list[Assignment] | None:
+    import lxml.html as lxml_html
+
+    root = lxml_html.document_fromstring(html)
+    tables = root.xpath(f"//table[@id='{TABLE_ID}']")
+    if not tables:
+        return None
+    # libxml2 不会像浏览器那样补出省略的 <tbody>：此时行直接挂在表格下
+    bodies = tables[0].xpath("./tbody")
+    body = bodies[0] if bodies else tables[0]
+    body_rows = body.xpath("./tr")
+    if not bodies and not body_rows:
+        return None
+
+    rows = []
+    for row in body_rows:
+        name_ths = row.xpath(".//th[@scope='row']")
+        if not name_ths:
+            continue
+        status_tds = row.xpath(".//td")
+        if not status_tds:
+            continue
+        link_as = name_ths[0].xpath(".//a")
+        href = link_as[0].get("href") if link_as else None
+
+        due_dates = [(t.get("datetime"), _lxml_text(t))
+                     for t in row.xpath(f".//time[{_xclass('submissionTimeChart--dueDate')}]")]
+        release_tags = row.xpath(f".//time[{_xclass('submissionTimeChart--releaseDate')}]")
+        released = release_tags[0].get("datetime") if release_tags else None
+        rows.append((_lxml_text(name_ths[0]), href, _lxml_text(status_tds[0]), due_dates, released))
+    return _rows(rows, course_url)
+
+
+# --- streaming (html.parser, incremental) ---
+
+_VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+})
+
+
+class _TableRows:
+    """
+    Reads the rows of the assignments table from start tag, end tag and text
+    events, applying the HTML rules a browser applies when building the
+    table, so that every backend sees the same rows:
+
+    - the rows are those of the table's first body: its first <tbody>, or
+      the rows placed directly in the table (the implied <tbody>); rows of
+      <thead>, <tfoot> and any later body are ignored;
+    - a <tr> ends the open row and a <td>/<th> the open cell, closed or not;
+    - a table nested in a cell belongs to that cell: its text is part of the
+      cell's text, its rows are not assignment rows.
+
+    Text is gathered the same way as bs4's get_text(strip=True): every text
+    node is stripped and the pieces are concatenated. `found` becomes True
+    when the table's body starts and `done` once the table has been closed;
+    take() returns the completed rows not taken yet.
+    """
+
+    def __init__(self, course_url: str):
+        self.course_url = course_url
+        self.found = False
+        self.done = False
+        self._pending: list[tuple] = []
+        self._depth = 0  # 0：表格外；1：作业表格本身；>1：单元格中嵌套的表格
+        self._section: str | None = None  # 作业表格当前所在的 thead/tbody/tfoot
+        self._body_done = False
+        self._row: dict | None = None
+        self._cell: str | None = None  # 当前单元格记录的字段："name"、"status" 或 None
+        self._cell_text: list[str] = []
+        self._time: tuple[str | None, list[str]] | None = None
+        self._text: list[str] = []
+
+    def take(self) -> list[Assignment]:
+        rows, self._pending = _rows(self._pending, self.course_url), []
+        return rows
+
+    def text(self, data: str) -> None:
+        if self._cell is not None or self._time is not None:
+            self._text.append(data)
+
+    def comment(self) -> None:
+        # 注释把两侧的文本分成两个文本节点，各自 strip
+        self._flush_text()
+
+    def _flush_text(self) -> None:
+        if self._text:
+            text = "".join(self._text).strip()
+            self._text = []
+            if text:
+                if self._cell is not None:
+                    self._cell_text.append(text)
+                if self._time is not None:
+                    self._time[1].append(text)
+
+    def start(self, tag: str, attrs: dict) -> None:
+        self._flush_text()
+        if self.done or tag in _VOID_TAGS:
+            return
+        if self._depth == 0:
+            if tag == "table" and attrs.get("id") == TABLE_ID:
+                self._depth = 1
+            return
+        if tag == "table":
+            self._depth += 1
+        elif self._depth > 1:
+            self._inline(tag, attrs)
+        elif tag in ("thead", "tbody", "tfoot"):
+            self._end_row()
+            self._end_section()
+            if tag == "tbody" and not self._body_done:
+                self.found = True
+            self._section = tag
+        elif tag == "tr":
+            self._end_row()
+            if self._section is None:
+                # 直接放在表格下的行：浏览器会补出 <tbody>
+                if not self.found:
+                    self.found = True
+                self._section = "tbody"
+            if self._section == "tbody" and not self._body_done:
+                self._row = {"name": None, "href": None, "linked": False, "status": None,
+                             "due_dates": [], "released": None}
+        elif tag in ("td", "th"):
+            self._end_cell()
+            row = self._row
+            if row is None:
+                return
+            if tag == "th" and attrs.get("scope") == "row" and row["name"] is None:
+                self._cell = "name"
+            elif tag == "td" and row["status"] is None:
+                self._cell = "status"
+            else:
+                self._cell = ""
+        else:
+            self._inline(tag, attrs)
+
+    def _inline(self, tag: str, attrs: dict) -> None:
+        row = self._row
+        if row is None:
+            return
+        if tag == "a" and self._cell == "name" and not row["linked"]:
+            row["linked"] = True
+            row["href"] = attrs.get("href")
+        elif tag == "time" and self._time is None:
+            classes = (attrs.get("class") or "").split()
+            if "submissionTimeChart--dueDate" in classes:
+                self._time = (attrs.get("datetime"), [])
+            elif "submissionTimeChart--releaseDate" in classes and row["released"] is None:
+                row["released"] = attrs.get("datetime")
+
+    def end(self, tag: str) -> None:
+        self._flush_text()
+        if self.done or self._depth == 0 or tag in _VOID_TAGS:
+            return
+        if tag == "time":
+            self._end_time()
+        elif tag == "table":
+            self._depth -= 1
+            if self._depth == 0:
+                self._end_row()
+                self.done = True
+        elif self._depth > 1:
+            return
+        elif tag in ("td", "th"):
+            self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+        elif tag in ("thead", "tbody", "tfoot"):
+            self._end_row()
+            self._end_section()
+
+    def _end_section(self) -> None:
+        if self._section == "tbody" and self.found:
+            self._body_done = True
+        self._section = None
+
+    def _end_time(self) -> None:
+        if self._time is not None and self._row is not None:
+            self._row["due_dates"].append((self._time[0], "".join(self._time[1])))
+        self._time = None
+
+    def _end_cell(self) -> None:
+        self._end_time()
+        if self._cell and self._row is not None and self._row[self._cell] is None:
+            self._row[self._cell] = "".join(self._cell_text)
+        self._cell = None
+        self._cell_text = []
+
+    def _end_row(self) -> None:
+        self._end_cell()
+        row, self._row = self._row, None
+        if row is not None and row["name"] is not None and row["status"] is not None:
+            self._pending.append((row["name"], row["href"], row["status"], row["due_dates"], row["released"]))
+
+
+class _RowStreamParser(HTMLParser):
+    """Incremental parser that feeds a course page to a _TableRows reader."""
+
+    def __init__(self, course_url: str):
+        super().__init__(convert_charrefs=True)
+        self.reader = _TableRows(course_url)
+
+    def handle_starttag(self, tag, attrs):
+        self.reader.start(tag, {key: value or "" for key, value in attrs})
+
+    def handle_endtag(self, tag):
+        self.reader.end(tag)
+
+    def handle_data(self, data):
+        self.reader.text(data)
+
+    def handle_comment(self, data):
+        self.reader.comment()
+
+
+def iter_assignment_rows(chunks: Iterable[str], course_url: str) -> Iterator[Assignment]:
+    """
+    Yields the assignment rows of a course page while it is being received.
+
+    `chunks` is any iterable of text pieces of the page. Rows have the same
+    shape as extract_assignment_rows() and are yielded as soon as their
+    `</tr>` has been read; iteration stops - without consuming the rest of
+    `chunks` - once the assignments table is closed.
+    """
+    yield from _feed(_RowStreamParser(course_url), chunks)
+
+
+def _feed(parser: _RowStreamParser, chunks: Iterable[str]) -> Iterator[Assignment]:
+    reader = parser.reader
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from reader.take()
+        if reader.done:
+            return
+    parser.close()
+    reader.end("table")  # 页面在表格结束前就断了：收尾最后一行
+    yield from reader.take()
+
+
+def _response_chunks(response, chunk_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+    return (decoder.decode(raw) for raw in response.iter_content(chunk_size=chunk_size))
+
+
+def read_response_rows(response, course_url: str, chunk_size: int = 16 * 1024) -> list[Assignment] | None:
+    """
+    Parses the rows out of a `requests` response opened with stream=True.
+
+    Returns the rows as a list, or None if the page has no assignments table
+    (as extract_assignment_rows() does). The page is decoded and parsed chunk
+    by chunk, so it is never held in memory as a whole, and the connection is
+    closed as soon as the assignments table has ended, so the rest of the page
+    is never downloaded. The rows are returned together once the table has
+    been read.
+    """
+    parser = _RowStreamParser(course_url)
+    try:
+        rows = list(_feed(parser, _response_chunks(response, chunk_size)))
+    finally:
+        response.close()
+    return rows if parser.reader.found else None
+
+
+_COURSE_EXTRACTORS = {"bs4": _bs4_courses, "selectolax": _selectolax_courses, "lxml": _lxml_courses}
+_ROW_EXTRACTORS = {"bs4": _bs4_rows, "selectolax": _selectolax_rows, "lxml": _lxml_rows}
+_TOKEN_EXTRACTORS = {"bs4": _bs4_csrf_token, "selectolax": _selectolax_csrf_token, "lxml": _lxml_csrf_token}
+
+
+def extract_csrf_token(html: str, backend: str | None = None) -> str | None:
+    """
+    Returns the content of the login page's csrf-token meta tag, or None if
+    the tag or its content is missing.
+    """
+    return _TOKEN_EXTRACTORS[get_backend(backend)](html) or None
+
+
+def extract_courses(html: str, page_url: str, backend: str | None = None) -> list[Course]:
+    """
+    Extracts the courses listed on the /account page.
+
+    Returns records.Course objects named "<course> - <term>", with absolute URLs.
+    """
+    return _COURSE_EXTRACTORS[get_backend(backend)](html, page_url)
+
+
+def extract_assignment_rows(html: str, course_url: str, backend: str | None = None) -> list[Assignment] | None:
+    """
+    Extracts every row of a course page's assignments table.
+
+    Returns one records.Assignment per row (with every due date of the row
+    parsed), or None if the page has no assignments table.
+    """
+    return _ROW_EXTRACTORS[get_backend(backend)](html, course_url)
+
+
+def compare_backends(html: str, url: str = "https://www.gradescope.com/") -> list[str]:
+    """
+    Runs every installed backend on one page and returns a description of
+    each disagreement with the bs4 reference (an empty list means identical).
+    """
+    problems = []
+    reference = {"courses": _bs4_courses(html, url), "rows": _bs4_rows(html, url), "token": _bs4_csrf_token(html)}
+    for backend in available_backends():
+        if backend == "bs4":
+            continue
+        for kind, extractor in (("courses", _COURSE_EXTRACTORS[backend]), ("rows", _ROW_EXTRACTORS[backend])):
+            result = extractor(html, url)
+            if result != reference[kind]:
+                problems.append(f"{backend} {kind} differ from bs4: {result!r} != {reference[kind]!r}")
+        token = _TOKEN_EXTRACTORS[backend](html)
+        if token != reference["token"]:
+            problems.append(f"{backend} csrf token differs from bs4: {token!r} != {reference['token']!r}")
+    if reference["rows"] is not None:
+        # 以小块喂给流式解析器，确保跨块切分的标签和文本也能得到相同结果
+        chunks = (html[i:i + 97] for i in range(0, len(html), 97))
+        streamed = list(iter_assignment_rows(chunks, url))
+        if streamed != reference["rows"]:
+            problems.append(f"streaming rows differ from bs4: {streamed!r} != {reference['rows']!r}")
+    return problems
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m gradescope_scraper.parsers page.html [page.html ...]")
+        sys.exit(2)
+    print(f"Installed backends: {', '.join(available_backends())}")
+    failed = False
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            problems = compare_backends(f.read())
+        print(f"{path}: {'OK' if not problems else 'MISMATCH'}")
+        for problem in problems:
+            print(f"  {problem}")
+        failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
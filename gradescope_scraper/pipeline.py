@@ -0,0 +1,185 @@
+"""
+Two-stage course fetching: threads download, worker processes parse.
+
+With many concurrent downloads, parsing the course pages becomes the
+bottleneck: it is CPU-bound and the GIL runs it on one core. ParsePipeline
+splits the work:
+
+- network stage: a thread pool only downloads the raw page bytes (with the
+  page cache's conditional requests, as main.get_assignment_rows() does);
+- parse stage: a ProcessPoolExecutor extracts the rows and sends them back
+  packed (records.to_msgpack(), or JSON without msgpack).
+
+The download threads hash the assignments table of each page first; a page
+whose table is unchanged since the last run is answered from the page cache
+and never reaches a parse process.
+
+The stages are connected by a bounded hand-off: at most `queue_depth` pages
+are waiting for or being parsed, and downloaders block beyond that, so memory
+stays bounded when the network outpaces the parsers. One pipeline can be
+shared by every account of a batch run.
+
+GRADESCOPE_PARSE_PROCESSES sets the number of parse processes (default 0:
+parse in the download threads as before). Pages are not streamed
+(GRADESCOPE_STREAMING) while the pipeline is in use.
+"""
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import parsers
+from . import records
+from .instrument import record, span
+from .page_cache import PageCache, table_fingerprint
+from .records import Assignment, Course
+
+# 每个解析进程平均排队的页面数
+QUEUE_DEPTH_PER_PROCESS = 2
+
+
+def parse_processes() -> int:
+    """The number of parse processes from GRADESCOPE_PARSE_PROCESSES (0 = off)."""
+    value = os.getenv("GRADESCOPE_PARSE_PROCESSES", "0")
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"Warning: GRADESCOPE_PARSE_PROCESSES must be an integer, got {value!r}; parsing in-process.")
+        return 0
+
+
+def _pack(rows: list[Assignment]) -> bytes | str:
+    return records.to_msgpack(rows) if records.msgpack is not None else records.to_json(rows)
+
+
+def _unpack(data: bytes | str) -> list[Assignment]:
+    return records.from_msgpack(data) if isinstance(data, bytes) else records.from_json(data)
+
+
+def _parse_page(content: bytes, encoding: str | None, course_url: str, backend: str | None) -> tuple:
+    """
+    Runs in a worker process: extracts the rows of one course page.
+
+    Returns (packed rows or None without a table, start, duration).
+    """
+    start, started = time.time(), time.perf_counter()
+    html = content.decode(encoding or "utf-8", errors="replace")
+    rows = parsers.extract_assignment_rows(html, course_url, backend)
+    packed = _pack(rows) if rows is not None else None
+    return packed, start, time.perf_counter() - started
+
+
+class ParsePipeline:
+    """
+    A pool of parse processes behind a bounded queue; see the module docstring.
+
+    `get(url, headers)` passed to fetch_rows() performs the download and
+    returns a requests.Response, or None if the request failed.
+    """
+
+    def __init__(self, processes: int | None = None, queue_depth: int | None = None,
+                 backend: str | None = None):
+        self.processes = processes or os.cpu_count() or 1
+        self.queue_depth = queue_depth or self.processes * QUEUE_DEPTH_PER_PROCESS
+        self.backend = parsers.get_backend(backend)
+        # multiprocessing 只在真正启用解析进程时才导入
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        methods = multiprocessing.get_all_start_methods()
+        # 父进程中有其他线程在运行，fork 不安全
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._pool = ProcessPoolExecutor(self.processes, mp_context=context)
+        self._slots = threading.BoundedSemaphore(self.queue_depth)
+
+    def _submit(self, content: bytes, encoding: str | None, url: str) -> Future:
+        """Hands a page to the parse stage, waiting while the queue is full."""
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(_parse_page, content, encoding, url, self.backend)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def fetch_rows(
+        self,
+        courses: list[Course],
+        get: Callable,
+        max_workers: int,
+        cache: PageCache | None = None,
+    ) -> list[list[Assignment] | None]:
+        """
+        Downloads every course page with `max_workers` threads and parses
+        them in the worker processes.
+
+        Returns the rows of each course (all statuses, like
+        main.get_assignment_rows()) in the order of `courses`, or None for a
+        course that failed or whose page has no assignments table.
+        """
+        results: list[list[Assignment] | None] = [None] * len(courses)
+        parsing: dict[int, tuple[Future, dict]] = {}
+
+        def download(i: int, course: Course) -> None:
+            with span("course", url=course.url) as s:
+                try:
+                    headers = cache.conditional_headers(course.url) if cache is not None else {}
+                    response = get(course.url, headers)
+                    if response is not None and response.status_code == 304:
+                        rows = cache.rows(course.url) if cache is not None else None
+                        if rows is not None:
+                            results[i] = rows
+                            return
+                        # 缓存条目已被清除但服务器仍返回 304：不带条件头重新请求
+                        response = get(course.url, {})
+                    if response is None:
+                        s.set(error="request failed")
+                        return
+                    validators = {"etag": response.headers.get("ETag"),
+                                  "last_modified": response.headers.get("Last-Modified"),
+                                  "fingerprint": None}
+                    if cache is not None:
+                        # 在下载线程中比较表格哈希，未变化的页面不交给解析进程
+                        fingerprint = validators["fingerprint"] = table_fingerprint(response.text)
+                        rows = cache.rows(course.url, fingerprint) if fingerprint is not None else None
+                        if rows is not None:
+                            cache.store(course.url, rows, **validators)
+                            results[i] = rows
+                            return
+                    parsing[i] = (self._submit(response.content, response.encoding, course.url), validators)
+                except Exception as e:
+                    print(f"Error while checking course {course.name!r}: {e!r}")
+                    s.set(error=repr(e))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(courses) or 1))) as threads:
+            for future in [threads.submit(download, i, course) for i, course in enumerate(courses)]:
+                future.result()
+
+        for i, (future, validators) in sorted(parsing.items()):
+            course = courses[i]
+            try:
+                packed, start, duration = future.result()
+            except Exception as e:
+                print(f"Error while parsing course {course.name!r}: {e!r}")
+                continue
+            rows = _unpack(packed) if packed is not None else []
+            record("parse", start, duration, url=course.url, backend=self.backend, process=True, rows=len(rows))
+            if packed is None:
+                # 没有作业表格的页面（登录跳转、错误页面）按抓取失败处理
+                print(f"  [警告] {course.url} 未找到作业表格主体，按抓取失败处理")
+                continue
+            if cache is not None:
+                cache.store(course.url, rows, **validators)
+            results[i] = rows
+        return results
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ParsePipeline":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,176 @@
+"""
+Typed records for courses and assignments.
+
+The parsers produce Course and Assignment objects (slotted dataclasses, much
+smaller than the dicts they replace), and every later stage - filtering,
+state, notifiers, caches - works on them. Assignments keep their parsed
+due dates as datetimes, so nothing parses a date twice.
+
+to_dict()/from_dict() convert to and from plain JSON-compatible dicts;
+to_json()/from_json() and to_msgpack()/from_msgpack() (needs the optional
+`msgpack` package) serialise whole lists for caches and for passing records
+between processes.
+"""
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+_SCORE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)")
+
+
+class Status(Enum):
+    NO_SUBMISSION = "no_submission"
+    SUBMITTED = "submitted"
+    GRADED = "graded"
+    UNKNOWN = "unknown"
+
+    @classmethod
+    def from_text(cls, text: str) -> "Status":
+        """
+        Classifies the status cell of an assignment row.
+
+        >>> Status.from_text("No Submission"), Status.from_text("8.0 / 10.0")
+        (<Status.NO_SUBMISSION: 'no_submission'>, <Status.GRADED: 'graded'>)
+        """
+        if "No Submission" in text:
+            return cls.NO_SUBMISSION
+        if _SCORE_RE.search(text):
+            return cls.GRADED
+        if "Submitted" in text:
+            return cls.SUBMITTED
+        return cls.UNKNOWN
+
+
+@dataclass(slots=True)
+class DueDate:
+    at: datetime
+    text: str
+    # 是否为迟交截止时间（Late Due Date）
+    late: bool = False
+
+    @classmethod
+    def parse(cls, at: datetime, text: str) -> "DueDate":
+        return cls(at, text, text.lstrip().lower().startswith("late"))
+
+
+@dataclass(slots=True)
+class Course:
+    name: str
+    url: str
+    # 所属学期（仪表盘上的 courseList--term），未知时为空
+    term: str = ""
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "url": self.url, "term": self.term}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Course":
+        return cls(data["name"], data["url"], data.get("term", ""))
+
+
+@dataclass(slots=True)
+class Assignment:
+    name: str
+    link: str
+    status: Status
+    status_text: str
+    due_dates: tuple[DueDate, ...] = ()
+    # 由 collect_unsubmitted() 填入
+    course_name: str = ""
+    course_url: str = ""
+    released_at: datetime | None = None
+
+    @property
+    def latest_due(self) -> DueDate | None:
+        """The latest deadline of the row (the late deadline if there is one)."""
+        return max(self.due_dates, key=lambda d: d.at) if self.due_dates else None
+
+    @property
+    def due_at(self) -> datetime | None:
+        latest = self.latest_due
+        return latest.at if latest is not None else None
+
+    @property
+    def has_late_deadline(self) -> bool:
+        return any(d.late for d in self.due_dates)
+
+    @property
+    def score(self) -> tuple[float, float] | None:
+        """
+        (points, out of) for a graded row, None otherwise.
+
+        >>> Assignment("HW", "", Status.GRADED, "8.5 / 10.0").score
+        (8.5, 10.0)
+        """
+        match = _SCORE_RE.search(self.status_text) if self.status is Status.GRADED else None
+        return (float(match[1]), float(match[2])) if match else None
+
+    @property
+    def submitted_late(self) -> bool:
+        """Whether the status cell flags the submission as late."""
+        return self.status is not Status.NO_SUBMISSION and "late" in self.status_text.lower()
+
+    @property
+    def due_text(self) -> str:
+        """Display text of the latest deadline, "N/A" if the row has none."""
+        latest = self.latest_due
+        if latest is None:
+            return "N/A"
+        # 如果存在多个日期，且最晚的是 Late Due Date，可以在显示上做个标记
+        if len(self.due_dates) > 1:
+            return latest.text + " (含 Late Deadline)"
+        return latest.text
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "link": self.link,
+            "status": self.status.value,
+            "status_text": self.status_text,
+            "due_dates": [{"at": d.at.isoformat(), "text": d.text, "late": d.late} for d in self.due_dates],
+            "course_name": self.course_name,
+            "course_url": self.course_url,
+            "released_at": self.released_at.isoformat() if self.released_at is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Assignment":
+        return cls(
+            data["name"],
+            data["link"],
+            Status(data["status"]),
+            data["status_text"],
+            tuple(DueDate(datetime.fromisoformat(d["at"]), d["text"], d["late"]) for d in data["due_dates"]),
+            data.get("course_name", ""),
+            data.get("course_url", ""),
+            datetime.fromisoformat(data["released_at"]) if data.get("released_at") else None,
+        )
+
+
+def to_json(records: Iterable[Course | Assignment]) -> str:
+    return json.dumps([r.to_dict() for r in records], ensure_ascii=False)
+
+
+def from_json(text: str | bytes, kind: type = Assignment) -> list:
+    return [kind.from_dict(d) for d in json.loads(text)]
+
+
+def to_msgpack(records: Iterable[Course | Assignment]) -> bytes:
+    """Packs records with msgpack (smaller and faster to load than JSON)."""
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed: pip install msgpack")
+    return msgpack.packb([r.to_dict() for r in records])
+
+
+def from_msgpack(data: bytes, kind: type = Assignment) -> list:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed: pip install msgpack")
+    return [kind.from_dict(d) for d in msgpack.unpackb(data)]
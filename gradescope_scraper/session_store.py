@@ -0,0 +1,104 @@
+"""
+On-disk cache of logged-in Gradescope cookies.
+
+Each account's cookie jar is stored as JSON under the cache directory
+(GRADESCOPE_CACHE_DIR, default `.cache`), in a file named after a hash of the
+email so addresses never appear in file names. The file also records when the
+session should be considered expired: the earliest explicit cookie expiry, or
+SESSION_MAX_AGE after it was saved for session-only cookies.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+# 仅有会话 Cookie（无过期时间）时，缓存最多复用这么久
+SESSION_MAX_AGE = 24 * 3600
+
+
+def cache_dir() -> str:
+    return os.getenv("GRADESCOPE_CACHE_DIR", ".cache")
+
+
+def session_cache_enabled() -> bool:
+    return os.getenv("GRADESCOPE_SESSION_CACHE", "1") != "0"
+
+
+def account_key(email: str) -> str:
+    """
+    Names an account's files in the cache directory without revealing the email.
+
+    >>> account_key(" User@Example.com ") == account_key("user@example.com")
+    True
+    """
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:16]
+
+
+def _session_path(email: str) -> str:
+    return os.path.join(cache_dir(), f"session-{account_key(email)}.json")
+
+
+def save_session(session: "requests.Session", email: str) -> None:
+    """Writes the session's cookies to the cache (readable by the owner only)."""
+    now = time.time()
+    cookies = []
+    expires_at = now + SESSION_MAX_AGE
+    for cookie in session.cookies:
+        cookies.append({
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "secure": cookie.secure,
+            "expires": cookie.expires,
+        })
+        if cookie.expires is not None:
+            expires_at = min(expires_at, cookie.expires)
+
+    path = _session_path(email)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"saved_at": now, "expires_at": expires_at, "cookies": cookies}, f)
+    os.replace(tmp_path, path)
+
+
+def load_session(session: "requests.Session", email: str) -> bool:
+    """
+    Restores cached cookies into `session`.
+
+    Returns False (leaving the session untouched) if there is no cache entry,
+    it cannot be read, or it has already expired.
+    """
+    try:
+        with open(_session_path(email), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if data.get("expires_at", 0) <= time.time():
+        return False
+
+    for cookie in data.get("cookies", []):
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            secure=cookie.get("secure", False),
+            expires=cookie.get("expires"),
+        )
+    return True
+
+
+def clear_session(email: str) -> None:
+    """Deletes the account's cache entry, if any."""
+    try:
+        os.remove(_session_path(email))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,65 @@
+"""
+Connection settings shared by the synchronous scraper (main.py,
+transport.py) and the asyncio client (client.py).
+
+Nothing here imports `requests`, so client.py can be used as a library
+with httpx alone.
+"""
+import importlib.util
+import os
+
+# 安装了 brotli/brotlicffi 时 urllib3 和 httpx 都会自动解码 Brotli，这里只检查是否可用
+HAS_BROTLI = any(importlib.util.find_spec(name) is not None for name in ("brotli", "brotlicffi"))
+
+# Gradescope 的主页和登录相关的 URL（GRADESCOPE_BASE_URL 可指向本地替身服务器，用于基准测试）
+BASE_URL = os.getenv("GRADESCOPE_BASE_URL", "https://www.gradescope.com").rstrip("/")
+LOGIN_URL = f"{BASE_URL}/login"
+# 并发抓取课程页面时的默认线程数（可通过 GRADESCOPE_CONCURRENCY 覆盖，设为 1 即串行）
+DEFAULT_CONCURRENCY = 4
+
+# 设置常见浏览器请求头，避免因默认 UA 被服务器屏蔽或返回简化页面
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7",
+    "Referer": LOGIN_URL
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 10.0
+
+
+def _env_float(name: str, default: float) -> float:
+    """Reads a number from the environment; unset or empty means `default`, anything else invalid warns."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Warning: {name} must be a number, got {value!r}; using {default}.")
+        return default
+
+
+def timeouts() -> tuple[float, float]:
+    """(connect, read) timeouts from GRADESCOPE_CONNECT_TIMEOUT / GRADESCOPE_READ_TIMEOUT."""
+    return (
+        _env_float("GRADESCOPE_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT),
+        _env_float("GRADESCOPE_READ_TIMEOUT", DEFAULT_READ_TIMEOUT),
+    )
+
+
+def accept_encoding() -> str:
+    return "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+
+
+def http2_enabled() -> bool:
+    """HTTP/2 is used when GRADESCOPE_HTTP2=1 and httpx (with h2) is installed."""
+    if os.getenv("GRADESCOPE_HTTP2") != "1":
+        return False
+    # httpx 只在真正创建 HTTP/2 连接时才导入（Http2Adapter）
+    if importlib.util.find_spec("httpx") is None:
+        print("Warning: GRADESCOPE_HTTP2=1 but httpx is not installed; using HTTP/1.1.")
+        return False
+    return True
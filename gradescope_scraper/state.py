@@ -0,0 +1,174 @@
+"""
+Persistent assignment state, used to notify only about what changed.
+
+Every open (unsubmitted, not expired) assignment reported by a run is stored
+in a small SQLite database under the cache directory, keyed by account,
+course URL and assignment link. AssignmentStore.sync() compares a run's
+results with the stored state and returns only the differences:
+
+- new:       assignments not open in the previous run (e.g. just released)
+- changed:   open assignments whose deadline moved
+- submitted: previously open assignments that are no longer listed while their
+             deadline (plus grace period) has not passed
+- expired:   previously open assignments that disappeared because their
+             deadline (plus grace period) passed
+
+Courses whose page could not be fetched are left untouched, so a failed
+request never looks like a batch of submissions.
+"""
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from . import duedates
+from . import session_store
+from .records import Assignment, DueDate, Status
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    account    TEXT NOT NULL,
+    course_url TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    course     TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    link       TEXT NOT NULL,
+    due_date   TEXT NOT NULL,
+    due_at     TEXT NOT NULL,
+    state      TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (account, course_url, key)
+)
+"""
+
+
+@dataclass
+class StateDiff:
+    new: list[Assignment] = field(default_factory=list)
+    changed: list[Assignment] = field(default_factory=list)
+    submitted: list[Assignment] = field(default_factory=list)
+    expired: list[Assignment] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.changed or self.submitted or self.expired)
+
+    @property
+    def actionable(self) -> list[Assignment]:
+        """Assignments that need the student's attention: new or changed."""
+        return self.new + self.changed
+
+
+def state_enabled() -> bool:
+    """The state store is on unless GRADESCOPE_STATE=0."""
+    return os.getenv("GRADESCOPE_STATE", "1") != "0"
+
+
+def assignment_key(assignment: Assignment) -> str:
+    """Identifies an assignment within its course (link, or name if it has no link)."""
+    if assignment.link and assignment.link != assignment.course_url:
+        return assignment.link
+    return f"#{assignment.name}"
+
+
+def _due_at(assignment: Assignment) -> str:
+    due_at = assignment.due_at
+    return due_at.isoformat() if due_at is not None else ""
+
+
+def _from_row(row: sqlite3.Row) -> Assignment:
+    """Rebuilds a stored assignment (its deadline with the stored display text)."""
+    due_dates = (DueDate(datetime.fromisoformat(row["due_at"]), row["due_date"]),) if row["due_at"] else ()
+    return Assignment(row["name"], row["link"], Status.NO_SUBMISSION, "No Submission", due_dates,
+                      row["course"], row["course_url"])
+
+
+class AssignmentStore:
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(session_store.cache_dir(), "state.sqlite3")
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute(_SCHEMA)
+        return conn
+
+    def sync(
+        self,
+        account: str,
+        assignments: list[Assignment],
+        checked_courses: set[str],
+        listed_courses: set[str] | None = None,
+        now: datetime | None = None,
+        commit: bool = True,
+    ) -> StateDiff:
+        """
+        Records a run's open assignments and returns what changed since the
+        previous run.
+
+        Args:
+            account: The account the assignments belong to.
+            assignments: Open assignments, with course_url and course_name
+                filled in by collect_unsubmitted().
+            checked_courses: URLs of the courses that were fetched successfully;
+                only their stored assignments are compared.
+            listed_courses: URLs of all courses on the dashboard. Stored
+                assignments of courses no longer listed are dropped.
+            now: Current time (for telling expired from submitted).
+            commit: With False the differences are computed but the store is
+                left unchanged (sync() again once they have been reported).
+        """
+        now = now or duedates.current_time()
+        # 与 filter_unsubmitted 的过期宽限期保持一致
+        grace = duedates.grace_period()
+        timestamp = time.time()
+        diff = StateDiff()
+        current = {(a.course_url, assignment_key(a)): a for a in assignments}
+
+        with self._connect() as conn:
+            previous = {
+                (row["course_url"], row["key"]): row
+                for row in conn.execute("SELECT * FROM assignments WHERE account = ? AND state = 'open'", (account,))
+                if row["course_url"] in checked_courses
+            }
+
+            for key, assignment in current.items():
+                row = previous.get(key)
+                if row is None:
+                    diff.new.append(assignment)
+                elif row["due_at"] != _due_at(assignment) or row["due_date"] != assignment.due_text:
+                    diff.changed.append(assignment)
+                else:
+                    continue
+                conn.execute(
+                    "INSERT INTO assignments VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'open', ?, ?) "
+                    "ON CONFLICT (account, course_url, key) DO UPDATE SET "
+                    "course = excluded.course, name = excluded.name, link = excluded.link, "
+                    "due_date = excluded.due_date, due_at = excluded.due_at, state = 'open', "
+                    "updated_at = excluded.updated_at",
+                    (account, key[0], key[1], assignment.course_name, assignment.name, assignment.link,
+                     assignment.due_text, _due_at(assignment), timestamp, timestamp),
+                )
+
+            for key, row in previous.items():
+                if key in current:
+                    continue
+                record = _from_row(row)
+                expired = record.due_at is not None and now > record.due_at + grace
+                (diff.expired if expired else diff.submitted).append(record)
+                conn.execute(
+                    "UPDATE assignments SET state = ?, updated_at = ? WHERE account = ? AND course_url = ? AND key = ?",
+                    ("expired" if expired else "submitted", timestamp, account, key[0], key[1]),
+                )
+
+            if listed_courses:
+                placeholders = ",".join("?" * len(listed_courses))
+                conn.execute(
+                    f"DELETE FROM assignments WHERE account = ? AND course_url NOT IN ({placeholders})",
+                    (account, *sorted(listed_courses)),
+                )
+            if not commit:
+                conn.rollback()
+        return diff
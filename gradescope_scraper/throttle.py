@@ -0,0 +1,326 @@
+"""
+Request scheduling shared by every session in the process.
+
+safe_request() consults this module around each attempt:
+
+- throttle(host) waits for the process-wide token bucket (set_rate_limit())
+  and for the bucket of the target host (GRADESCOPE_HOST_RATE requests per
+  second, default 10); athrottle(host) is the same for asyncio code, so
+  threads and coroutines share one set of limits;
+- RetryPolicy decides, per error class, whether an attempt is retried and how
+  long to back off (exponential with full jitter, or the server's Retry-After);
+- CircuitBreaker stops sending requests to a host after repeated failures, so
+  a sweep ends quickly when the site is clearly down.
+
+All decisions are counted; stats() returns the counters for tuning.
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import Enum
+
+from .settings import _env_float
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    `rate` tokens are added per second, up to `burst` tokens. Each request
+    consumes one token; when the bucket is empty the caller waits.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate!r}")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Takes one token and returns how many seconds the caller must wait
+        before using it (0.0 if a token was available right away).
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Blocks until a token is available; returns the time waited."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every caller for at least `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class Permit(Enum):
+    """What CircuitBreaker.allow() granted; false only for DENIED."""
+
+    DENIED = "denied"
+    GRANTED = "granted"
+    # 半开状态下唯一的试探请求：只有持有者可以结束试探
+    TRIAL = "trial"
+
+    def __bool__(self) -> bool:
+        return self is not Permit.DENIED
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `threshold` consecutive failures the circuit opens and requests to
+    that host are rejected for `cooldown` seconds. Then one trial request is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    allow() returns Permit.TRIAL to the caller that got the trial; only that
+    caller passes trial=True to record_failure() and must call release() once
+    the trial is over whatever its outcome, so an outcome that is neither
+    (e.g. an exception raised before sending) does not hold the trial slot
+    for good. Requests let through while the circuit was closed cannot end
+    another caller's trial.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._trial: set[str] = set()
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> Permit:
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return Permit.GRANTED
+            if time.monotonic() - opened_at >= self.cooldown and host not in self._trial:
+                self._trial.add(host)
+                return Permit.TRIAL
+            _count("breaker_rejected")
+            return Permit.DENIED
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str, trial: bool = False) -> None:
+        """Counts a failure; `trial` is true if the caller holds the half-open trial (Permit.TRIAL)."""
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if trial or (failures >= self.threshold and host not in self._opened_at):
+                if not trial:
+                    _count("breaker_opened")
+                    print(f"Circuit breaker opened for {host} after {failures} consecutive failures.")
+                self._opened_at[host] = time.monotonic()
+
+    def release(self, host: str) -> None:
+        """Ends the half-open trial; only the caller that got Permit.TRIAL may call it."""
+        with self._lock:
+            self._trial.discard(host)
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return host in self._opened_at
+
+
+def _error_kind(error: BaseException | None) -> str | None:
+    """
+    "timeout" or "connection" for the transport errors worth retrying, else
+    None. The exception classes of requests and httpx are only looked up if
+    that library is already imported, so this module needs neither.
+    """
+    if error is None:
+        return None
+    timeouts: list[type] = [TimeoutError]
+    connection: list[type] = [ConnectionError]
+    requests = sys.modules.get("requests")
+    if requests is not None:
+        timeouts.append(requests.exceptions.Timeout)
+        connection += [requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError]
+    httpx = sys.modules.get("httpx")
+    if httpx is not None:
+        timeouts.append(httpx.TimeoutException)
+        connection.append(httpx.TransportError)
+    # 先判断超时：requests 的 ConnectTimeout 同时是 ConnectionError 的子类
+    if isinstance(error, tuple(timeouts)):
+        return "timeout"
+    if isinstance(error, tuple(connection)):
+        return "connection"
+    return None
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed attempt is retried, and after how long.
+
+    - connection errors and timeouts: retried, count as host failures
+    - 429 Too Many Requests: retried after Retry-After, not a host failure
+    - 500/502/503/504: retried (honouring Retry-After), count as host failures
+    - any other 4xx and other errors: not retried
+    """
+
+    RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+    def __init__(self, base: float = 1.0, cap: float = 30.0, max_retry_after: float = 120.0):
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+
+    def classify(self, status: int | None = None, error: BaseException | None = None) -> tuple[str, bool, bool]:
+        """
+        Returns (reason, retryable, counts_as_host_failure) for an HTTP
+        status code, or, without one, for the exception a request raised.
+        """
+        if status is not None:
+            if status == 429:
+                return "429", True, False
+            if status in self.RETRY_STATUSES:
+                return "5xx", True, True
+            if status >= 500:
+                return "5xx", False, True
+            return f"{status}", False, False
+        kind = _error_kind(error)
+        if kind is not None:
+            return kind, True, True
+        return "error", False, False
+
+    def retry_after(self, response) -> float | None:
+        """
+        Parses the Retry-After header of a response (requests or httpx,
+        anything with `headers`) given in seconds or as an HTTP date, capped.
+        """
+        if response is None:
+            return None
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            seconds = float(value)
+        else:
+            try:
+                seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(max(0.0, seconds), self.max_retry_after)
+
+    def delay(self, attempt: int, response=None, base: float | None = None) -> float:
+        """
+        Back-off before the next attempt (`attempt` is the one that failed):
+        the server's Retry-After if given, otherwise a random delay up to
+        `base` * 2 ** (attempt - 1) seconds, capped at `cap`.
+        """
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        base = self.base if base is None else base
+        return random.uniform(0, min(self.cap, base * 2 ** (attempt - 1)))
+
+
+_global_bucket: TokenBucket | None = None
+_host_buckets: dict[str, TokenBucket] = {}
+_host_lock = threading.Lock()
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+breaker = CircuitBreaker(
+    threshold=int(_env_float("GRADESCOPE_BREAKER_THRESHOLD", 5)),
+    cooldown=_env_float("GRADESCOPE_BREAKER_COOLDOWN", 60.0),
+)
+policy = RetryPolicy(cap=_env_float("GRADESCOPE_BACKOFF_CAP", 30.0))
+
+
+def _count(key: str, amount: float = 1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def set_rate_limit(rate: float | None, burst: int | None = None) -> None:
+    """
+    Sets the process-wide request rate in requests per second.
+
+    Passing None (or a non-positive rate) removes the limit.
+    """
+    global _global_bucket
+    _global_bucket = TokenBucket(rate, burst) if rate and rate > 0 else None
+
+
+def host_bucket(host: str) -> TokenBucket | None:
+    """Returns the bucket of `host` (None when GRADESCOPE_HOST_RATE=0)."""
+    rate = _env_float("GRADESCOPE_HOST_RATE", 10.0)
+    if rate <= 0:
+        return None
+    with _host_lock:
+        bucket = _host_buckets.get(host)
+        if bucket is None:
+            bucket = _host_buckets[host] = TokenBucket(rate)
+        return bucket
+
+
+def throttle(host: str | None = None) -> None:
+    """Waits for the process-wide rate limit and the host's own bucket."""
+    waited = 0.0
+    bucket = _global_bucket
+    if bucket is not None:
+        waited += bucket.acquire()
+    if host:
+        bucket = host_bucket(host)
+        if bucket is not None:
+            waited += bucket.acquire()
+    if waited:
+        _count("throttle_wait_s", waited)
+
+
+async def athrottle(host: str | None = None) -> None:
+    """Like throttle(), but sleeps without blocking the event loop."""
+    # asyncio 只有异步客户端（client.py）才用到，已由调用方导入
+    import asyncio
+
+    waited = 0.0
+    buckets = [_global_bucket, host_bucket(host) if host else None]
+    for bucket in buckets:
+        if bucket is not None:
+            delay = bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                waited += delay
+    if waited:
+        _count("throttle_wait_s", waited)
+
+
+def record(key: str, amount: float = 1) -> None:
+    """Adds to one of the counters reported by stats()."""
+    _count(key, amount)
+
+
+def stats() -> dict[str, float]:
+    """
+    Returns a snapshot of the scheduler counters: requests, retries,
+    retry_<reason>, gave_up, backoff_s, throttle_wait_s, breaker_opened and
+    breaker_rejected.
+    """
+    with _stats_lock:
+        return dict(_stats)
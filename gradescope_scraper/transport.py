@@ -0,0 +1,237 @@
+"""
+HTTP transport configuration for the scraper's sessions.
+
+create_session() returns a requests.Session with:
+
+- an HTTPAdapter whose connection pool fits the course fetch concurrency
+  (GRADESCOPE_POOL_SIZE overrides it), keep-alive, and no adapter-level
+  retries (safe_request() owns retrying);
+- gzip/deflate negotiation, plus Brotli when the `brotli`/`brotlicffi`
+  package is installed (urllib3 decodes it transparently);
+- optionally (GRADESCOPE_HTTP2=1, needs `httpx[http2]`) an adapter that sends
+  the requests over one multiplexed HTTP/2 connection per host instead.
+
+connection_stats() reports how many requests reused an existing connection.
+The settings that do not need `requests` (timeouts, the HTTP/2 switch, pool
+size) live in settings.py, which client.py shares.
+"""
+import http.client
+import io
+import os
+import ssl
+import threading
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import certifi
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# 这些设置不依赖 requests，定义在 settings.py 中，与 client.py 共用
+from .settings import DEFAULT_POOL_SIZE, accept_encoding, http2_enabled
+
+if TYPE_CHECKING:
+    import httpx
+
+
+def build_response(request, status: int, reason: str, headers: list[tuple[str, str]], content: bytes,
+                   connection: BaseAdapter) -> requests.Response:
+    """
+    Builds the requests.Response of a body that was already read in full and
+    decompressed, for adapters that do not use urllib3 (Http2Adapter,
+    cassette.CassetteAdapter). Set-Cookie headers reach the session's cookie
+    jar as usual.
+    """
+    # requests 通过 raw._original_response.msg 提取 Set-Cookie，这里构造等价的 HTTPMessage
+    message = http.client.HTTPMessage()
+    merged = CaseInsensitiveDict()
+    for name, value in headers:
+        message[name] = value
+        merged[name] = f"{merged[name]}, {value}" if name in merged else value
+    raw = io.BytesIO(content)
+    raw._original_response = SimpleNamespace(msg=message)
+
+    response = requests.Response()
+    response.status_code = status
+    response.headers = merged
+    response.headers.pop("Content-Encoding", None)
+    response.headers["Content-Length"] = str(len(content))
+    response.raw = raw
+    response.reason = reason
+    response.url = request.url
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.request = request
+    response.connection = connection
+    requests.cookies.extract_cookies_to_jar(response.cookies, request, raw)
+    return response
+
+
+class Http2Adapter(BaseAdapter):
+    """
+    A requests transport adapter backed by an httpx.Client with HTTP/2.
+
+    Redirects and cookies are still handled by requests.Session; the body is
+    read in full before the Response is returned, so stream=True gives no
+    early-close benefit over HTTP/2. The TLS settings (`verify`, `cert`,
+    REQUESTS_CA_BUNDLE) and the proxy that requests selects for a request are
+    honoured: each distinct combination gets its own httpx.Client.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        super().__init__()
+        self._pool_size = pool_size
+        self._clients: dict[tuple, "httpx.Client"] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self._streams: set[int] = set()
+
+    def _client(self, verify, cert, proxy: str | None) -> "httpx.Client":
+        """Returns the httpx.Client for one TLS/proxy configuration, creating it on first use."""
+        import httpx
+
+        key = (verify, tuple(cert) if isinstance(cert, (list, tuple)) else cert, proxy)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                limits = httpx.Limits(max_connections=self._pool_size, max_keepalive_connections=self._pool_size)
+                client = httpx.Client(http2=True, limits=limits, follow_redirects=False,
+                                      verify=_ssl_context(verify, cert), proxy=proxy, trust_env=False)
+                self._clients[key] = client
+            return client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        import httpx
+
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            httpx_timeout = httpx.Timeout(read, connect=connect)
+        else:
+            httpx_timeout = httpx.Timeout(timeout)
+        # Session.send() 已经合并了环境变量中的代理和 CA 设置，这里按 URL 选出代理
+        proxy = requests.utils.select_proxy(request.url, proxies)
+        try:
+            r = self._client(verify, cert, proxy).request(
+                request.method,
+                request.url,
+                headers=dict(request.headers),
+                content=request.body,
+                timeout=httpx_timeout,
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        with self._lock:
+            self.requests += 1
+            network_stream = r.extensions.get("network_stream")
+            if network_stream is not None:
+                self._streams.add(id(network_stream))
+
+        # httpx 已经解压了正文
+        return build_response(request, r.status_code, r.reason_phrase, r.headers.multi_items(), r.content, self)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "connections": len(self._streams)}
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+
+def _ssl_context(verify: bool | str, cert: str | tuple[str, str] | None) -> "ssl.SSLContext | bool":
+    """
+    Translates requests' `verify` and `cert` arguments into what httpx accepts.
+
+    `verify` is True (the certifi bundle, as requests uses), False, or the
+    path of a CA bundle file or directory; `cert` is a client certificate
+    file or a (certificate, key) pair.
+    """
+    if verify is False and cert is None:
+        return False
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    else:
+        path = certifi.where() if verify is True else verify
+        if os.path.isdir(path):
+            context = ssl.create_default_context(capath=path)
+        else:
+            context = ssl.create_default_context(cafile=path)
+    if cert is not None:
+        if isinstance(cert, (list, tuple)):
+            context.load_cert_chain(cert[0], cert[1])
+        else:
+            context.load_cert_chain(cert)
+    return context
+
+
+def create_session(headers: dict[str, str] | None = None, pool_size: int | None = None) -> requests.Session:
+    """
+    Creates a session with a tuned transport.
+
+    Args:
+        headers: Default headers for every request.
+        pool_size: Connections kept per host; GRADESCOPE_POOL_SIZE overrides it.
+    """
+    pool_size = int(os.getenv("GRADESCOPE_POOL_SIZE") or pool_size or DEFAULT_POOL_SIZE)
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    session.headers["Accept-Encoding"] = accept_encoding()
+    session.headers["Connection"] = "keep-alive"
+
+    if http2_enabled():
+        adapter: BaseAdapter = Http2Adapter(pool_size)
+    else:
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+    if os.getenv("GRADESCOPE_CASSETTE"):
+        # 录制或回放请求（cassette.py），只在启用时才导入
+        from . import cassette
+
+        adapter = cassette.CassetteAdapter(cassette.active(), adapter)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def adapter_stats(adapter: BaseAdapter) -> dict[str, int]:
+    """Requests sent and connections opened by one transport adapter."""
+    if isinstance(adapter, HTTPAdapter):
+        requests_sent = connections = 0
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        return {"requests": requests_sent, "connections": connections}
+    stats = getattr(adapter, "stats", None)  # Http2Adapter, cassette.CassetteAdapter
+    return stats() if stats is not None else {"requests": 0, "connections": 0}
+
+
+def connection_stats(session: requests.Session) -> dict[str, float]:
+    """
+    Reports requests sent and connections opened by the session's adapters.
+
+    'reuse' is the fraction of requests that did not need a new connection
+    (and thus no new TCP/TLS handshake).
+    """
+    total_requests = 0
+    total_connections = 0
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        stats = adapter_stats(adapter)
+        total_requests += stats["requests"]
+        total_connections += stats["connections"]
+    reuse = 1 - total_connections / total_requests if total_requests else 0.0
+    return {"requests": total_requests, "connections": total_connections, "reuse": round(reuse, 3)}
@@ -0,0 +1,135 @@
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import batch
+from gradescope_scraper import duedates
+from gradescope_scraper.settings import BASE_URL, LOGIN_URL
+from gradescope_scraper.transport import build_response
+
+COURSE_PAGE = (Path(__file__).parent.parent / "fixtures" / "course.html").read_text(encoding="utf-8")
+LOGIN_PAGE = '<html><head><meta name="csrf-token" content="t"></head><body><form action="/login"></form></body></html>'
+ACCOUNT_PAGE = ('<html><body><div class="courseList"><div class="courseList--term">Fall 2026</div>'
+                '<div class="courseList--coursesForTerm">'
+                '<a class="courseBox" href="/courses/1"><div class="courseBox--name">Course A</div>'
+                '<div class="courseBox--shortTerm">Fall 2026</div></a></div></div></body></html>')
+PASSWORDS = {"alice@example.com": "a-secret", "bob@example.com": "b-secret"}
+
+
+class GradescopeAdapter(BaseAdapter):
+    """
+    A minimal Gradescope: the login form, a dashboard with one course and its
+    course page. Logging in sets a cookie naming the account; every other
+    page records which account's cookie it was requested with.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.seen: list[tuple[str | None, str]] = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        url = request.url
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        if url == LOGIN_URL and request.method == "POST":
+            form = {key: values[0] for key, values in parse_qs(request.body).items()}
+            email = form["session[email]"]
+            if PASSWORDS.get(email) != form["session[password]"]:
+                return build_response(request, 200, "OK", headers, LOGIN_PAGE.encode(), self)
+            headers += [("Location", f"{BASE_URL}/account"), ("Set-Cookie", f"user={email}; Path=/")]
+            return build_response(request, 302, "Found", headers, b"", self)
+        if url == LOGIN_URL:
+            return build_response(request, 200, "OK", headers, LOGIN_PAGE.encode(), self)
+
+        cookie = request.headers.get("Cookie", "")
+        user = cookie.removeprefix("user=") if cookie.startswith("user=") else None
+        with self._lock:
+            self.seen.append((user, url))
+        if user is None:
+            return build_response(request, 302, "Found", [("Location", LOGIN_URL)], b"", self)
+        page = ACCOUNT_PAGE if url == f"{BASE_URL}/account" else COURSE_PAGE
+        return build_response(request, 200, "OK", headers, page.encode(), self)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GRADESCOPE_NOTIFIERS", "file")
+    monkeypatch.setenv("GRADESCOPE_NOTIFY_FILE", str(tmp_path / "notifications.jsonl"))
+    duedates.pin_time(datetime(2026, 9, 1, tzinfo=timezone.utc))
+    yield
+    duedates.pin_time(None)
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    adapter = GradescopeAdapter()
+
+    def create_session():
+        session = requests.Session()
+        session.mount("https://", adapter)
+        return session
+
+    monkeypatch.setattr(batch, "create_session", create_session)
+    return adapter
+
+
+def test_load_accounts_skips_comments_blank_and_short_lines(tmp_path, capsys):
+    path = tmp_path / "accounts.csv"
+    path.write_text("# email,password,notify_to\n"
+                    "alice@example.com,a-secret\n"
+                    "\n"
+                    "not-an-account\n"
+                    " bob@example.com ,b,secret, bob@work.example.com \n", encoding="utf-8")
+    assert batch.load_accounts(str(path)) == [
+        batch.Account("alice@example.com", "a-secret"),
+        batch.Account("bob@example.com", "b", "secret"),
+    ]
+    assert f"{path}:4" in capsys.readouterr().out
+
+
+def test_each_account_uses_its_own_session(adapter):
+    accounts = [batch.Account("alice@example.com", "a-secret"),
+                batch.Account("mallory@example.com", "wrong"),
+                batch.Account("bob@example.com", "b-secret")]
+    results = batch.run_batch(accounts, workers=3)
+
+    assert [(r["email"], r["ok"], r["error"]) for r in results] == [
+        ("alice@example.com", True, None),
+        ("mallory@example.com", False, "login failed"),
+        ("bob@example.com", True, None),
+    ]
+    assert results[0]["assignments"] and results[2]["assignments"] == results[0]["assignments"]
+    # 每个账号的课程页面都带着自己的 cookie 请求：登录失败的账号不影响其他账号
+    assert {(user, url) for user, url in adapter.seen if "/courses/" in url} == {
+        ("alice@example.com", f"{BASE_URL}/courses/1"),
+        ("bob@example.com", f"{BASE_URL}/courses/1"),
+    }
+
+
+def test_changes_are_kept_until_a_run_notifies(adapter, tmp_path):
+    account = batch.Account("alice@example.com", "a-secret")
+    notifications = tmp_path / "notifications.jsonl"
+
+    quiet = batch.check_account(account, notify=False)
+    assert quiet["changes"]["new"] and not notifications.exists()
+
+    notified = batch.check_account(account, notify=True)
+    assert notified["changes"]["new"] == quiet["changes"]["new"]
+    assert len(notifications.read_text(encoding="utf-8").splitlines()) == 1
+    sent = json.loads(notifications.read_text(encoding="utf-8"))
+    assert {a["name"] for a in sent["changes"]["new"]} == {a["name"] for a in quiet["changes"]["new"]}
+
+    again = batch.check_account(account, notify=True)
+    assert not again["changes"]["new"]
+    assert len(notifications.read_text(encoding="utf-8").splitlines()) == 1
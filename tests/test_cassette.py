@@ -0,0 +1,152 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import cassette
+from gradescope_scraper import duedates
+from gradescope_scraper import main
+from gradescope_scraper.records import Course
+from gradescope_scraper.transport import build_response
+
+COURSE_PAGE = (Path(__file__).parent.parent / "fixtures" / "course.html").read_text(encoding="utf-8")
+LOGIN_URL = "http://gradescope.test/login"
+LOGIN_PAGE = ('<html><head><meta name="csrf-token" content="secret-token"></head><body>'
+              '<p>Signed in as Alice@Example.com</p></body></html>')
+COURSES = [Course("Course A", "http://gradescope.test/courses/1"),
+           Course("Course B", "http://gradescope.test/courses/2")]
+
+
+class SiteAdapter(BaseAdapter):
+    """
+    Serves the login page (setting a session cookie) and the course pages with
+    an ETag, answering a matching If-None-Match with 304.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.versions = Counter()
+
+    def send(self, request, **kwargs):
+        if request.url == LOGIN_URL:
+            headers = [("Content-Type", "text/html; charset=utf-8"),
+                       ("Set-Cookie", "_gradescope_session=abc123; path=/; HttpOnly")]
+            return build_response(request, 200, "OK", headers, LOGIN_PAGE.encode(), self)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return build_response(request, 304, "Not Modified", [("ETag", '"v1"')], b"", self)
+        # 每次请求返回新版本，检查回放是否按录制顺序
+        self.versions[request.url] += 1
+        page = COURSE_PAGE.replace("HW 0", f"HW 0 (v{self.versions[request.url]})")
+        headers = [("Content-Type", "text/html; charset=utf-8"), ("ETag", '"v1"')]
+        return build_response(request, 200, "OK", headers, page.encode(), self)
+
+    def close(self):
+        pass
+
+
+class OfflineAdapter(BaseAdapter):
+    """Fails the test if a replay reaches the network."""
+
+    def send(self, request, **kwargs):
+        raise AssertionError(f"replay sent {request.url} over the network")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    yield
+    # 回放会把时钟固定在录制时间
+    duedates.pin_time(None)
+
+
+def _session(recording: cassette.Cassette, inner: BaseAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", cassette.CassetteAdapter(recording, inner))
+    return session
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """Records a login and two course checks, the second one conditional, and returns the cassette path."""
+    path = str(tmp_path / "run.jsonl")
+    recording = cassette.Cassette(path, "record", email="alice@example.com")
+    session = _session(recording, SiteAdapter())
+    session.get(LOGIN_URL)
+    main.collect_unsubmitted(session, COURSES, max_workers=1)
+    session.get(COURSES[0].url, headers={"If-None-Match": '"v1"'})
+    recording.close()
+    return path
+
+
+def test_recording_is_scrubbed(recorded):
+    lines = Path(recorded).read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0])["format"] == cassette.FORMAT
+    entries = [json.loads(line) for line in lines[1:]]
+    assert [(e["method"], e["url"]) for e in entries] == [
+        ("GET", LOGIN_URL), ("GET", COURSES[0].url), ("GET", COURSES[1].url), ("GET", COURSES[0].url)]
+    text = "\n".join(lines)
+    for secret in ("secret-token", "abc123", "Alice@Example.com"):
+        assert secret not in text
+    assert ["Set-Cookie", "_gradescope_session=scrubbed; path=/; HttpOnly"] in entries[0]["headers"]
+    assert cassette.PLACEHOLDER_EMAIL in entries[0]["body"]
+    # 录制时去掉了条件请求头：最后一次请求也得到完整页面
+    assert entries[3]["status"] == 200 and "HW 0 (v2)" in entries[3]["body"]
+
+
+def test_replay_returns_the_recorded_run_offline(recorded):
+    live = requests.Session()
+    live.mount("http://", SiteAdapter())
+    expected = main.collect_unsubmitted(live, COURSES, max_workers=1)
+
+    replay = _session(cassette.Cassette(recorded), OfflineAdapter())
+    assert main.collect_unsubmitted(replay, COURSES, max_workers=1) == expected
+    assert replay.get(LOGIN_URL).cookies.get("_gradescope_session") == cassette.PLACEHOLDER
+
+
+def test_replay_serves_repeated_requests_in_order(recorded):
+    replay = _session(cassette.Cassette(recorded), OfflineAdapter())
+    bodies = [replay.get(COURSES[0].url).text for _ in range(3)]
+    assert ["HW 0 (v1)" in bodies[0], "HW 0 (v2)" in bodies[1], "HW 0 (v2)" in bodies[2]] == [True] * 3
+    assert replay.get(COURSES[1].url, headers={"If-None-Match": '"v1"'}).status_code == 304
+    with pytest.raises(cassette.CassetteMiss):
+        replay.get("http://gradescope.test/courses/3")
+
+
+def test_replay_pins_the_clock_to_the_recording(recorded):
+    replay = cassette.Cassette(recorded)
+    assert duedates.current_time() == replay.recorded_at
+
+
+@pytest.mark.parametrize("kind, error", [("timeout", requests.exceptions.ReadTimeout),
+                                         ("connection", requests.exceptions.ConnectionError)])
+def test_injected_errors(recorded, kind, error):
+    replay = _session(cassette.Cassette(recorded, faults=[(kind, 1.0)]), OfflineAdapter())
+    with pytest.raises(error):
+        replay.get(COURSES[0].url, timeout=(0.01, 0.01))
+
+
+def test_injected_faults_are_repeatable(recorded):
+    def outcomes(seed: str) -> list[int]:
+        replay = _session(cassette.Cassette(recorded, faults=[("503", 0.5)], seed=seed), OfflineAdapter())
+        return [replay.get(course.url).status_code for course in COURSES for _ in range(20)]
+
+    first = outcomes("7")
+    assert first == outcomes("7")
+    assert first != outcomes("8")
+    assert set(first) == {200, 503} and 10 <= first.count(503) <= 30
+
+
+def test_faults_do_not_change_the_replayed_result(recorded, monkeypatch):
+    # 注入的 503 由 safe_request() 重试，不影响最终结果；跳过退避等待
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+    expected = main.collect_unsubmitted(_session(cassette.Cassette(recorded), OfflineAdapter()), COURSES,
+                                        max_workers=1)
+    faulty = _session(cassette.Cassette(recorded, faults=[("503", 0.3)], seed="1"), OfflineAdapter())
+    assert main.collect_unsubmitted(faulty, COURSES, max_workers=1) == expected
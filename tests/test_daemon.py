@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import daemon
+from gradescope_scraper.records import Course
+from gradescope_scraper.transport import build_response
+
+LOGIN_PAGE = '<html><head><meta name="csrf-token" content="t"></head><body><form action="/login"></form></body></html>'
+SOON = Course("Course Soon", "http://gradescope.test/courses/1")
+BROKEN = Course("Course Broken", "http://gradescope.test/courses/2")
+IDLE = Course("Course Idle", "http://gradescope.test/courses/3")
+
+
+def _course_page(due: datetime) -> str:
+    return ('<html><body><table id="assignments-student-table"><tbody>'
+            '<tr><th scope="row"><a href="/courses/1/assignments/1">HW 1</a></th><td>No Submission</td>'
+            f'<td><time class="submissionTimeChart--dueDate" datetime="{due:%Y-%m-%d %H:%M:%S %z}">Due</time></td>'
+            '</tr></tbody></table></body></html>')
+
+
+class PageAdapter(BaseAdapter):
+    """Serves the HTML in `pages` (URL -> page) with status 200."""
+
+    def __init__(self, pages: dict[str, str]):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, **kwargs):
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        return build_response(request, 200, "OK", headers, self.pages[request.url].encode("utf-8"), self)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GRADESCOPE_NOTIFIERS", "file")
+    monkeypatch.setenv("GRADESCOPE_NOTIFY_FILE", str(tmp_path / "notifications.jsonl"))
+
+
+def test_scheduler_pops_courses_in_check_time_order():
+    scheduler = daemon.CourseScheduler()
+    scheduler.schedule("c", 30.0)
+    scheduler.schedule("a", 10.0)
+    scheduler.schedule("b", 20.0)
+    assert len(scheduler) == 3 and scheduler.next_at() == 10.0
+
+    assert scheduler.pop_due(5.0) == []
+    assert scheduler.pop_due(25.0) == ["a", "b"]
+    assert scheduler.pop_due(100.0) == ["c"]
+    assert len(scheduler) == 0 and scheduler.next_at() is None
+
+
+def test_rescheduling_replaces_the_earlier_entry():
+    scheduler = daemon.CourseScheduler()
+    scheduler.schedule("a", 10.0)
+    scheduler.schedule("b", 20.0)
+    scheduler.schedule("a", 30.0)
+    scheduler.schedule("c", 15.0)
+    scheduler.remove("c")
+
+    assert len(scheduler) == 2 and scheduler.next_at() == 20.0
+    assert scheduler.pop_due(100.0) == ["b", "a"]
+
+
+def test_next_interval_follows_the_nearest_open_deadline():
+    now = datetime(2026, 9, 1, tzinfo=timezone.utc)
+    hours = [now - timedelta(hours=1), now + timedelta(hours=8), now + timedelta(hours=4)]
+    assert daemon.next_interval(hours, now) == 3600.0
+    assert daemon.next_interval([now + timedelta(minutes=4)], now) == daemon.DEFAULT_MIN_INTERVAL
+    assert daemon.next_interval([now + timedelta(days=3)], now) == daemon.DEFAULT_MAX_INTERVAL
+    assert daemon.next_interval([now - timedelta(hours=1)], now, max_interval=600) == 600
+
+
+def test_checked_courses_are_rescheduled_by_deadline():
+    now = datetime.now(timezone.utc)
+    session = requests.Session()
+    session.mount("http://", PageAdapter({
+        SOON.url: _course_page(now + timedelta(hours=4)),
+        BROKEN.url: LOGIN_PAGE,
+        IDLE.url: _course_page(now - timedelta(days=30)),
+    }))
+    scheduler = daemon.CourseScheduler()
+    courses = [IDLE, SOON, BROKEN]
+
+    daemon.check_courses(session, "user@example.com", courses, courses, scheduler, None,
+                         min_interval=300, max_interval=6 * 3600)
+
+    start = now.timestamp()
+    # 抓取失败的课程最先重试，其次是截止时间临近的课程，没有待交作业的课程最后
+    assert scheduler.pop_due(start + 300 + 60) == [BROKEN.url]
+    assert scheduler.pop_due(start + 3600 - 60) == []
+    assert scheduler.pop_due(start + 3600 + 60) == [SOON.url]
+    assert scheduler.pop_due(start + 6 * 3600 - 60) == []
+    assert scheduler.pop_due(start + 6 * 3600 + 60) == [IDLE.url]
@@ -0,0 +1,123 @@
+import csv
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import duedates
+from gradescope_scraper import export
+from gradescope_scraper.records import Assignment, Course, DueDate, Status
+from gradescope_scraper.transport import build_response
+
+COURSE_PAGE = (Path(__file__).parent.parent / "fixtures" / "course.html").read_text(encoding="utf-8")
+LOGIN_PAGE = '<html><head><meta name="csrf-token" content="t"></head><body><form action="/login"></form></body></html>'
+DUE = datetime(2026, 10, 20, 23, 59, tzinfo=timezone.utc)
+
+
+def _assignments(count: int) -> list[Assignment]:
+    return [Assignment(f"HW {i}", f"http://gradescope.test/courses/1/assignments/{i}", Status.GRADED,
+                       f"{i}.0 / 10.0", (DueDate.parse(DUE, "Due Date"),), course_name="Course A",
+                       course_url="http://gradescope.test/courses/1")
+            for i in range(count)]
+
+
+class PageAdapter(BaseAdapter):
+    """Serves the HTML in `pages` (URL -> page) with status 200."""
+
+    def __init__(self, pages: dict[str, str]):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, **kwargs):
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        return build_response(request, 200, "OK", headers, self.pages[request.url].encode("utf-8"), self)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    duedates.pin_time(datetime(2026, 9, 1, tzinfo=timezone.utc))
+    yield
+    duedates.pin_time(None)
+
+
+def test_exporter_base_class_needs_the_writer_methods(tmp_path):
+    with pytest.raises(TypeError):
+        export.Exporter(str(tmp_path / "out"))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_rows_are_written_in_chunks(monkeypatch, tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    chunks = []
+    exporter_class = export.EXPORTERS[fmt]
+    write_chunk = exporter_class._write_chunk
+
+    def recording_write_chunk(self, rows):
+        chunks.append(len(rows))
+        write_chunk(self, rows)
+
+    monkeypatch.setattr(exporter_class, "_write_chunk", recording_write_chunk)
+    path = tmp_path / f"assignments.{fmt}"
+    with exporter_class(str(path), chunk_size=2) as exporter:
+        exporter.add(_assignments(3))
+        assert chunks == [2]
+        exporter.add(_assignments(2))
+        assert chunks == [2, 2]
+        # 写完之前输出只在临时文件里
+        assert not path.exists() and Path(f"{path}.tmp").exists()
+    assert chunks == [2, 2, 1] and exporter.rows_written == 5
+    assert path.exists() and not Path(f"{path}.tmp").exists()
+
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert list(rows[0]) == [name for name, _ in export.COLUMNS]
+        assert [row["assignment"] for row in rows] == ["HW 0", "HW 1", "HW 2", "HW 0", "HW 1"]
+        assert rows[1]["score"] == "1.0" and rows[1]["due_at"] == DUE.isoformat() and rows[1]["released_at"] == ""
+    else:
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        assert parquet.metadata.num_row_groups == 3 and parquet.metadata.num_rows == 5
+        table = parquet.read()
+        assert table.column("score").to_pylist() == [0.0, 1.0, 2.0, 0.0, 1.0]
+        assert table.column("due_at").to_pylist()[0] == DUE
+
+
+def test_failed_export_leaves_no_file(tmp_path):
+    path = tmp_path / "assignments.csv"
+    with pytest.raises(RuntimeError):
+        with export.CsvExporter(str(path), chunk_size=2) as exporter:
+            exporter.add(_assignments(3))
+            raise RuntimeError("interrupted")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_every_row_of_every_course_is_exported(tmp_path):
+    courses = [Course("Course A", "http://gradescope.test/courses/1"),
+               Course("Course B", "http://gradescope.test/courses/2"),
+               Course("Course C", "http://gradescope.test/courses/3")]
+    session = requests.Session()
+    session.mount("http://", PageAdapter({courses[0].url: COURSE_PAGE, courses[1].url: LOGIN_PAGE,
+                                          courses[2].url: COURSE_PAGE}))
+    path = tmp_path / "assignments.csv"
+    with export.CsvExporter(str(path), chunk_size=4) as exporter:
+        failed = export.export_assignments(session, courses, exporter, max_workers=2)
+
+    assert failed == ["Course B"]
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    # 已评分和已过期的作业也会导出
+    assert sorted((row["course"], row["assignment"], row["status"]) for row in rows) == [
+        (course, name, status)
+        for course in ("Course A", "Course C")
+        for name, status in (("HW 0", "graded"), ("HW 1", "no_submission"), ("Old", "no_submission"))
+    ]
@@ -0,0 +1,126 @@
+import os
+from email.message import EmailMessage
+from types import SimpleNamespace
+
+import pytest
+
+from gradescope_scraper import mailer
+
+pytest.importorskip("aiosmtpd")
+from bench.smtp_server import StandInSMTP  # noqa: E402
+
+
+class Clock:
+    """Stands in for the `time` module inside mailer, so deferred messages become due on demand."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(mailer, "time", clock)
+    # 退避取上限（不抖动），以便检查每次重试的时间
+    monkeypatch.setattr(mailer, "random", SimpleNamespace(uniform=lambda low, high: high))
+    return clock
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return mailer.Outbox(str(tmp_path / "outbox"))
+
+
+@pytest.fixture
+def server():
+    with StandInSMTP() as server:
+        yield server
+
+
+def _config(server: StandInSMTP) -> mailer.SmtpConfig:
+    return mailer.SmtpConfig("127.0.0.1", server.port, "none", from_addr="scraper@example.com")
+
+
+def _enqueue(outbox: mailer.Outbox, clock: Clock, subject: str) -> str:
+    msg = EmailMessage()
+    msg["From"] = "scraper@example.com"
+    msg["To"] = "student@example.com"
+    msg["Subject"] = subject
+    msg.set_content("Homework 1 is due soon.")
+    name = outbox.enqueue(msg)
+    clock.now += 1  # 发件箱按入队时间排序
+    return name
+
+
+def _subjects(server: StandInSMTP) -> list[str]:
+    return [envelope.content.decode().split("Subject: ")[1].splitlines()[0] for envelope in server.messages]
+
+
+def test_message_leaves_the_outbox_only_after_it_was_accepted(clock, outbox, server):
+    server.fail_next = 1
+    first = _enqueue(outbox, clock, "first")
+    _enqueue(outbox, clock, "second")
+
+    assert mailer.deliver_pending(outbox, _config(server)) == (1, 1)
+    assert _subjects(server) == ["second"]
+    [(name, entry)] = outbox.due(float("inf"))
+    assert name == first and entry["attempts"] == 1 and "451" in entry["last_error"]
+
+    clock.now = entry["next_attempt"]
+    assert mailer.deliver_pending(outbox, _config(server)) == (1, 0)
+    assert _subjects(server) == ["second", "first"]
+    assert outbox.due(float("inf")) == []
+
+
+def test_unreachable_server_keeps_every_message(clock, outbox):
+    # 端口 9 上没有 SMTP 服务器：连接被拒绝
+    names = [_enqueue(outbox, clock, "first"), _enqueue(outbox, clock, "second")]
+    assert mailer.deliver_pending(outbox, mailer.SmtpConfig("127.0.0.1", 9, "none")) == (0, 2)
+    assert [(name, entry["attempts"]) for name, entry in outbox.due(float("inf"))] == [(n, 1) for n in names]
+
+
+def test_rejected_message_backs_off_then_moves_to_failed(clock, outbox, server):
+    server.fail_next = mailer.MAX_ATTEMPTS
+    name = _enqueue(outbox, clock, "rejected")
+
+    delays = []
+    for _ in range(mailer.MAX_ATTEMPTS - 1):
+        assert mailer.deliver_pending(outbox, _config(server)) == (0, 1)
+        [(_, entry)] = outbox.due(float("inf"))
+        delays.append(entry["next_attempt"] - clock.now)
+        # 未到重试时间的邮件不会被发送
+        assert mailer.deliver_pending(outbox, _config(server)) == (0, 0)
+        clock.now = entry["next_attempt"]
+    assert delays == [min(mailer.RETRY_CAP, mailer.RETRY_BASE * 2 ** n) for n in range(mailer.MAX_ATTEMPTS - 1)]
+
+    assert mailer.deliver_pending(outbox, _config(server)) == (0, 1)
+    assert outbox.due(float("inf")) == []
+    assert os.listdir(os.path.join(outbox.path, "failed")) == [name]
+    assert server.messages == []
+
+
+def test_backoff_is_capped_and_jittered(monkeypatch, clock, outbox):
+    name = _enqueue(outbox, clock, "rejected")
+    entry = {"message": "", "attempts": 11}
+    outbox.defer(name, entry, OSError("refused"))
+    assert entry["next_attempt"] - clock.now == mailer.RETRY_CAP
+
+    monkeypatch.setattr(mailer, "random", SimpleNamespace(uniform=lambda low, high: low))
+    entry["attempts"] = 0
+    outbox.defer(name, entry, OSError("refused"))
+    assert entry["next_attempt"] - clock.now == mailer.RETRY_BASE / 2
+
+
+def test_one_batch_uses_one_connection(clock, outbox, server):
+    for subject in ("first", "second", "third"):
+        _enqueue(outbox, clock, subject)
+    assert mailer.deliver_pending(outbox, _config(server)) == (3, 0)
+    assert server.connections == 1
+
+    _enqueue(outbox, clock, "fourth")
+    assert mailer.deliver_pending(outbox, _config(server)) == (1, 0)
+    assert server.connections == 2
+    assert _subjects(server) == ["first", "second", "third", "fourth"]
@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import duedates
+from gradescope_scraper import main
+from gradescope_scraper.page_cache import PageCache
+from gradescope_scraper.records import Course
+from gradescope_scraper.transport import build_response
+
+COURSE_PAGE = (Path(__file__).parent.parent / "fixtures" / "course.html").read_text(encoding="utf-8")
+LOGIN_PAGE = '<html><head><meta name="csrf-token" content="t"></head><body><form action="/login"></form></body></html>'
+
+
+class PageAdapter(BaseAdapter):
+    """Serves the HTML in `pages` (URL -> page) with status 200."""
+
+    def __init__(self, pages: dict[str, str]):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, **kwargs):
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        return build_response(request, 200, "OK", headers, self.pages[request.url].encode("utf-8"), self)
+
+    def close(self):
+        pass
+
+
+class ETagAdapter(PageAdapter):
+    """Like PageAdapter, but answers a matching If-None-Match with 304 and keeps every response it sent."""
+
+    def __init__(self, pages: dict[str, str]):
+        super().__init__(pages)
+        self.sent: list[requests.Response] = []
+
+    def send(self, request, **kwargs):
+        if request.headers.get("If-None-Match") == '"v1"':
+            response = build_response(request, 304, "Not Modified", [("ETag", '"v1"')], b"", self)
+        else:
+            response = super().send(request, **kwargs)
+            response.headers["ETag"] = '"v1"'
+        self.sent.append(response)
+        return response
+
+
+COURSES = [Course("Course A", "http://gradescope.test/courses/1"),
+           Course("Course B", "http://gradescope.test/courses/2")]
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    duedates.pin_time(datetime(2026, 9, 1, tzinfo=timezone.utc))
+    yield
+    duedates.pin_time(None)
+
+
+def _collect(pages: dict[str, str]):
+    session = requests.Session()
+    session.mount("http://", PageAdapter(pages))
+    return main.collect_unsubmitted(session, COURSES, max_workers=1)
+
+
+@pytest.mark.parametrize("streaming", ["0", "1"])
+def test_page_without_table_fails_the_course(monkeypatch, streaming):
+    monkeypatch.setenv("GRADESCOPE_STREAMING", streaming)
+    assignments, failed = _collect({COURSES[0].url: COURSE_PAGE, COURSES[1].url: LOGIN_PAGE})
+    assert failed == ["Course B"]
+    assert assignments and {a.course_name for a in assignments} == {"Course A"}
+
+
+NESTED_TABLE_PAGE = COURSE_PAGE.replace(
+    '<div class="submissionStatus--text">No Submission</div>',
+    '<div class="submissionStatus--text">No Submission</div>'
+    '<table class="lateDays"><tbody><tr><td>2 late days</td></tr></tbody></table>', 1)
+SECOND_TBODY_PAGE = COURSE_PAGE.replace(
+    "</tbody></table>",
+    '</tbody><tbody><tr><th scope="row">Hidden</th><td>No Submission</td>'
+    '<td><time class="submissionTimeChart--dueDate" datetime="2030-10-20 23:59:00 -0700">Due</time></td></tr>'
+    "</tbody></table>")
+
+
+@pytest.mark.parametrize("streaming", ["0", "1"])
+@pytest.mark.parametrize("page", [NESTED_TABLE_PAGE, SECOND_TBODY_PAGE], ids=["nested table", "second tbody"])
+def test_only_the_first_body_of_the_outer_table_is_read(monkeypatch, streaming, page):
+    monkeypatch.setenv("GRADESCOPE_STREAMING", streaming)
+    rows = []
+    for html in (COURSE_PAGE, page):
+        session = requests.Session()
+        session.mount("http://", PageAdapter({COURSES[0].url: html}))
+        rows.append([(row.name, row.link, row.status, row.due_dates)
+                     for row in main.get_assignment_rows(session, COURSES[0].url)])
+    assert rows[0] and rows[1] == rows[0]
+
+
+def test_page_without_table_keeps_the_stored_state():
+    pages = {course.url: COURSE_PAGE for course in COURSES}
+    assignments, failed = _collect(pages)
+    first = main.sync_state("user@example.com", COURSES, assignments, failed)
+    assert len(first.new) == len(assignments) > 0
+
+    # 第二次运行时课程 B 被重定向到登录页：它的作业不能被当作已提交
+    pages[COURSES[1].url] = LOGIN_PAGE
+    assignments, failed = _collect(pages)
+    second = main.sync_state("user@example.com", COURSES, assignments, failed)
+    assert failed == ["Course B"]
+    assert not second.submitted and not second.expired and not second.new
+
+
+def test_streamed_responses_are_closed(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_STREAMING", "1")
+    adapter = ETagAdapter({COURSES[0].url: COURSE_PAGE})
+    session = requests.Session()
+    session.mount("http://", adapter)
+    cache = PageCache(str(tmp_path / "pages.json"))
+
+    first = main.get_assignment_rows(session, COURSES[0].url, cache)
+    second = main.get_assignment_rows(session, COURSES[0].url, cache)
+    assert first and second == first
+    assert [r.status_code for r in adapter.sent] == [200, 304]
+    # 未关闭的响应不会把连接还给连接池
+    assert all(r.raw.closed for r in adapter.sent)
@@ -0,0 +1,162 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gradescope_scraper import mailer
+from gradescope_scraper import notifiers
+from gradescope_scraper.records import Assignment, Status
+
+ASSIGNMENTS = [Assignment("Homework 1", "http://gradescope.test/courses/1/assignments/1", Status.NO_SUBMISSION,
+                          "No Submission", course_name="Course A")]
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    for name in ("SMTP_HOST", "SMTP_PORT", "SMTP_USER", "SMTP_PASSWORD", "SMTP_FROM", "SMTP_TO", "SMTP_SECURITY"):
+        monkeypatch.delenv(name, raising=False)
+
+
+class Recorder(notifiers.Notifier):
+    """Sleeps for `delay` seconds (or until `release` is set), then succeeds or raises `error`."""
+
+    def __init__(self, name: str, delay: float = 0.0, error: Exception | None = None, timeout: float = 5.0):
+        super().__init__(timeout)
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.release = threading.Event()
+
+    def send(self, assignments, diff, account):
+        self.release.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Keeps the JSON documents POSTed to it."""
+
+    documents: list[dict] = []
+
+    def do_POST(self):
+        self.documents.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def webhook_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/hook"
+    server.shutdown()
+    server.server_close()
+
+
+def _smtp_env(monkeypatch, port: int) -> None:
+    monkeypatch.setenv("SMTP_HOST", "127.0.0.1")
+    monkeypatch.setenv("SMTP_PORT", str(port))
+    monkeypatch.setenv("SMTP_SECURITY", "none")
+    monkeypatch.setenv("SMTP_FROM", "scraper@example.com")
+    monkeypatch.setenv("SMTP_TO", "student@example.com")
+
+
+def test_email_without_smtp_settings_fails():
+    outcomes = notifiers.dispatch([notifiers.EmailNotifier()], ASSIGNMENTS)
+    assert outcomes["email"] != "ok"
+
+
+def test_undelivered_email_fails_and_is_not_kept(monkeypatch):
+    # 端口 9 上没有 SMTP 服务器：连接被拒绝
+    _smtp_env(monkeypatch, 9)
+    outcomes = notifiers.dispatch([notifiers.EmailNotifier()], ASSIGNMENTS)
+    assert "DeliveryError" in outcomes["email"]
+    # 调用方保留状态并在下次运行重新通知，发件箱里不能再留一份，否则会重复发送
+    assert mailer.Outbox().due(float("inf")) == []
+
+
+def test_delivered_email_is_ok(monkeypatch):
+    smtp_server = pytest.importorskip("bench.smtp_server")
+    pytest.importorskip("aiosmtpd")
+    with smtp_server.StandInSMTP() as server:
+        _smtp_env(monkeypatch, server.port)
+        outcomes = notifiers.dispatch([notifiers.EmailNotifier()], ASSIGNMENTS)
+    assert outcomes == {"email": "ok"}
+    assert [m.rcpt_tos for m in server.messages] == [["student@example.com"]]
+    assert mailer.Outbox().due(float("inf")) == []
+
+
+def test_notifier_base_class_needs_send():
+    with pytest.raises(TypeError):
+        notifiers.Notifier()
+
+    class Incomplete(notifiers.Notifier):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_backends_come_from_the_environment(monkeypatch, capsys):
+    monkeypatch.setenv("GRADESCOPE_NOTIFIERS", "email, File,webhook,command,pager")
+    monkeypatch.setenv("GRADESCOPE_NOTIFY_TIMEOUT", "2.5")
+    monkeypatch.setenv("GRADESCOPE_NOTIFY_COMMAND", "notify-send")
+    monkeypatch.delenv("GRADESCOPE_WEBHOOK_URL", raising=False)
+
+    configured = notifiers.configured_notifiers("me@example.com")
+    assert [type(n) for n in configured] == [notifiers.EmailNotifier, notifiers.FileNotifier,
+                                             notifiers.CommandNotifier]
+    assert configured[0].to_addr == "me@example.com" and configured[1].path == "-"
+    assert {n.timeout for n in configured} == {2.5}
+    out = capsys.readouterr().out
+    assert "GRADESCOPE_WEBHOOK_URL" in out and "'pager'" in out
+
+
+def test_backends_run_concurrently_and_report_each_outcome():
+    backends = [Recorder("slow-1", delay=0.3), Recorder("slow-2", delay=0.3),
+                Recorder("broken", error=ValueError("bad token"))]
+    started = time.monotonic()
+    outcomes = notifiers.dispatch(backends, ASSIGNMENTS)
+    assert time.monotonic() - started < 0.55
+    assert outcomes == {"slow-1": "ok", "slow-2": "ok", "broken": "ValueError('bad token')"}
+
+
+def test_hanging_backend_times_out_without_delaying_the_others():
+    hanging = Recorder("hanging", delay=60, timeout=0.2)
+    started = time.monotonic()
+    outcomes = notifiers.dispatch([hanging, Recorder("quick")], ASSIGNMENTS)
+    assert time.monotonic() - started < 1
+    assert outcomes == {"hanging": "timeout", "quick": "ok"}
+    hanging.release.set()
+
+
+def test_file_webhook_and_command_receive_the_same_document(tmp_path, webhook_url):
+    file_path = tmp_path / "notifications.jsonl"
+    command_path = tmp_path / "command.json"
+    script = f"import shutil, sys; shutil.copyfileobj(sys.stdin, open({str(command_path)!r}, 'w'))"
+    backends = [notifiers.FileNotifier(str(file_path)), notifiers.WebhookNotifier(webhook_url, timeout=5),
+                notifiers.CommandNotifier(f"{sys.executable} -c {script!r}")]
+
+    assert notifiers.dispatch(backends, ASSIGNMENTS, account="user@example.com") == {
+        "file": "ok", "webhook": "ok", "command": "ok"}
+    documents = [json.loads(file_path.read_text(encoding="utf-8")), WebhookHandler.documents[-1],
+                 json.loads(command_path.read_text(encoding="utf-8"))]
+    for document in documents:
+        document.pop("sent_at")  # 各后端分别生成文档
+    assert all(document == documents[0] for document in documents)
+    assert documents[0]["account"] == "user@example.com"
+    assert [a["name"] for a in documents[0]["assignments"]] == ["Homework 1"]
+
+
+def test_failing_command_is_reported():
+    command = notifiers.CommandNotifier(f"{sys.executable} -c 'import sys; sys.exit(3)'")
+    assert notifiers.dispatch([command], ASSIGNMENTS) == {
+        "command": "RuntimeError('notify command exited with status 3')"}
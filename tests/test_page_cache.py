@@ -0,0 +1,148 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import duedates
+from gradescope_scraper import main
+from gradescope_scraper import page_cache
+from gradescope_scraper.page_cache import PageCache, table_fingerprint
+from gradescope_scraper.transport import build_response
+
+COURSE_URL = "http://gradescope.test/courses/1"
+COURSE_PAGE = (Path(__file__).parent.parent / "fixtures" / "course.html").read_text(encoding="utf-8")
+
+
+class CourseAdapter(BaseAdapter):
+    """
+    Serves `page` for every URL with the given validators, answering a
+    matching If-None-Match / If-Modified-Since with 304. Keeps the headers of
+    every request it received.
+    """
+
+    def __init__(self, page: str, etag: str | None = None, last_modified: str | None = None):
+        super().__init__()
+        self.page = page
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests: list[dict[str, str]] = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(dict(request.headers))
+        validators = [(name, value) for name, value in (("ETag", self.etag), ("Last-Modified", self.last_modified))
+                      if value is not None]
+        if ((self.etag is not None and request.headers.get("If-None-Match") == self.etag)
+                or (self.last_modified is not None
+                    and request.headers.get("If-Modified-Since") == self.last_modified)):
+            return build_response(request, 304, "Not Modified", validators, b"", self)
+        headers = [("Content-Type", "text/html; charset=utf-8"), *validators]
+        return build_response(request, 200, "OK", headers, self.page.encode("utf-8"), self)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("GRADESCOPE_FULL_REFRESH", raising=False)
+    duedates.pin_time(datetime(2026, 9, 1, tzinfo=timezone.utc))
+    yield
+    duedates.pin_time(None)
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Counts the course pages main actually parses."""
+    calls = []
+    parse = main.parse_assignment_rows
+
+    def counting_parse(html, course_url):
+        calls.append(course_url)
+        return parse(html, course_url)
+
+    monkeypatch.setattr(main, "parse_assignment_rows", counting_parse)
+    return calls
+
+
+def _fetch(adapter: CourseAdapter, cache: PageCache):
+    session = requests.Session()
+    session.mount("http://", adapter)
+    return main.get_assignment_rows(session, COURSE_URL, cache)
+
+
+@pytest.mark.parametrize("validators", [{"etag": '"v1"'}, {"last_modified": "Tue, 01 Sep 2026 10:00:00 GMT"}],
+                         ids=["etag", "last-modified"])
+def test_not_modified_page_reuses_the_stored_rows(tmp_path, parses, validators):
+    adapter = CourseAdapter(COURSE_PAGE, **validators)
+    cache = PageCache(str(tmp_path / "pages.json"))
+
+    first = _fetch(adapter, cache)
+    second = _fetch(adapter, cache)
+    assert first and second == first
+    assert parses == [COURSE_URL]
+    assert "If-None-Match" not in adapter.requests[0] and "If-Modified-Since" not in adapter.requests[0]
+    header = "If-None-Match" if "etag" in validators else "If-Modified-Since"
+    assert adapter.requests[1][header] == next(iter(validators.values()))
+
+
+def test_not_modified_without_stored_rows_fetches_again(tmp_path, parses):
+    adapter = CourseAdapter(COURSE_PAGE, etag='"v1"')
+    cache = PageCache(str(tmp_path / "pages.json"))
+    cache.store(COURSE_URL, [], None, etag='"v1"')
+    cache._entries[COURSE_URL]["format"] = page_cache.FORMAT - 1  # 旧格式的条目：行记录不可用
+
+    rows = _fetch(adapter, cache)
+    assert rows and parses == [COURSE_URL]
+    assert ["If-None-Match" in headers for headers in adapter.requests] == [True, False]
+
+
+def test_unchanged_table_is_not_parsed_again(tmp_path, parses):
+    adapter = CourseAdapter(COURSE_PAGE)
+    cache = PageCache(str(tmp_path / "pages.json"))
+    first = _fetch(adapter, cache)
+
+    # 没有 ETag/Last-Modified，页面其他部分变了，但作业表格没变
+    adapter.page = COURSE_PAGE.replace("<body>", "<body><nav>New announcement</nav>")
+    assert _fetch(adapter, cache) == first
+    assert parses == [COURSE_URL]
+
+    adapter.page = COURSE_PAGE.replace("HW 1", "Homework 1")
+    assert [row.name for row in _fetch(adapter, cache)][0] == "Homework 1"
+    assert parses == [COURSE_URL, COURSE_URL]
+
+
+def test_table_fingerprint_only_covers_the_assignments_table():
+    fingerprint = table_fingerprint(COURSE_PAGE)
+    assert fingerprint is not None
+    assert table_fingerprint(COURSE_PAGE.replace("<body>", "<body><p>Hello</p>")) == fingerprint
+    assert table_fingerprint(COURSE_PAGE.replace("No Submission", "Submitted", 1)) != fingerprint
+    assert table_fingerprint("<html><body><table id='other'></table></body></html>") is None
+
+
+def test_account_cache_survives_a_restart_unless_refreshing(tmp_path, parses):
+    adapter = CourseAdapter(COURSE_PAGE, etag='"v1"')
+    cache = PageCache.for_account("user@example.com")
+    rows = _fetch(adapter, cache)
+    cache.save()
+
+    assert _fetch(adapter, PageCache.for_account("User@Example.com ")) == rows
+    assert parses == [COURSE_URL]
+    assert _fetch(adapter, PageCache.for_account("user@example.com", full_refresh=True)) == rows
+    assert parses == [COURSE_URL, COURSE_URL]
+
+
+def test_prune_drops_unlisted_and_stale_entries(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.json"))
+    for url in ("http://gradescope.test/courses/1", "http://gradescope.test/courses/2",
+                "http://gradescope.test/courses/3"):
+        cache.store(url, [], None)
+    cache._entries["http://gradescope.test/courses/3"]["used_at"] -= page_cache.ENTRY_MAX_AGE + 1
+
+    cache.prune(["http://gradescope.test/courses/1", "http://gradescope.test/courses/3"])
+    cache.save()
+    assert list(json.loads(Path(cache.path).read_text(encoding="utf-8"))) == ["http://gradescope.test/courses/1"]
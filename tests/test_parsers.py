@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from bench import fixtures
+from gradescope_scraper import parsers
+
+COURSE_URL = "http://gradescope.test/courses/1"
+COURSE_PAGE = (Path(__file__).parent.parent / "fixtures" / "course.html").read_text(encoding="utf-8")
+
+ROW_1 = ('<tr role="row"><th scope="row"><a href="/courses/1/assignments/11">HW 1</a></th>'
+         '<td class="submissionStatus"><div>No Submission</div></td>'
+         '<td><time class="submissionTimeChart--dueDate" datetime="2030-10-20 23:59:00 -0700">Due</time></td></tr>')
+ROW_2 = ('<tr role="row"><th scope="row"><a href="/courses/1/assignments/12">HW 2</a></th>'
+         '<td class="submissionStatus"><div>10.0 / 10.0</div></td>'
+         '<td><time class="submissionTimeChart--dueDate" datetime="2030-10-21 23:59:00 -0700">Due</time></td></tr>')
+BOTH_ROWS = [("HW 1", "No Submission", 1), ("HW 2", "10.0 / 10.0", 1)]
+
+
+def _table(body: str) -> str:
+    return ('<html><body><table id="assignments-student-table"><thead><tr><th>Name</th></tr></thead>'
+            f'{body}</table></body></html>')
+
+
+# 浏览器能正确显示、但各解析库处理方式不同的写法
+PAGES = {
+    "implicit tbody": (_table(ROW_1 + ROW_2), BOTH_ROWS),
+    "unclosed tr": (_table("<tbody>" + ROW_1.replace("</tr>", "") + ROW_2.replace("</tr>", "") + "</tbody>"),
+                    BOTH_ROWS),
+    "unclosed td": (_table("<tbody>" + ROW_1.replace("</td>", "") + ROW_2 + "</tbody>"), BOTH_ROWS),
+    "nested table": (_table("<tbody>" + ROW_1.replace(
+        "<div>No Submission</div>", "<table><tbody><tr><td>Late</td></tr></tbody></table>No Submission") + ROW_2
+        + "</tbody>"), [("HW 1", "LateNo Submission", 1), ("HW 2", "10.0 / 10.0", 1)]),
+    "second tbody": (_table(f"<tbody>{ROW_1}</tbody><tbody>{ROW_2}</tbody>"), BOTH_ROWS[:1]),
+    "no thead": (f'<table id="assignments-student-table"><tbody>{ROW_1}{ROW_2}</tbody></table>', BOTH_ROWS),
+    "no table": ("<html><body><p>Not found</p></body></html>", None),
+}
+
+
+def _summary(rows):
+    return None if rows is None else [(row.name, row.status_text, len(row.due_dates)) for row in rows]
+
+
+def _streamed(html: str):
+    # 以小块喂给流式解析器，让标签和文本跨块切分
+    return list(parsers.iter_assignment_rows((html[i:i + 7] for i in range(0, len(html), 7)), COURSE_URL))
+
+
+@pytest.mark.parametrize("backend", parsers.available_backends())
+@pytest.mark.parametrize("case", PAGES)
+def test_backends_read_the_same_rows(backend, case):
+    html, expected = PAGES[case]
+    assert _summary(parsers.extract_assignment_rows(html, COURSE_URL, backend)) == expected
+
+
+@pytest.mark.parametrize("case", [case for case in PAGES if PAGES[case][1] is not None])
+def test_streaming_reads_the_same_rows(case):
+    html, expected = PAGES[case]
+    assert _summary(_streamed(html)) == expected
+
+
+@pytest.mark.parametrize("backend", parsers.available_backends())
+def test_backends_read_the_saved_course_page(backend):
+    rows = parsers.extract_assignment_rows(COURSE_PAGE, COURSE_URL, backend)
+    assert [(row.name, row.link, row.status_text) for row in rows] == [
+        ("HW 1", "http://gradescope.test/courses/1/assignments/11", "No Submission"),
+        ("HW 0", "http://gradescope.test/courses/1/assignments/12", "10.0 / 10.0"),
+        ("Old", COURSE_URL, "No Submission"),
+    ]
+    assert [len(row.due_dates) for row in rows] == [2, 1, 1]
+    assert rows[0].released_at is not None and rows[1].released_at is None
+
+
+@pytest.mark.parametrize("html", [COURSE_PAGE, fixtures.course_page(200, seed=3), fixtures.account_page()],
+                         ids=["saved course", "synthetic course", "synthetic account"])
+def test_compare_backends_finds_no_differences(html):
+    assert parsers.compare_backends(html, COURSE_URL) == []
@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import duedates
+from gradescope_scraper import main
+from gradescope_scraper import pipeline
+from gradescope_scraper.records import Course
+from gradescope_scraper.transport import build_response
+
+COURSE_PAGE = (Path(__file__).parent.parent / "fixtures" / "course.html").read_text(encoding="utf-8")
+COURSES = [Course(f"Course {i}", f"http://gradescope.test/courses/{i}") for i in range(6)]
+
+
+class PageAdapter(BaseAdapter):
+    """Serves the HTML in `pages` (URL -> page) with status 200."""
+
+    def __init__(self, pages: dict[str, str]):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, **kwargs):
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+        return build_response(request, 200, "OK", headers, self.pages[request.url].encode("utf-8"), self)
+
+    def close(self):
+        pass
+
+
+class CountingParser:
+    """Stands in for the parse processes' entry point and records how many pages are parsed at once."""
+
+    def __init__(self, failing: set[str] = frozenset()):
+        self.failing = failing
+        self.parse = pipeline._parse_page
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, content, encoding, course_url, backend):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(0.05)
+            if course_url in self.failing:
+                raise ValueError("parser crashed")
+            return self.parse(content, encoding, course_url, backend)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.fixture(autouse=True)
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    monkeypatch.setenv("GRADESCOPE_CACHE_DIR", str(tmp_path))
+    duedates.pin_time(datetime(2026, 9, 1, tzinfo=timezone.utc))
+    yield
+    duedates.pin_time(None)
+
+
+@pytest.fixture
+def session():
+    session = requests.Session()
+    session.mount("http://", PageAdapter({course.url: COURSE_PAGE for course in COURSES}))
+    return session
+
+
+@pytest.fixture
+def threaded_pipeline():
+    """A pipeline with a queue depth of 2 whose parse stage runs on threads, so it can be observed."""
+    parse_pipeline = pipeline.ParsePipeline(processes=1, queue_depth=2)
+    parse_pipeline._pool.shutdown()
+    parse_pipeline._pool = ThreadPoolExecutor(4)
+    yield parse_pipeline
+    parse_pipeline.close()
+
+
+def _fetch_rows(parse_pipeline, session, courses=COURSES):
+    # 名额泄漏时下载线程会一直阻塞：在单独的线程中运行并限时等待
+    results = []
+    thread = threading.Thread(target=lambda: results.append(parse_pipeline.fetch_rows(
+        courses, lambda url, headers: session.get(url, headers=headers), max_workers=len(courses))), daemon=True)
+    thread.start()
+    thread.join(10)
+    if thread.is_alive():
+        # 补回泄漏的名额，让阻塞的下载线程结束，否则测试进程无法退出
+        for _ in courses:
+            try:
+                parse_pipeline._slots.release()
+            except ValueError:
+                break
+        thread.join(10)
+        pytest.fail("fetch_rows() got stuck waiting for a parse slot")
+    return results[0]
+
+
+def test_processes_parse_like_the_download_threads(session):
+    expected = main.collect_unsubmitted(session, COURSES[:2], max_workers=2)
+    with pipeline.ParsePipeline(processes=1) as parse_pipeline:
+        assert main.collect_unsubmitted(session, COURSES[:2], max_workers=2, pipeline=parse_pipeline) == expected
+
+
+def test_at_most_queue_depth_pages_are_parsed_at_once(monkeypatch, threaded_pipeline, session):
+    parser = CountingParser()
+    monkeypatch.setattr(pipeline, "_parse_page", parser)
+    results = _fetch_rows(threaded_pipeline, session)
+    assert parser.peak == threaded_pipeline.queue_depth == 2
+    assert all(rows and len(rows) == 3 for rows in results)
+
+
+def test_failed_parse_releases_its_slot(monkeypatch, threaded_pipeline, session):
+    parser = CountingParser(failing={COURSES[0].url, COURSES[1].url, COURSES[2].url})
+    monkeypatch.setattr(pipeline, "_parse_page", parser)
+    results = _fetch_rows(threaded_pipeline, session)
+    assert [rows is not None for rows in results] == [False, False, False, True, True, True]
+
+
+def test_failed_submit_releases_its_slot(threaded_pipeline, session):
+    threaded_pipeline._pool.shutdown()
+    assert _fetch_rows(threaded_pipeline, session) == [None] * len(COURSES)
+    for _ in range(threaded_pipeline.queue_depth):
+        assert threaded_pipeline._slots.acquire(blocking=False)
@@ -0,0 +1,149 @@
+import subprocess
+import sys
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from gradescope_scraper import main
+from gradescope_scraper import settings
+from gradescope_scraper import throttle
+from gradescope_scraper.transport import build_response
+
+
+class StatusAdapter(BaseAdapter):
+    """Answers every request with the next status of `statuses`."""
+
+    def __init__(self, *statuses: int):
+        super().__init__()
+        self.statuses = list(statuses)
+
+    def send(self, request, **kwargs):
+        return build_response(request, self.statuses.pop(0), "", [], b"", self)
+
+    def close(self):
+        pass
+
+
+def _session(*statuses: int) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", StatusAdapter(*statuses))
+    return session
+
+
+def _tripped_breaker(monkeypatch) -> throttle.CircuitBreaker:
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    breaker = throttle.CircuitBreaker(threshold=1, cooldown=0)
+    monkeypatch.setattr(throttle, "breaker", breaker)
+    breaker.record_failure("example.test")
+    assert breaker.is_open("example.test")
+    return breaker
+
+
+def test_release_frees_the_trial():
+    breaker = throttle.CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure("example.test")
+    assert breaker.allow("example.test")
+    assert not breaker.allow("example.test")
+    breaker.release("example.test")
+    assert breaker.allow("example.test")
+
+
+def test_404_during_half_open_closes_the_breaker(monkeypatch):
+    breaker = _tripped_breaker(monkeypatch)
+    assert main.safe_request(_session(404), "get", "http://example.test/missing", retries=1) is None
+    assert not breaker.is_open("example.test")
+    assert main.safe_request(_session(200), "get", "http://example.test/", retries=1) is not None
+
+
+def test_error_during_half_open_releases_the_trial(monkeypatch):
+    breaker = _tripped_breaker(monkeypatch)
+    # 未挂载适配器的 scheme：requests 抛出 InvalidSchema，归类为 "error"
+    assert main.safe_request(requests.Session(), "get", "ftp://example.test/", retries=1) is None
+    assert breaker.allow("example.test")
+
+
+def test_host_failure_during_half_open_reopens(monkeypatch):
+    breaker = _tripped_breaker(monkeypatch)
+    assert main.safe_request(_session(503), "get", "http://example.test/", retries=1) is None
+    assert breaker.is_open("example.test")
+    assert breaker.allow("example.test")  # cooldown 0：下一次试探仍可进行
+
+
+class OverlapAdapter(BaseAdapter):
+    """
+    While the first caller's request is in flight, the circuit opens and a
+    second caller takes the half-open trial; the first request then ends with
+    `outcome` (an error or a status).
+    """
+
+    def __init__(self, breaker: throttle.CircuitBreaker, outcome: int | None):
+        super().__init__()
+        self.breaker = breaker
+        self.outcome = outcome
+        self.second = None
+
+    def send(self, request, **kwargs):
+        self.breaker.record_failure("example.test")
+        self.second = self.breaker.allow("example.test")
+        if self.outcome is None:
+            raise requests.exceptions.InvalidURL("not retried, not a host failure")
+        return build_response(request, self.outcome, "", [], b"", self)
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("outcome", [None, 503])
+def test_request_from_before_the_trial_leaves_it_alone(monkeypatch, outcome):
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", "0")
+    breaker = throttle.CircuitBreaker(threshold=1, cooldown=0)
+    monkeypatch.setattr(throttle, "breaker", breaker)
+    adapter = OverlapAdapter(breaker, outcome)
+    session = requests.Session()
+    session.mount("http://", adapter)
+
+    assert main.safe_request(session, "get", "http://example.test/", retries=1) is None
+    assert adapter.second is throttle.Permit.TRIAL
+    # 第二个调用方的试探仍在进行：第三个调用方不能再得到试探名额
+    assert breaker.allow("example.test") is throttle.Permit.DENIED
+    breaker.release("example.test")
+    assert breaker.allow("example.test") is throttle.Permit.TRIAL
+
+
+@pytest.mark.parametrize("status, expected", [
+    (429, ("429", True, False)),
+    (503, ("5xx", True, True)),
+    (501, ("5xx", False, True)),
+    (404, ("404", False, False)),
+])
+def test_classify_status(status, expected):
+    assert throttle.RetryPolicy().classify(status=status) == expected
+
+
+def test_classify_errors_of_either_library():
+    policy = throttle.RetryPolicy()
+    assert policy.classify(error=requests.exceptions.ConnectTimeout())[0] == "timeout"
+    assert policy.classify(error=requests.exceptions.ConnectionError())[0] == "connection"
+    assert policy.classify(error=ValueError()) == ("error", False, False)
+    httpx = pytest.importorskip("httpx")
+    assert policy.classify(error=httpx.ReadTimeout("slow"))[0] == "timeout"
+    assert policy.classify(error=httpx.ConnectError("refused"))[0] == "connection"
+
+
+@pytest.mark.parametrize("value, connect_timeout, host_rate", [("", 5.0, 10.0), ("2.5", 2.5, 2.5),
+                                                             ("fast", 5.0, 10.0)])
+def test_numeric_settings_treat_empty_as_unset(monkeypatch, capsys, value, connect_timeout, host_rate):
+    # 两个模块使用同一个读取函数：空字符串（例如 workflow 里未设置的变量）等同于未设置
+    monkeypatch.setenv("GRADESCOPE_CONNECT_TIMEOUT", value)
+    monkeypatch.setenv("GRADESCOPE_HOST_RATE", value)
+    assert settings.timeouts()[0] == connect_timeout
+    assert throttle.host_bucket(f"rate-{value}.test").rate == host_rate
+    assert ("must be a number" in capsys.readouterr().out) == (value == "fast")
+
+
+def test_client_does_not_import_requests():
+    pytest.importorskip("httpx")
+    code = "import sys, gradescope_scraper.client; print(sorted({'requests', 'gradescope_scraper.main'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,57 @@
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from gradescope_scraper import transport
+
+pytest.importorskip("httpx")
+pytest.importorskip("h2")
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    """A forward proxy stand-in: answers every request itself and records the target it was asked for."""
+
+    targets: list[str] = []
+
+    def do_GET(self):
+        self.targets.append(self.path)
+        body = b"proxied"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def proxy_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProxyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http2_adapter_uses_the_session_proxy(monkeypatch, proxy_url):
+    monkeypatch.setenv("GRADESCOPE_HTTP2", "1")
+    session = transport.create_session()
+    session.trust_env = False
+    session.proxies = {"http": proxy_url}
+
+    response = session.get("http://gradescope.test/account", timeout=5)
+    assert response.text == "proxied"
+    assert ProxyHandler.targets == ["http://gradescope.test/account"]
+    session.close()
+
+
+def test_ssl_context_follows_verify_and_cert():
+    assert transport._ssl_context(False, None) is False
+    context = transport._ssl_context(True, None)
+    assert context.verify_mode == ssl.CERT_REQUIRED and context.check_hostname
+    with pytest.raises(OSError):
+        transport._ssl_context("/nonexistent/ca-bundle.pem", None)